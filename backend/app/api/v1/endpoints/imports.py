@@ -2,13 +2,15 @@
 import os
 import json
 from datetime import datetime, UTC
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.pagination import after_cursor, cursor_page, set_next_cursor
 from app.database.database import get_db
 from app.models import models, schemas
 from app.models.models import UserRole, UnitStatus, TransferStatus
+from app.repositories.import_repository import ImportRepository
 from app.services.auth_service import get_current_active_user, require_role
 from app.services.import_parser import (
     CANONICAL_FIELDS,
@@ -72,13 +74,20 @@ def _text_or_default(value, default: str) -> str:
 
 @router.get("/", response_model=List[schemas.Import])
 def get_imports(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    imports = db.query(models.Import).order_by(models.Import.import_date.desc()) \
-                .offset(skip).limit(limit).all()
+    """List imports, newest first. Pass the ``X-Next-Cursor`` header as ``cursor`` for the next page."""
+    imports, next_cursor = cursor_page(
+        ImportRepository.get_imports(db, skip, limit + 1, cursor),
+        limit,
+        lambda row: (row["import_date"], row["id"]),
+    )
+    set_next_cursor(response, next_cursor)
     return imports
 
 @router.get("/{import_id}", response_model=schemas.Import)
@@ -95,13 +104,23 @@ def get_import(
 @router.get("/{import_id}/errors")
 def get_import_errors(
     import_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    errors = db.query(models.ImportError).filter(models.ImportError.import_id == import_id) \
-               .offset(skip).limit(limit).all()
+    """List an import's errors by id. Pass the ``X-Next-Cursor`` header as ``cursor`` for the next page."""
+    query = db.query(models.ImportError).filter(models.ImportError.import_id == import_id)
+    if cursor:
+        query = query.filter(after_cursor([models.ImportError.id], cursor))
+    errors, next_cursor = cursor_page(
+        query.order_by(models.ImportError.id).offset(skip).limit(limit + 1).all(),
+        limit,
+        lambda error: (error.id,),
+    )
+    set_next_cursor(response, next_cursor)
     return errors
 
 @router.post("/upload")
@@ -1,30 +1,38 @@
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from app.database.database import get_db
 from app.models import models
 from app.models.models import UnitStatus
 from app.services.auth_service import get_current_active_user
-from app.services.report import ReportService
+from app.services.inventory_cube import PivotDimension
+from app.services.report import ReportService, SeriesMetric
+from app.services.report_cache import cached_report
+from app.services.report_export import ExportFormat
+from app.services.timeseries import Granularity
 
 router = APIRouter()
 
 
 @router.get("/dashboard")
 def get_dashboard_stats(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """Get dashboard statistics."""
-    return ReportService.get_dashboard_stats(db)
+    return cached_report(
+        request, db, "dashboard", {}, lambda: ReportService.get_dashboard_stats(db)
+    )
 
 
 @router.get("/inventory")
 def get_inventory_report(
+    request: Request,
     brand: Optional[str] = None,
     model: Optional[str] = None,
     color: Optional[str] = None,
@@ -32,12 +40,19 @@ def get_inventory_report(
     status: Optional[UnitStatus] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    as_of: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    """Generate inventory report with filters."""
-    return ReportService.get_inventory_report(
-        db,
+    """Generate inventory report with filters.
+
+    The summary covers every matching unit; ``units`` is one page. Pass the
+    returned ``pagination.next_cursor`` as ``cursor`` to fetch the next page.
+    ``as_of`` reports each unit's location and status at that time instead.
+    """
+    params = dict(
         brand=brand,
         model=model,
         color=color,
@@ -45,95 +60,257 @@ def get_inventory_report(
         status=status,
         date_from=date_from,
         date_to=date_to,
+        cursor=cursor,
+        limit=limit,
+        as_of=as_of,
     )
+    return cached_report(
+        request, db, "inventory", params, lambda: ReportService.get_inventory_report(db, **params)
+    )
+
+
+@router.get("/inventory/history")
+def get_inventory_history(
+    request: Request,
+    model: Optional[str] = None,
+    location_id: Optional[int] = None,
+    status: Optional[UnitStatus] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Historical stock curve from the daily inventory snapshots."""
+    params = dict(
+        model=model,
+        location_id=location_id,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return cached_report(
+        request, db, "inventory_history", params,
+        lambda: ReportService.get_inventory_history(db, **params),
+    )
+
+
+@router.get("/aging")
+def get_aging_report(
+    request: Request,
+    location_id: Optional[int] = None,
+    model: Optional[str] = None,
+    batch_period: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Stock aging buckets (0-30, 31-90, 90+ days) and median days-to-sell per model."""
+    params = dict(location_id=location_id, model=model, batch_period=batch_period)
+    return cached_report(
+        request, db, "aging", params, lambda: ReportService.get_aging_report(db, **params)
+    )
+
+
+@router.get("/pivot")
+def get_pivot(
+    dimensions: List[PivotDimension] = Query([PivotDimension.LOCATION, PivotDimension.STATUS]),
+    location_id: Optional[List[int]] = Query(None),
+    model: Optional[List[str]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    color: Optional[List[str]] = Query(None),
+    status: Optional[List[UnitStatus]] = Query(None),
+    batch_period: Optional[List[str]] = Query(None),
+    product_type: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Inventory pivot over any dimensions, with repeatable filters for drill-down.
+
+    e.g. ``?dimensions=location&dimensions=model&status=AVAILABLE``. Served from
+    the in-memory inventory cube rather than a group-by per request.
+    """
+    filters = {
+        PivotDimension.LOCATION: location_id,
+        PivotDimension.MODEL: model,
+        PivotDimension.BRAND: brand,
+        PivotDimension.COLOR: color,
+        PivotDimension.STATUS: status,
+        PivotDimension.BATCH_PERIOD: batch_period,
+        PivotDimension.PRODUCT_TYPE: product_type,
+    }
+    return ReportService.get_pivot(db, list(dict.fromkeys(dimensions)), filters)
 
 
 @router.get("/transfers")
 def get_transfers_report(
+    request: Request,
     user_id: Optional[int] = None,
     location_id: Optional[int] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    """Generate transfers report with filters."""
-    return ReportService.get_transfers_report(
-        db,
+    """Generate transfers report with filters.
+
+    Pass the returned ``pagination.next_cursor`` as ``cursor`` to fetch the next page.
+    """
+    params = dict(
         user_id=user_id,
         location_id=location_id,
         date_from=date_from,
         date_to=date_to,
         skip=skip,
         limit=limit,
+        cursor=cursor,
+    )
+    return cached_report(
+        request, db, "transfers", params, lambda: ReportService.get_transfers_report(db, **params)
+    )
+
+
+@router.get("/cohorts")
+def get_cohort_report(
+    request: Request,
+    batch_period: Optional[str] = None,
+    product_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Batch-period/product-type cohorts: units received, sold, sell-through and distribution."""
+    params = dict(batch_period=batch_period, product_type=product_type)
+    return cached_report(
+        request, db, "cohorts", params, lambda: ReportService.get_cohort_report(db, **params)
+    )
+
+
+@router.get("/routes")
+def get_route_analytics(
+    request: Request,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Transfer flow matrix per origin/destination route with transit-time p50/p95."""
+    params = dict(date_from=date_from, date_to=date_to)
+    return cached_report(
+        request, db, "routes", params, lambda: ReportService.get_route_analytics(db, **params)
     )
 
 
 @router.get("/sales")
 def get_sales_report(
+    request: Request,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     location_id: Optional[int] = None,
+    model: Optional[str] = None,
+    batch_period: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """Generate sales report."""
-    return ReportService.get_sales_report(
-        db,
+    params = dict(
         date_from=date_from,
         date_to=date_to,
         location_id=location_id,
+        model=model,
+        batch_period=batch_period,
+    )
+    return cached_report(
+        request, db, "sales", params, lambda: ReportService.get_sales_report(db, **params)
+    )
+
+
+@router.get("/timeseries")
+def get_time_series(
+    request: Request,
+    metric: SeriesMetric = SeriesMetric.SALES,
+    granularity: Granularity = Granularity.MONTH,
+    tz: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Sales or transfer counts per day, week, month or quarter."""
+    params = dict(
+        metric=metric,
+        granularity=granularity,
+        tz=tz,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return cached_report(
+        request, db, "timeseries", params, lambda: ReportService.get_time_series(db, **params)
     )
 
 
 @router.get("/export/inventory")
-def export_inventory_excel(
+def export_inventory(
     brand: Optional[str] = None,
     model: Optional[str] = None,
     location_id: Optional[int] = None,
     status: Optional[UnitStatus] = None,
+    fmt: ExportFormat = Query(ExportFormat.XLSX, alias="format"),
+    gzip: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    """Export inventory report to Excel."""
-    return ReportService.export_inventory_excel(
+    """Export inventory report as xlsx, csv, ndjson or parquet."""
+    return ReportService.export_inventory(
         db,
         brand=brand,
         model=model,
         location_id=location_id,
         status=status,
+        fmt=fmt,
+        compress=gzip,
     )
 
 
 @router.get("/export/transfers")
-def export_transfers_excel(
+def export_transfers(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
+    fmt: ExportFormat = Query(ExportFormat.XLSX, alias="format"),
+    gzip: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    """Export transfers report to Excel."""
-    return ReportService.export_transfers_excel(
+    """Export transfers report as xlsx, csv, ndjson or parquet."""
+    return ReportService.export_transfers(
         db,
         date_from=date_from,
         date_to=date_to,
+        fmt=fmt,
+        compress=gzip,
     )
 
 
 @router.get("/export/sales")
-def export_sales_excel(
+def export_sales(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     location_id: Optional[int] = None,
+    model: Optional[str] = None,
+    batch_period: Optional[str] = None,
+    fmt: ExportFormat = Query(ExportFormat.XLSX, alias="format"),
+    gzip: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    """Export sales report to Excel."""
-    return ReportService.export_sales_excel(
+    """Export sales report as xlsx, csv, ndjson or parquet."""
+    return ReportService.export_sales(
         db,
         date_from=date_from,
         date_to=date_to,
         location_id=location_id,
+        model=model,
+        batch_period=batch_period,
+        fmt=fmt,
+        compress=gzip,
     )
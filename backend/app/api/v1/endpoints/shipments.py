@@ -0,0 +1,57 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.pagination import cursor_page, set_next_cursor
+from app.database.database import get_db
+from app.models.models import User, UserRole
+from app.schemas.shipment import Shipment, ShipmentCreate, ShipmentFilters, ShipmentReceive, ShipmentSummary
+from app.services.auth_service import get_current_active_user, require_role
+from app.services.shipment_service import ShipmentService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[ShipmentSummary])
+def get_shipments(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    filters: ShipmentFilters = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """List shipments, newest first; ``open=true&destination_location_id=`` lists the ones still on their way there."""
+    shipments, next_cursor = cursor_page(
+        ShipmentService.get_shipments(db, filters, limit + 1, cursor), limit, lambda s: (s.id,)
+    )
+    set_next_cursor(response, next_cursor)
+    return shipments
+
+
+@router.post("/", response_model=Shipment)
+def dispatch_shipment(
+    shipment: ShipmentCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    return ShipmentService.dispatch_shipment(db, shipment, current_user.id)
+
+
+@router.get("/{shipment_id}", response_model=Shipment)
+def get_shipment(
+    shipment_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return ShipmentService.get_shipment(db, shipment_id)
+
+
+@router.post("/{shipment_id}/receive", response_model=Shipment)
+def receive_shipment(
+    shipment_id: int,
+    receipt: ShipmentReceive,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    return ShipmentService.receive_shipment(db, shipment_id, receipt, current_user.id)
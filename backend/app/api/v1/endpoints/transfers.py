@@ -1,7 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
+from app.core.pagination import cursor_page, set_next_cursor
 from app.database.database import get_db
 from app.models.models import UserRole, User
 from app.schemas.transfer import Transfer, TransferCreate, TransferFilters, TransferUpdate, TransferStats
@@ -21,13 +22,20 @@ def get_transfer_stats(
 
 @router.get("/", response_model=List[Transfer])
 def get_transfers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     filters: TransferFilters = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    return TransferService.get_transfers(db, filters, skip, limit)
+    """List transfers, newest first. Pass the ``X-Next-Cursor`` header as ``cursor`` for the next page."""
+    transfers, next_cursor = cursor_page(
+        TransferService.get_transfers(db, filters, skip, limit + 1, cursor), limit, lambda t: (t["id"],)
+    )
+    set_next_cursor(response, next_cursor)
+    return transfers
 
 
 @router.post("/", response_model=Transfer)
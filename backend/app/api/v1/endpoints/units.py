@@ -1,12 +1,16 @@
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.pagination import cursor_page, set_next_cursor
 from app.database.database import get_db
 from app.models import models, schemas
-from app.schemas.unit import Unit, UnitCreate, UnitUpdate, UnitFilters
+from app.schemas.unit import (
+    Unit, UnitCreate, UnitUpdate, UnitFilters,
+    UnitBulkCreate, UnitBulkMove, UnitBulkResult, UnitBulkSell, UnitBulkStatus, UnitSelection,
+)
 from app.schemas.transfer import Transfer as TransferSchema
-from app.models.models import UserRole
+from app.models.models import UnitStatus, UserRole
 from app.services.auth_service import get_current_active_user, require_role
 from app.services.unit_service import UnitService
 
@@ -14,13 +18,43 @@ router = APIRouter()
 
 @router.get("/", response_model=List[Unit])
 def get_units(
+    response: Response,
     filters: UnitFilters = Depends(),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    return UnitService.get_units(db, filters, skip, limit)
+    """List units by id. Pass the ``X-Next-Cursor`` header as ``cursor`` for the next page."""
+    units, next_cursor = cursor_page(
+        UnitService.get_units(db, filters, skip, limit + 1, cursor), limit, lambda u: (u["id"],)
+    )
+    set_next_cursor(response, next_cursor)
+    return units
+
+@router.get("/lookup")
+def lookup_units(
+    code: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Resolve a scanned engine or chassis number (exact, then prefix matches) to slim unit rows."""
+    return UnitService.lookup_units(db, code, limit)
+
+@router.get("/search", response_model=List[Unit])
+def search_units(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[UnitStatus] = None,
+    location_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """Units whose serials, model, brand or notes contain every word of ``q``, best match first."""
+    filters = UnitFilters(status=status, location_id=location_id)
+    return UnitService.search_units(db, q, filters, limit)
 
 @router.post("/", response_model=Unit)
 def create_unit(
@@ -30,6 +64,47 @@ def create_unit(
 ):
     return UnitService.create_unit(db, unit)
 
+@router.post("/bulk", response_model=UnitBulkResult)
+def bulk_create_units(
+    data: UnitBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    """Create many units in one transaction; per-item results are keyed by position."""
+    return UnitService.bulk_create_units(db, data)
+
+@router.post("/bulk/status", response_model=UnitBulkResult)
+def bulk_update_status(
+    data: UnitBulkStatus,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    return UnitService.bulk_update_status(db, data, data.status, current_user.id)
+
+@router.post("/bulk/sell", response_model=UnitBulkResult)
+def bulk_sell_units(
+    data: UnitBulkSell,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    return UnitService.bulk_sell_units(db, data, current_user.id, data.sold_date)
+
+@router.post("/bulk/move", response_model=UnitBulkResult)
+def bulk_move_units(
+    data: UnitBulkMove,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role([UserRole.ADMIN, UserRole.MANAGER, UserRole.OPERATOR]))
+):
+    return UnitService.bulk_move_units(db, data, data.location_id, current_user.id)
+
+@router.post("/bulk/delete", response_model=UnitBulkResult)
+def bulk_delete_units(
+    data: UnitSelection,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role([UserRole.ADMIN]))
+):
+    return UnitService.bulk_delete_units(db, data)
+
 @router.get("/stats")
 def get_unit_stats(
     db: Session = Depends(get_db),
@@ -62,15 +137,23 @@ def delete_unit(
 ):
     return UnitService.delete_unit(db, unit_id)
 
-@router.get("/{unit_id}/transfers", response_model=List[schemas.Transfer])
+@router.get("/{unit_id}/transfers", response_model=List[TransferSchema])
 def get_unit_transfers(
     unit_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    return UnitService.get_unit_transfers(db, unit_id, skip, limit)
+    transfers, next_cursor = cursor_page(
+        UnitService.get_unit_transfers(db, unit_id, skip, limit + 1, cursor),
+        limit,
+        lambda t: (t.dispatched_at, t.id),
+    )
+    set_next_cursor(response, next_cursor)
+    return transfers
 
 @router.post("/{unit_id}/transfer")
 def transfer_unit(
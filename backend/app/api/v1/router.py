@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, units, locations, imports, reports, user, transfers, model_equivalences
+from app.api.v1.endpoints import auth, units, locations, imports, reports, user, transfers, shipments, model_equivalences
 
 router = APIRouter()
 
@@ -11,4 +11,5 @@ router.include_router(locations.router, prefix="/locations", tags=["Locations"])
 router.include_router(imports.router, prefix="/imports", tags=["Imports"])
 router.include_router(model_equivalences.router, prefix="/model-equivalences", tags=["Model Equivalences"])
 router.include_router(transfers.router, prefix="/transfers", tags=["Transfers"])
+router.include_router(shipments.router, prefix="/shipments", tags=["Shipments"])
 router.include_router(reports.router, prefix="/reports", tags=["Reports"])
\ No newline at end of file
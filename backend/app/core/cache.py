@@ -0,0 +1,187 @@
+"""In-process TTL caches for hot read paths, and the inventory data version.
+
+Every user polls the dashboard, so its aggregates are served from a small
+process-local cache. Entries live for ``STATS_CACHE_TTL_SECONDS`` (default 10s,
+``0`` disables caching) and the whole cache is dropped as soon as a transaction
+that wrote units, transfers, locations, imports or users (reports name the
+users who dispatched, received or uploaded) commits in this process, so a user
+never reads numbers older than their own last write. Other workers pick the
+change up when their entries expire.
+
+The same transactions also bump the ``inventory`` row of ``data_versions`` just
+before they commit. Unlike the stats cache, that version is shared by all
+workers, so caches keyed on it (see ``app.services.report_cache``) are never stale.
+Transactions that write units also bump the ``units`` row: the in-process unit
+structures (``app.services.inventory_cube``) follow that one, so a transfer or
+location written by another worker does not make them rebuild.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    DataVersion,
+    Import,
+    InventoryCounter,
+    InventorySnapshot,
+    Location,
+    Transfer,
+    Unit,
+    User,
+)
+
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "10"))
+
+# Models whose writes invalidate cached aggregates (users: reports show their names).
+_INVENTORY_MODELS = (
+    Unit, Transfer, Location, Import, InventoryCounter, InventorySnapshot, User,
+)
+_WRITE_FLAG = "inventory_written"
+INVENTORY_VERSION = "inventory"
+# session.info key holding the inventory version the last commit produced (None
+# when it wrote no inventory data), for after_commit listeners.
+COMMITTED_VERSION = "committed_inventory_version"
+_UNIT_WRITE_FLAG = "units_written"
+UNITS_VERSION = "units"
+# Likewise for the units version (None when the commit wrote no units).
+COMMITTED_UNITS_VERSION = "committed_units_version"
+
+
+class TTLCache:
+    """Thread-safe key/value cache whose entries expire after ``ttl_seconds``."""
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                # Drop the entry closest to expiry to stay bounded.
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, computing it with ``factory`` on a miss.
+
+        The factory runs outside the lock: two concurrent misses may both compute,
+        which is cheaper than serializing every reader behind one slow query.
+        """
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+stats_cache = TTLCache(ttl_seconds=STATS_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_inventory_flush(session: Session, flush_context) -> None:
+    # new/dirty/deleted still hold the pre-flush state inside after_flush.
+    pending = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, _INVENTORY_MODELS) for obj in pending):
+        session.info[_WRITE_FLAG] = True
+    if any(isinstance(obj, Unit) for obj in pending):
+        session.info[_UNIT_WRITE_FLAG] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_inventory_bulk_write(orm_execute_state) -> None:
+    # Bulk insert/update/delete statements bypass the flush, so catch them here.
+    if not (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        return
+    if any(m.class_ in _INVENTORY_MODELS for m in orm_execute_state.all_mappers):
+        orm_execute_state.session.info[_WRITE_FLAG] = True
+    if any(m.class_ is Unit for m in orm_execute_state.all_mappers):
+        orm_execute_state.session.info[_UNIT_WRITE_FLAG] = True
+
+
+def mark_written(session: Session, units: bool = False) -> None:
+    """Record an inventory write (of units, with ``units``) that neither hook above sees.
+
+    For statements sent on the session's connection, such as
+    ``app.core.concurrency.compare_and_set_many``.
+    """
+    session.info[_WRITE_FLAG] = True
+    if units:
+        session.info[_UNIT_WRITE_FLAG] = True
+
+
+def current_data_version(db: Session, name: str = INVENTORY_VERSION) -> int:
+    version = db.query(DataVersion.version).filter(DataVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_data_version(session: Session, name: str = INVENTORY_VERSION) -> int:
+    """Increment the version of ``name`` inside the session's transaction; returns it."""
+    table = DataVersion.__table__
+    connection = session.connection()
+    version = connection.execute(
+        table.update()
+        .where(table.c.name == name)
+        .values(version=table.c.version + 1)
+        .returning(table.c.version)
+    ).scalar()
+    if version is None:
+        connection.execute(table.insert().values(name=name, version=1))
+        version = 1
+    return version
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_version_on_commit(session: Session) -> None:
+    # Flush first so pending writes are seen; the version row is then locked only
+    # for the commit itself rather than the whole transaction.
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    session.info[COMMITTED_VERSION] = (
+        bump_data_version(session) if session.info.get(_WRITE_FLAG) else None
+    )
+    session.info[COMMITTED_UNITS_VERSION] = (
+        bump_data_version(session, UNITS_VERSION)
+        if session.info.get(_UNIT_WRITE_FLAG) else None
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    session.info.pop(_UNIT_WRITE_FLAG, None)
+    if session.info.pop(_WRITE_FLAG, False):
+        stats_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write_flag(session: Session) -> None:
+    session.info.pop(_WRITE_FLAG, None)
+    session.info.pop(COMMITTED_VERSION, None)
+    session.info.pop(_UNIT_WRITE_FLAG, None)
+    session.info.pop(COMMITTED_UNITS_VERSION, None)
@@ -0,0 +1,102 @@
+"""Optimistic concurrency for unit and transfer writes.
+
+``Unit`` and ``Transfer`` carry a ``version`` column that the ORM compares and
+bumps on every UPDATE (``version_id_col``), so of two requests that read the
+same row and then write it, the second one's ``UPDATE ... WHERE id = ? AND
+version = ?`` matches nothing and raises ``StaleDataError`` instead of silently
+overwriting the first. Clients may also send the version they last read; a
+mismatch is rejected before anything is written. Either way the answer is a
+``409 Conflict`` carrying the row's current state, so the client can retry on
+fresh data without any row being locked.
+
+The ORM sends one such UPDATE per row, since it checks each row's match count.
+Bulk operations write the same values to many rows, so ``compare_and_set_many``
+checks the whole batch in one statement (``WHERE (id, version) IN (...)``)
+against its total row count instead.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.database.database import unit_of_work
+
+CONFLICT_DETAIL = "The record was modified by another request"
+
+
+def snapshot(schema, row) -> dict | None:
+    """``row`` as the client would read it from the API, for the 409 body."""
+    return schema.model_validate(row).model_dump(mode="json") if row is not None else None
+
+
+def conflict(current: dict | None = None) -> HTTPException:
+    return HTTPException(status_code=409, detail={"message": CONFLICT_DETAIL, "current": current})
+
+
+def check_version(row, expected: int | None, current: Callable[[], dict]) -> None:
+    """409 when the client read ``row`` at a version other than its current one."""
+    if expected is not None and expected != row.version:
+        raise conflict(current())
+
+
+def claim(row) -> None:
+    """Bump ``row``'s version even if none of its columns change.
+
+    Recording a transfer for a unit does not always change the unit itself;
+    claiming it makes a concurrent write of the same unit conflict all the same.
+    """
+    row.version = row.version + 1
+
+
+@contextmanager
+def compare_and_set(db: Session, current: Callable[[], dict]) -> Iterator[Session]:
+    """A unit of work whose lost race is reported as a 409 with ``current()``."""
+    try:
+        with unit_of_work(db):
+            yield db
+    except StaleDataError:
+        raise conflict(current()) from None
+
+
+def compare_and_set_many(db: Session, rows: list, **values) -> None:
+    """Write ``values`` to ``rows`` (of one versioned model) in a single UPDATE.
+
+    Each row only matches at the version it was read at, and every version is
+    bumped; fewer matches than rows raises ``StaleDataError`` like a lost
+    per-row UPDATE. The rows' in-memory state then holds the written values as
+    committed, so the flush has nothing left to send for them. The statement
+    bypasses the flush hooks: callers keep derived data in step themselves.
+    """
+    if not rows:
+        return
+    mapper = type(rows[0]).__mapper__
+    table = mapper.local_table
+    result = db.connection().execute(
+        table.update()
+        .where(tuple_(table.c.id, table.c.version).in_([(row.id, row.version) for row in rows]))
+        .values(version=table.c.version + 1, **values)
+    )
+    if result.rowcount != len(rows):
+        raise StaleDataError(
+            f"UPDATE statement on table '{table.name}' expected to update "
+            f"{len(rows)} row(s); {result.rowcount} were matched."
+        )
+    # Columns set on update by the database, and relationships over written keys.
+    stale = [
+        column.key for column in table.c if column.onupdate is not None and column.key not in values
+    ]
+    stale += [
+        relationship.key
+        for relationship in mapper.relationships
+        if any(column.key in values for column in relationship.local_columns)
+    ]
+    for row in rows:
+        for key, value in values.items():
+            attributes.set_committed_value(row, key, value)
+        attributes.set_committed_value(row, "version", row.version + 1)
+        if stale:
+            db.expire(row, stale)
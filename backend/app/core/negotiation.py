@@ -0,0 +1,225 @@
+"""Content negotiation: the same API as JSON, MessagePack or CBOR.
+
+Handheld scanners spend much of a request parsing verbose JSON, so any endpoint
+answers in a compact binary format when the client asks for it with ``Accept:
+application/msgpack`` or ``Accept: application/cbor`` (``q`` values honoured).
+Routes are untouched: FastAPI still serializes their response models straight
+to JSON in pydantic's Rust core, and ``NegotiationMiddleware`` transcodes the
+finished JSON body (``orjson`` to decode, the ``msgpack``/``cbor2`` C
+extensions to encode). Bodies that are not ``application/json`` (file exports,
+NDJSON streams) pass through as they are.
+
+``JSONGZipMiddleware`` then gzips large bodies in those three formats for
+clients that accept it. Other bodies are left as they are: xlsx and parquet
+exports are compressed already, and ``gzip=true`` exports are gzip files.
+
+``msgpack`` and ``cbor2`` are optional at runtime: without one, clients that
+ask for it get JSON, which they must accept anyway per ``Content-Type``.
+
+A strong ``ETag`` (``app.services.report_cache``) names one exact byte
+sequence, so ``RepresentationETagMiddleware``, outside gzip, tags each encoding
+of a response apart: ``"<tag>"`` for JSON, ``"<tag>-msgpack"``,
+``"<tag>-cbor"``, each with ``-gzip`` appended once compressed. It maps the
+``If-None-Match`` tags the client sends back to the route's own tag, keeping only
+those that fit the representation this request negotiates.
+"""
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional
+    cbor2 = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+# Media types worth gzipping: the JSON body and its binary encodings.
+_COMPRESSIBLE = frozenset({JSON, MSGPACK, CBOR})
+
+# The ETag suffix of each non-JSON format, and of gzip-compressed bodies.
+_ETAG_SUFFIXES = {MSGPACK: "-msgpack", CBOR: "-cbor"}
+_GZIP_SUFFIX = "-gzip"
+
+# Accept media type -> the format it selects.
+_MEDIA_TYPES = {
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    CBOR: CBOR,
+    JSON: JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+
+
+def _encoders() -> dict:
+    encoders = {}
+    if msgpack is not None:
+        encoders[MSGPACK] = msgpack.packb
+    if cbor2 is not None:
+        encoders[CBOR] = cbor2.dumps
+    return encoders
+
+
+ENCODERS = _encoders()
+
+
+def negotiate(accept: str | None) -> str:
+    """The format to answer in: the client's preferred one that is available, else JSON."""
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        fmt = _MEDIA_TYPES.get(media_type.lower())
+        if fmt is None or (fmt != JSON and fmt not in ENCODERS):
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        # Ties go to the type listed first.
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+class NegotiationMiddleware:
+    """Re-encode JSON responses in the format negotiated from ``Accept``."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = negotiate(Headers(scope=scope).get("accept"))
+
+        start: Message | None = None
+        transcode = False
+        chunks: list[bytes] = []
+
+        async def send_negotiated(message: Message) -> None:
+            nonlocal start, transcode
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                is_json = headers.get("content-type", "").startswith(JSON)
+                if is_json:
+                    headers.add_vary_header("Accept")
+                transcode = is_json and fmt != JSON and "content-encoding" not in headers
+                if transcode:
+                    start = message
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or not transcode:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            raw = b"".join(chunks)
+            body = ENCODERS[fmt](orjson.loads(raw)) if raw else raw
+            headers = MutableHeaders(raw=start["headers"])
+            headers["content-type"] = fmt
+            headers["content-length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_negotiated)
+
+
+class _JSONGZipResponder(GZipResponder):
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            media_type = Headers(raw=message["headers"]).get("content-type", "")
+            # Starlette passes excluded bodies through untouched.
+            self.content_type_is_excluded = media_type.split(";")[0].strip() not in _COMPRESSIBLE
+
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` limited to JSON, MessagePack and CBOR bodies."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            responder = _JSONGZipResponder(self.app, self.minimum_size, self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def _route_tag(tag: str, suffix: str, gzip_ok: bool) -> str | None:
+    """The route's own tag behind a representation tag, or ``None`` if it is another's."""
+    tag = tag.strip().removeprefix("W/")
+    if tag == "*":
+        return tag
+    if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+        return None
+    opaque = tag[1:-1]
+    if gzip_ok:
+        opaque = opaque.removesuffix(_GZIP_SUFFIX)
+    if suffix:
+        if not opaque.endswith(suffix):
+            return None
+        opaque = opaque.removesuffix(suffix)
+    elif opaque.endswith(tuple(_ETAG_SUFFIXES.values())):
+        return None
+    return f'"{opaque}"'
+
+
+class RepresentationETagMiddleware:
+    """Give the JSON, MessagePack, CBOR and gzip forms of a response distinct strong ETags."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = MutableHeaders(scope=scope)
+        suffix = _ETAG_SUFFIXES.get(negotiate(headers.get("accept")), "")
+        gzip_ok = "gzip" in headers.get("accept-encoding", "")
+
+        # The route's tag -> the tag the client sent, to echo back on a 304.
+        sent: dict[str, str] = {}
+        if "if-none-match" in headers:
+            for tag in headers["if-none-match"].split(","):
+                route_tag = _route_tag(tag, suffix, gzip_ok)
+                if route_tag is not None:
+                    sent[route_tag] = tag.strip().removeprefix("W/")
+            if sent:
+                headers["if-none-match"] = ", ".join(sent)
+            else:
+                del headers["if-none-match"]
+
+        async def send_tagged(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(raw=message["headers"])
+                etag = response_headers.get("etag")
+                if etag and etag.startswith('"'):
+                    if message["status"] == 304:
+                        response_headers["etag"] = sent.get(etag, etag)
+                    else:
+                        media_type = response_headers.get("content-type", "").split(";")[0]
+                        tag_suffix = _ETAG_SUFFIXES.get(media_type, "")
+                        if response_headers.get("content-encoding") == "gzip":
+                            tag_suffix += _GZIP_SUFFIX
+                        response_headers["etag"] = etag[:-1] + tag_suffix + '"'
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
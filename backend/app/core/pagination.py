@@ -0,0 +1,86 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor carries the sort key of the last row of a page (e.g. ``(id,)`` or
+``(dispatched_at, id)``); the next page is everything strictly after it. The
+encoding is URL-safe base64 of a JSON array so clients treat it as opaque.
+Datetimes are serialized as ISO 8601 strings and parsed back against the
+type of the key column they belong to.
+
+List endpoints that return a bare JSON array send the next page's cursor in the
+``X-Next-Cursor`` response header; it is absent on the last page.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Integer, literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Decode a cursor into its ``size`` key values, or raise a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor") from None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+def _key_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Integer) and not (
+            isinstance(value, int) and not isinstance(value, bool)
+        ):
+            raise ValueError(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor") from None
+    return value
+
+
+def after_cursor(columns: Sequence, cursor: str, descending: bool = False):
+    """Criterion for the rows strictly after ``cursor`` in ``columns`` order.
+
+    ``columns`` is the full sort key, all ascending or all descending, ending in
+    a unique column so that every row has a distinct position.
+    """
+    values = [
+        _key_value(column, value)
+        for column, value in zip(columns, decode_cursor(cursor, len(columns)), strict=True)
+    ]
+    if len(columns) == 1:
+        key, bound = columns[0], values[0]
+    else:
+        key = tuple_(*columns)
+        bound = tuple_(*(literal(v, column.type) for column, v in zip(columns, values, strict=True)))
+    return key < bound if descending else key > bound
+
+
+def cursor_page(rows: list, limit: int, key: Callable[[Any], tuple]) -> tuple[list, Optional[str]]:
+    """Split the ``limit + 1`` rows of a keyset query into the page and the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,46 @@
+"""Flat column projections shaped by response schemas.
+
+List endpoints read plain rows instead of ORM entities: no identity-map
+bookkeeping, no lazy or eager relationship loads. The columns are the response
+schema's fields that are columns of the model, so a field added to the schema
+is selected without touching the query. Nested objects (a unit's location, an
+import's uploader) are joined in under a ``"<field>__"`` prefix and folded back
+by ``schema_row``.
+"""
+
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+
+def schema_columns(model, schema: type[BaseModel], prefix: str = "") -> list:
+    """``model``'s columns behind ``schema``'s fields, labelled ``prefix`` + field name."""
+    columns = model.__table__.columns
+    return [
+        getattr(model, name).label(f"{prefix}{name}")
+        for name in schema.model_fields
+        if name in columns
+    ]
+
+
+def schema_row(
+    row: Row, schema: type[BaseModel], prefix: str = "", nested: Optional[dict] = None
+) -> Optional[dict[str, Any]]:
+    """``schema``'s fields read back from a row selected with ``schema_columns``.
+
+    ``nested`` maps a field to the schema of the object joined under
+    ``"<field>__"``; it is ``None`` when the outer join found no row. Returns
+    ``None`` itself when the row holds no object under ``prefix``.
+    """
+    values = row._mapping
+    if values.get(f"{prefix}id", True) is None:
+        return None
+    data = {
+        name: values[f"{prefix}{name}"]
+        for name in schema.model_fields
+        if f"{prefix}{name}" in values
+    }
+    for field, field_schema in (nested or {}).items():
+        data[field] = schema_row(row, field_schema, f"{prefix}{field}__")
+    return data
@@ -0,0 +1,138 @@
+"""Indexed unit search over serial numbers, model, brand and notes.
+
+Operators type fragments of engine and chassis numbers ("4471", "lx20") as often
+as model names, so every word of a query must appear somewhere inside one of the
+searched columns, in any case. How that is served depends on the database:
+
+* PostgreSQL: ``ILIKE '%word%'`` per column, answered from the ``pg_trgm`` GIN
+  indexes declared on ``Unit`` (migration 011). Results rank by the best
+  ``word_similarity`` between the query and any column.
+* SQLite: ``units_fts``, an FTS5 table with the ``trigram`` tokenizer that
+  shadows ``units`` (external content, kept in step by triggers), answers the
+  words of three or more characters and ranks with ``bm25``. Shorter words have
+  no trigram to look up and fall back to ``LIKE``.
+* Anything else: plain ``LIKE``, in id order.
+"""
+
+from sqlalchemy import column, event, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from app.database.database import Base
+from app.models.models import Unit
+
+SEARCH_COLUMNS = [Unit.engine_number, Unit.chassis_number, Unit.model, Unit.brand, Unit.notes]
+FTS_TABLE = "units_fts"
+TRIGRAM = 3
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+_fts_columns = ", ".join(c.key for c in SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{c.key}" for c in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{c.key}" for c in SEARCH_COLUMNS)
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({_fts_columns}, "
+    "content='units', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER units_fts_insert AFTER INSERT ON units BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_fts_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER units_fts_delete AFTER DELETE ON units BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_fts_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER units_fts_update AFTER UPDATE ON units BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_fts_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_fts_columns}) VALUES (new.id, {_new_values}); END",
+    # Index the rows that were already there.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def ensure_search_index(connection) -> None:
+    """Create the search structures the database lacks (SQLite's FTS table; pg_trgm)."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    elif dialect == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first()
+        if not exists:
+            for statement in _SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "before_create")
+def _create_pg_trgm(target, connection, **kw) -> None:
+    # The trigram GIN indexes on units need the extension before the table.
+    if connection.dialect.name == "postgresql":
+        ensure_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_fts_table(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        ensure_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_fts_table(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def _escape_like(word: str) -> str:
+    return word.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _like_criteria(words: list[str]) -> list:
+    return [
+        or_(*(c.ilike(f"%{_escape_like(word)}%", escape="!") for c in SEARCH_COLUMNS))
+        for word in words
+    ]
+
+
+def fts_query(words: list[str]) -> str:
+    """An FTS5 query requiring every word, each quoted as a literal substring."""
+    return " AND ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def _fts_match(words: list[str]):
+    return select(_fts.c.rowid, _fts.c.rank).where(
+        literal_column(FTS_TABLE).op("MATCH")(fts_query(words))
+    )
+
+
+def _split(db: Session, term: str) -> tuple[str, list[str], list[str]]:
+    """The dialect, the words served by the FTS table and those matched with LIKE."""
+    dialect = db.get_bind().dialect.name
+    words = term.split()
+    if dialect != "sqlite":
+        return dialect, [], words
+    return (
+        dialect,
+        [w for w in words if len(w) >= TRIGRAM],
+        [w for w in words if len(w) < TRIGRAM],
+    )
+
+
+def search_criteria(db: Session, term: str) -> list:
+    """Filter criteria keeping the units that match every word of ``term``."""
+    _, indexed, like = _split(db, term)
+    criteria = _like_criteria(like)
+    if indexed:
+        criteria.append(Unit.id.in_(_fts_match(indexed).with_only_columns(_fts.c.rowid)))
+    return criteria
+
+
+def rank_search(db: Session, query, term: str):
+    """Filter ``query`` (over ``Unit``) by ``term`` and order it best match first."""
+    dialect, indexed, like = _split(db, term)
+    if dialect == "postgresql":
+        rank = func.greatest(*(func.word_similarity(term, c) for c in SEARCH_COLUMNS))
+        return query.filter(*_like_criteria(like)).order_by(rank.desc(), Unit.id)
+    if indexed:
+        ranked = _fts_match(indexed).subquery()
+        return (
+            query.join(ranked, ranked.c.rowid == Unit.id)
+            .filter(*_like_criteria(like))
+            .order_by(ranked.c.rank, Unit.id)
+        )
+    return query.filter(*_like_criteria(like)).order_by(Unit.id)
@@ -1,6 +1,9 @@
 
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
@@ -20,3 +23,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """Commit everything written inside the block once, or roll all of it back.
+
+    Repositories only stage writes (adding and flushing when an id is needed);
+    services wrap each user action in one unit of work so it costs a single
+    commit and never leaves half of its rows behind.
+    """
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,48 @@
+"""Rebuild ``inventory_counters`` from ``units`` and report any drift.
+
+The counters are maintained incrementally on every unit write; this command is
+the safety net for data changed outside the application (manual SQL, restores):
+
+    python -m app.database.reconcile_counters          # rebuild + report drift
+    python -m app.database.reconcile_counters --check  # report only, exit 1 on drift
+"""
+
+import argparse
+import sys
+
+from app.database.database import SessionLocal
+from app.services.inventory_counters import reconcile_counters
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report drift, do not rebuild the table",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        drift = reconcile_counters(db, dry_run=args.check)
+    finally:
+        db.close()
+
+    for row in drift:
+        print(
+            f"location={row['location_id']} status={row['status']} model={row['model']!r} "
+            f"product_type={row['product_type']!r}: expected {row['expected']}, found {row['actual']}"
+        )
+    if not drift:
+        print("✓ inventory_counters match units")
+        return 0
+    if args.check:
+        print(f"✗ {len(drift)} counter(s) drifted")
+        return 1
+    print(f"✓ Rebuilt inventory_counters ({len(drift)} counter(s) corrected)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
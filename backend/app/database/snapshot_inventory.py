@@ -0,0 +1,67 @@
+"""Write the daily inventory snapshot, or backfill past days from history.
+
+Run once a day shortly before midnight (``REPORT_TIMEZONE``); re-running a day
+replaces its rows. It also saves a unit-level checkpoint for point-in-time
+queries when the last one is ``INVENTORY_CHECKPOINT_DAYS`` old (or with
+``--checkpoint``):
+
+    python -m app.database.snapshot_inventory                    # snapshot today
+    python -m app.database.snapshot_inventory --date 2026-10-18  # store today's stock as that day
+    python -m app.database.snapshot_inventory --backfill --from 2025-01-01 [--to 2026-10-18]
+    python -m app.database.snapshot_inventory --checkpoint       # snapshot + forced checkpoint
+"""
+
+import argparse
+import sys
+from datetime import date
+
+from app.database.database import SessionLocal
+from app.services.inventory_history import (
+    backfill_snapshots,
+    checkpoint_due,
+    take_checkpoint,
+    take_snapshot,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        help="day to file the current stock under (default: today)",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="rebuild past days from the transfers and sales history",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="save a unit-level checkpoint even if the last one is recent",
+    )
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="first day to backfill")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="last day to backfill (default: yesterday)")
+    args = parser.parse_args(argv)
+    if args.backfill and not args.date_from:
+        parser.error("--backfill requires --from")
+
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            written = backfill_snapshots(db, args.date_from, args.date_to)
+            print(f"✓ Backfilled inventory_snapshots from {args.date_from} ({written} row(s))")
+        else:
+            written = take_snapshot(db, args.date)
+            print(f"✓ Wrote inventory snapshot ({written} row(s))")
+        if args.checkpoint or (not args.backfill and checkpoint_due(db)):
+            checkpoint = take_checkpoint(db)
+            print(f"✓ Saved inventory checkpoint #{checkpoint.id}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,27 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import os
 
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.concurrency import CONFLICT_DETAIL
+from app.core.negotiation import (
+    JSONGZipMiddleware,
+    NegotiationMiddleware,
+    RepresentationETagMiddleware,
+)
 from app.database.database import engine
 from app.models import models
+# Session hooks that keep inventory_counters, sales, the inventory cube and the
+# identifier index in step with unit writes.
+from app.services import inventory_counters  # noqa: F401
+from app.services import sales_facts  # noqa: F401
+from app.services import inventory_cube  # noqa: F401
+from app.services import identifier_index  # noqa: F401
 from app.api.router import router as api_router
 from app.database.seed import create_demo_data
 
@@ -28,6 +43,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# JSON, MessagePack or CBOR bodies per the Accept header; then gzip of those
+# bodies (not exports) for clients that accept it; then a distinct ETag per
+# representation (CORS, added last, stays outermost).
+app.add_middleware(NegotiationMiddleware)
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024)
+app.add_middleware(RepresentationETagMiddleware)
+
 # CORS middleware
 allowed_origins = ["http://localhost:3000", "http://frontend:3000"]
 # Single origin (backwards compat)
@@ -45,8 +67,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # Writes without their own compare_and_set (e.g. bulk operations) that lost
+    # an optimistic concurrency race.
+    return JSONResponse(status_code=409, content={"detail": {"message": CONFLICT_DETAIL, "current": None}})
+
 # Create uploads directory
 os.makedirs("uploads", exist_ok=True)
 
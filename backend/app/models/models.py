@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Boolean, ForeignKey, Text, Enum, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
@@ -23,6 +23,14 @@ class TransferStatus(str, enum.Enum):
     RECEIVED = "RECEIVED"
     CANCELLED = "CANCELLED"
 
+class ShipmentStatus(str, enum.Enum):
+    IN_TRANSIT = "IN_TRANSIT"
+    PARTIALLY_RECEIVED = "PARTIALLY_RECEIVED"
+    RECEIVED = "RECEIVED"
+
+# Shipments that still have units on the way.
+OPEN_SHIPMENT_STATUSES = (ShipmentStatus.IN_TRANSIT, ShipmentStatus.PARTIALLY_RECEIVED)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -57,6 +65,15 @@ class Location(Base):
 
 class Unit(Base):
     __tablename__ = "units"
+    # Trigram indexes behind substring search (app.core.search); PostgreSQL only,
+    # SQLite searches through the units_fts shadow table instead.
+    __table_args__ = tuple(
+        Index(
+            f"ix_units_{name}_trgm", name,
+            postgresql_using="gin", postgresql_ops={name: "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql")
+        for name in ("engine_number", "chassis_number", "model", "brand", "notes")
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     engine_number = Column(String(100), unique=True, nullable=True, index=True)
@@ -70,17 +87,28 @@ class Unit(Base):
     # not inside the file): the shipment period/batch and the product type (TR-06).
     batch_period = Column(String(100), nullable=True, index=True)
     product_type = Column(String(100), nullable=True, index=True)
-    sold_date = Column(DateTime(timezone=True))
+    sold_date = Column(DateTime(timezone=True), index=True)
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Row version for optimistic concurrency (app.core.concurrency): every UPDATE
+    # is ``... WHERE id = ? AND version = ?`` and bumps it.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     current_location = relationship("Location", back_populates="units")
     transfers = relationship("Transfer", back_populates="unit")
+    sale = relationship("Sale", back_populates="unit", uselist=False, cascade="all, delete-orphan")
 
 class Transfer(Base):
     __tablename__ = "transfers"
+    __table_args__ = (
+        # Keyset pagination keys: a unit's history and the whole log, newest first.
+        Index("ix_transfers_unit_dispatched_at_id", "unit_id", "dispatched_at", "id"),
+        Index("ix_transfers_dispatched_at_id", "dispatched_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     unit_id = Column(Integer, ForeignKey("units.id"), nullable=False)
@@ -89,8 +117,11 @@ class Transfer(Base):
     origin_location_id = Column(Integer, ForeignKey("locations.id"))
     destination_location_id = Column(Integer, ForeignKey("locations.id"))
     status = Column(Enum(TransferStatus), nullable=False, default=TransferStatus.IN_TRANSIT)
-    dispatched_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     received_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     unit = relationship("Unit", back_populates="transfers")
@@ -99,6 +130,153 @@ class Transfer(Base):
     origin_location = relationship("Location", foreign_keys=[origin_location_id], back_populates="transfers_from")
     destination_location = relationship("Location", foreign_keys=[destination_location_id], back_populates="transfers_to")
 
+class Shipment(Base):
+    """A truckload of units dispatched together from one location to another.
+
+    Each manifest item carries the unit's own ``Transfer`` row, so unit history
+    and transfer reports read shipments like any other transfer. A shipment is
+    dispatched in one call and received in one call, whole or a scanned subset
+    at a time (see ``app.services.shipment_service``).
+    """
+    __tablename__ = "shipments"
+    __table_args__ = (
+        # "Open shipments to my location", newest first.
+        Index("ix_shipments_destination_status_id", "destination_location_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    origin_location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    destination_location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    status = Column(Enum(ShipmentStatus), nullable=False, default=ShipmentStatus.IN_TRANSIT)
+    dispatched_by_id = Column(Integer, ForeignKey("users.id"))
+    dispatched_at = Column(DateTime(timezone=True), server_default=func.now())
+    received_at = Column(DateTime(timezone=True))
+    notes = Column(Text)
+
+    # Relationships
+    origin_location = relationship("Location", foreign_keys=[origin_location_id])
+    destination_location = relationship("Location", foreign_keys=[destination_location_id])
+    items = relationship("ShipmentItem", back_populates="shipment", order_by="ShipmentItem.id")
+
+class ShipmentItem(Base):
+    __tablename__ = "shipment_items"
+    __table_args__ = (
+        UniqueConstraint("shipment_id", "unit_id", name="uq_shipment_items_shipment_unit"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    shipment_id = Column(Integer, ForeignKey("shipments.id", ondelete="CASCADE"), nullable=False)
+    unit_id = Column(Integer, ForeignKey("units.id", ondelete="CASCADE"), nullable=False, index=True)
+    transfer_id = Column(Integer, ForeignKey("transfers.id", ondelete="CASCADE"), nullable=False)
+    received_at = Column(DateTime(timezone=True))
+    received_by_id = Column(Integer, ForeignKey("users.id"))
+
+    # Relationships
+    shipment = relationship("Shipment", back_populates="items")
+    unit = relationship("Unit")
+    transfer = relationship("Transfer")
+
+class Sale(Base):
+    """One row per sold unit, written when the unit transitions to ``SOLD``.
+
+    Captures where and when the unit was sold so sales reports filter and group
+    on indexed columns instead of reconstructing sales from transfer history.
+    Maintained by ``app.services.sales_facts``; the row is removed if the unit
+    leaves ``SOLD`` or is deleted.
+    """
+    __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_location_sold_at", "location_id", "sold_at"),
+        Index("ix_sales_model_sold_at", "model", "sold_at"),
+        Index("ix_sales_batch_period_sold_at", "batch_period", "sold_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    unit_id = Column(Integer, ForeignKey("units.id", ondelete="CASCADE"), nullable=False, unique=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="SET NULL"), nullable=True)
+    model = Column(String(100), nullable=False)
+    batch_period = Column(String(100), nullable=True)
+    sold_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    # Relationships
+    unit = relationship("Unit", back_populates="sale")
+    location = relationship("Location")
+
+class InventoryCounter(Base):
+    """Unit count per (location, status, model, product_type).
+
+    A summary of ``units`` kept up to date in the same transaction as every unit
+    write (see ``app.services.inventory_counters``), so stats read a few hundred
+    counter rows instead of scanning the fleet. ``product_type`` is stored as an
+    empty string when the unit has none, so it can take part in the primary key.
+    Rebuild with ``python -m app.database.reconcile_counters``.
+    """
+    __tablename__ = "inventory_counters"
+
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True)
+    status = Column(Enum(UnitStatus), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    product_type = Column(String(100), primary_key=True, default="")
+    count = Column(Integer, nullable=False, default=0)
+
+class InventorySnapshot(Base):
+    """Unit count per (day, location, status, model) at the end of that day.
+
+    Written once a day from ``inventory_counters`` by
+    ``python -m app.database.snapshot_inventory`` and backfillable from the
+    transfers/sales history (``app.services.inventory_history``). Re-running a
+    day replaces its rows. ``snapshot_date`` is a calendar day in
+    ``REPORT_TIMEZONE``.
+    """
+    __tablename__ = "inventory_snapshots"
+    __table_args__ = (
+        Index("ix_inventory_snapshots_model_date", "model", "snapshot_date"),
+        Index("ix_inventory_snapshots_location_date", "location_id", "snapshot_date"),
+    )
+
+    snapshot_date = Column(Date, primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(Enum(UnitStatus), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False)
+
+class InventoryCheckpoint(Base):
+    """A saved copy of every unit's location and status at ``taken_at``.
+
+    Point-in-time inventory queries start from the latest checkpoint before the
+    requested time and replay only the transfers and sales after it (see
+    ``app.services.inventory_history``).
+    """
+    __tablename__ = "inventory_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    units = relationship("InventoryCheckpointUnit", cascade="all, delete-orphan")
+
+class InventoryCheckpointUnit(Base):
+    __tablename__ = "inventory_checkpoint_units"
+
+    checkpoint_id = Column(
+        Integer, ForeignKey("inventory_checkpoints.id", ondelete="CASCADE"), primary_key=True
+    )
+    unit_id = Column(Integer, primary_key=True)
+    location_id = Column(Integer, nullable=False)
+    status = Column(Enum(UnitStatus), nullable=False)
+
+class DataVersion(Base):
+    """Monotonic version of a data domain, bumped by every commit that writes to it.
+
+    The ``inventory`` row is incremented in the same transaction as any unit,
+    transfer, location or import write (see ``app.core.cache``). Report caches and
+    ETags key on it, so every worker sees a write as soon as it commits. The
+    ``units`` row moves only with unit writes, for caches derived from units alone.
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
 class ModelEquivalence(Base):
     """Manufacturer model name -> internal (client) model name.
 
@@ -118,6 +296,7 @@ class ModelEquivalence(Base):
 
 class Import(Base):
     __tablename__ = "imports"
+    __table_args__ = (Index("ix_imports_import_date_id", "import_date", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
@@ -141,6 +320,7 @@ class Import(Base):
 
 class ImportError(Base):
     __tablename__ = "import_errors"
+    __table_args__ = (Index("ix_import_errors_import_id_id", "import_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     import_id = Column(Integer, ForeignKey("imports.id"), nullable=False)
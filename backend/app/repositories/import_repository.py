@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from app.core.pagination import after_cursor
+from app.core.projection import schema_columns, schema_row
+from app.models import schemas
+from app.models.models import Import, User
+
+
+class ImportRepository:
+
+    @staticmethod
+    def get_imports(db: Session, skip: int, limit: int, cursor: str | None = None) -> list[dict]:
+        """Imports as ``schemas.Import`` dicts, newest first, uploader joined in.
+
+        One flat query rather than loading Import entities and lazy-loading
+        ``Import.user`` for each of them.
+        """
+        sort_key = [Import.import_date, Import.id]
+        query = db.query(
+            *schema_columns(Import, schemas.Import),
+            *schema_columns(User, schemas.User, "user__"),
+        ).outerjoin(User, User.id == Import.user_id)
+        if cursor:
+            query = query.filter(after_cursor(sort_key, cursor, descending=True))
+        rows = query.order_by(*(column.desc() for column in sort_key)).offset(skip).limit(limit)
+        return [schema_row(row, schemas.Import, nested={"user": schemas.User}) for row in rows]
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 
-from app.models.models import Location, Unit
+from app.models.models import InventoryCounter, Location, Unit
 from app.schemas.location import LocationCreate, LocationFilters, LocationUpdate
 
 
@@ -19,6 +19,15 @@ class LocationRepository:
     def get_location(db: Session, location_id: int) -> Location | None:
         return db.query(Location).filter(Location.id == location_id).first()
 
+    @staticmethod
+    def get_existing_ids(db: Session, location_ids) -> set[int]:
+        if not location_ids:
+            return set()
+        return {
+            location_id
+            for (location_id,) in db.query(Location.id).filter(Location.id.in_(set(location_ids)))
+        }
+
     @staticmethod
     def create_location(db: Session, location_data: LocationCreate) -> Location:
         db_location = Location(**location_data.model_dump())
@@ -38,6 +47,8 @@ class LocationRepository:
 
     @staticmethod
     def delete_location(db: Session, db_location: Location) -> None:
+        # Only empty locations are deleted, so their counters are all zero.
+        db.query(InventoryCounter).filter(InventoryCounter.location_id == db_location.id).delete()
         db.delete(db_location)
         db.commit()
 
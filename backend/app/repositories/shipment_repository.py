@@ -0,0 +1,94 @@
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.pagination import after_cursor
+from app.models.models import OPEN_SHIPMENT_STATUSES, Shipment, ShipmentItem
+from app.schemas.shipment import ShipmentFilters
+
+
+class ShipmentRepository:
+
+    @staticmethod
+    def get_shipments(
+        db: Session, filters: ShipmentFilters, limit: int, cursor: str | None = None
+    ) -> list[Shipment]:
+        """Shipments newest first, keyed on ``id``; ``open`` keeps those still on the way."""
+        query = db.query(Shipment)
+        if filters.destination_location_id:
+            query = query.filter(Shipment.destination_location_id == filters.destination_location_id)
+        if filters.origin_location_id:
+            query = query.filter(Shipment.origin_location_id == filters.origin_location_id)
+        if filters.status:
+            query = query.filter(Shipment.status == filters.status)
+        if filters.open is not None:
+            is_open = Shipment.status.in_(OPEN_SHIPMENT_STATUSES)
+            query = query.filter(is_open if filters.open else ~is_open)
+        if cursor:
+            query = query.filter(after_cursor([Shipment.id], cursor, descending=True))
+        return query.order_by(Shipment.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def get_shipment(db: Session, shipment_id: int) -> Shipment | None:
+        return (
+            db.query(Shipment)
+            .options(selectinload(Shipment.items))
+            .filter(Shipment.id == shipment_id)
+            .one_or_none()
+        )
+
+    @staticmethod
+    def lock_shipment(db: Session, shipment_id: int) -> Shipment | None:
+        """The shipment, re-read and locked (``FOR UPDATE``) until the transaction ends.
+
+        Receipts of the same shipment take this lock first, so they run one after
+        the other and each sees the items the previous one received.
+        """
+        return (
+            db.query(Shipment)
+            .filter(Shipment.id == shipment_id)
+            .with_for_update()
+            .populate_existing()
+            .one_or_none()
+        )
+
+    @staticmethod
+    def get_items_for_receipt(db: Session, shipment_id: int) -> list[ShipmentItem]:
+        """The manifest with each item's unit and transfer loaded, ready to be received.
+
+        Rows already in the session are refreshed, since another receipt may have
+        written them since they were read.
+        """
+        return (
+            db.query(ShipmentItem)
+            .options(
+                selectinload(ShipmentItem.unit),
+                selectinload(ShipmentItem.transfer),
+            )
+            .filter(ShipmentItem.shipment_id == shipment_id)
+            .order_by(ShipmentItem.id)
+            .populate_existing()
+            .all()
+        )
+
+    @staticmethod
+    def count_pending_items(db: Session, shipment_id: int) -> int:
+        """Items of the shipment not yet received, as stored in the database."""
+        return (
+            db.query(func.count(ShipmentItem.id))
+            .filter(ShipmentItem.shipment_id == shipment_id, ShipmentItem.received_at.is_(None))
+            .scalar()
+        )
+
+    @staticmethod
+    def create_shipment(db: Session, **values) -> Shipment:
+        """Add a shipment and flush it so its id is set, without committing."""
+        shipment = Shipment(**values)
+        db.add(shipment)
+        db.flush()
+        return shipment
+
+    @staticmethod
+    def add_items(db: Session, rows: list[dict]) -> None:
+        """Insert manifest rows with one executemany, without committing."""
+        if rows:
+            db.execute(insert(ShipmentItem), rows)
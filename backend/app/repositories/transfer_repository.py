@@ -1,15 +1,30 @@
 from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import Row, func, insert, literal, select, union_all
 from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.util import identity_key
 
+from app.core.cache import mark_written
+from app.core.concurrency import compare_and_set_many
+from app.core.pagination import after_cursor
+from app.core.projection import schema_columns, schema_row
 from app.models.models import Transfer, TransferStatus
+from app.schemas.transfer import Transfer as TransferSchema
 from app.schemas.transfer import TransferCreate, TransferFilters, TransferUpdate
 
 
 class TransferRepository:
 
     @staticmethod
-    def get_transfers(db: Session, filters: TransferFilters, skip: int, limit: int) -> list[Transfer]:
-        query = db.query(Transfer)
+    def get_transfers(
+        db: Session, filters: TransferFilters, skip: int, limit: int, cursor: str | None = None
+    ) -> list[dict]:
+        """Transfers as ``schemas.transfer.Transfer`` dicts, newest ``id`` first.
+
+        ``cursor`` resumes after the last one of a page.
+        """
+        query = db.query(*schema_columns(Transfer, TransferSchema))
 
         if filters.unit_id:
             query = query.filter(Transfer.unit_id == filters.unit_id)
@@ -23,8 +38,11 @@ class TransferRepository:
             query = query.filter(Transfer.dispatched_by_id == filters.dispatched_by_id)
         if filters.received_by_id:
             query = query.filter(Transfer.received_by_id == filters.received_by_id)
+        if cursor:
+            query = query.filter(after_cursor([Transfer.id], cursor, descending=True))
 
-        return query.order_by(Transfer.id.desc()).offset(skip).limit(limit).all()
+        rows = query.order_by(Transfer.id.desc()).offset(skip).limit(limit).all()
+        return [schema_row(row, TransferSchema) for row in rows]
 
     @staticmethod
     def get_transfer(db: Session, transfer_id: int) -> Transfer | None:
@@ -34,23 +52,19 @@ class TransferRepository:
     def create_transfer(db: Session, transfer_data: TransferCreate) -> Transfer:
         db_transfer = Transfer(**transfer_data.model_dump())
         db.add(db_transfer)
-        db.commit()
-        db.refresh(db_transfer)
+        db.flush()
         return db_transfer
 
     @staticmethod
     def update_transfer(db: Session, db_transfer: Transfer, transfer_update: TransferUpdate) -> Transfer:
-        update_data = transfer_update.model_dump(exclude_unset=True)
+        update_data = transfer_update.model_dump(exclude_unset=True, exclude={"version"})
         for field, value in update_data.items():
             setattr(db_transfer, field, value)
-        db.commit()
-        db.refresh(db_transfer)
         return db_transfer
 
     @staticmethod
     def delete_transfer(db: Session, db_transfer: Transfer) -> None:
         db.delete(db_transfer)
-        db.commit()
 
     @staticmethod
     def count_transfers(db: Session) -> int:
@@ -61,8 +75,40 @@ class TransferRepository:
         return db.query(Transfer).filter(Transfer.status == status).count()
 
     @staticmethod
-    def get_recent_transfers(db: Session, limit: int = 10) -> list[Transfer]:
-        return db.query(Transfer).order_by(Transfer.dispatched_at.desc()).limit(limit).all()
+    def count_by_status(db: Session) -> dict[str, int]:
+        """Total and per-status transfer counts in one conditional-aggregate query.
+
+        Keys are ``total`` plus the lower-cased status names (``pending``,
+        ``in_transit``, ``received``, ``cancelled``).
+        """
+        row = db.query(
+            func.count(Transfer.id).label("total"),
+            *[
+                func.count(Transfer.id).filter(Transfer.status == status).label(status.value.lower())
+                for status in TransferStatus
+            ],
+        ).one()
+        return dict(row._mapping)
+
+    @staticmethod
+    def get_recent_transfers(db: Session, limit: int = 10) -> list[Row]:
+        """Latest transfers as flat rows of their own columns (no entity hydration)."""
+        return (
+            db.query(
+                Transfer.id,
+                Transfer.unit_id,
+                Transfer.dispatched_by_id,
+                Transfer.received_by_id,
+                Transfer.origin_location_id,
+                Transfer.destination_location_id,
+                Transfer.status,
+                Transfer.dispatched_at,
+                Transfer.received_at,
+            )
+            .order_by(Transfer.dispatched_at.desc())
+            .limit(limit)
+            .all()
+        )
 
     @staticmethod
     def create_unit_transfer(
@@ -85,10 +131,53 @@ class TransferRepository:
             received_at=received_at,
         )
         db.add(db_transfer)
-        db.commit()
-        db.refresh(db_transfer)
         return db_transfer
 
+    @staticmethod
+    def update_transfers(db: Session, transfers: list[Transfer], **values) -> None:
+        """Write the same ``values`` to ``transfers`` in one versioned UPDATE, without committing."""
+        if not transfers:
+            return
+        compare_and_set_many(db, transfers, **values)
+        mark_written(db)
+
+    @staticmethod
+    def add_unit_transfers(db: Session, rows: list[dict]) -> dict[int, int]:
+        """Insert transfer rows with one executemany, without committing.
+
+        Returns the new transfer id per unit id (one transfer per unit).
+        """
+        if not rows:
+            return {}
+        inserted = db.execute(insert(Transfer).returning(Transfer.unit_id, Transfer.id), rows)
+        return dict(inserted.all())
+
+    @staticmethod
+    def get_existing_relations(db: Session, references: Iterable[tuple[type, int]]) -> set[tuple[type, int]]:
+        """The ``(model, id)`` references that exist, checked in one round trip.
+
+        Rows already loaded in the session are taken from its identity map; the
+        rest are looked up with a single ``UNION ALL`` of one id select per table.
+        """
+        existing, wanted = set(), {}
+        for model, row_id in references:
+            loaded = db.identity_map.get(identity_key(model, row_id))
+            if loaded is not None and loaded not in db.deleted:
+                existing.add((model, row_id))
+            else:
+                wanted.setdefault(model, set()).add(row_id)
+        if not wanted:
+            return existing
+
+        models = {model.__tablename__: model for model in wanted}
+        selects = [
+            select(literal(model.__tablename__).label("kind"), model.id).where(model.id.in_(ids))
+            for model, ids in wanted.items()
+        ]
+        statement = selects[0] if len(selects) == 1 else union_all(*selects)
+        existing.update((models[kind], row_id) for kind, row_id in db.execute(statement))
+        return existing
+
     @staticmethod
     def get_active_transfer_by_unit(db: Session, unit_id: int) -> Transfer | None:
         return (
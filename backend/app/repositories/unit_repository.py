@@ -1,14 +1,32 @@
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, attributes, selectinload
 from sqlalchemy import and_, or_, func
-from app.models.models import Unit, Transfer, UnitStatus, Location
-from app.schemas.unit import UnitCreate, UnitFilters, UnitUpdate
+from app.core.cache import mark_written
+from app.core.concurrency import compare_and_set_many
+from app.core.pagination import after_cursor
+from app.core.projection import schema_columns, schema_row
+from app.core.search import rank_search, search_criteria
+from app.models.models import InventoryCounter, Unit, Transfer, UnitStatus, Location
+from app.schemas.location import Location as LocationSchema
+from app.schemas.unit import Unit as UnitSchema, UnitCreate, UnitFilters, UnitUpdate
+from app.services.inventory_counters import apply_unit_changes
+from app.services.sales_facts import sync_sale
+from app.services.unit_index import record_unit_writes
 
 
 class UnitRepository:
 
     @staticmethod
-    def get_units(db: Session, filters: UnitFilters, skip: int, limit: int) -> list[Unit]:
-        query = db.query(Unit).options(selectinload(Unit.current_location))
+    def get_units(
+        db: Session, filters: UnitFilters, skip: int, limit: int, cursor: str | None = None
+    ) -> list[dict]:
+        """Units in ``id`` order as ``schemas.unit.Unit`` dicts, location joined in.
+
+        ``cursor`` resumes after the last unit of a page.
+        """
+        query = db.query(
+            *schema_columns(Unit, UnitSchema),
+            *schema_columns(Location, LocationSchema, "current_location__"),
+        ).outerjoin(Location, Location.id == Unit.current_location_id)
 
         if filters.status:
             query = query.filter(Unit.status == filters.status)
@@ -17,15 +35,24 @@ class UnitRepository:
             query = query.filter(Unit.current_location_id == filters.location_id)
 
         if filters.search:
-            search_term = f"%{filters.search}%"
-            query = query.filter(
-                Unit.engine_number.ilike(search_term) |
-                Unit.chassis_number.ilike(search_term) |
-                Unit.model.ilike(search_term) |
-                Unit.brand.ilike(search_term)
-            )
+            query = query.filter(*search_criteria(db, filters.search))
+
+        if cursor:
+            query = query.filter(after_cursor([Unit.id], cursor))
+        rows = query.order_by(Unit.id).offset(skip).limit(limit).all()
+        return [
+            schema_row(row, UnitSchema, nested={"current_location": LocationSchema}) for row in rows
+        ]
 
-        return query.offset(skip).limit(limit).all()
+    @staticmethod
+    def search_units(db: Session, term: str, filters: UnitFilters, limit: int) -> list[Unit]:
+        """Units matching every word of ``term``, best match first."""
+        query = db.query(Unit).options(selectinload(Unit.current_location))
+        if filters.status:
+            query = query.filter(Unit.status == filters.status)
+        if filters.location_id:
+            query = query.filter(Unit.current_location_id == filters.location_id)
+        return rank_search(db, query, term).limit(limit).all()
 
     @staticmethod
     def get_unit(db: Session, unit_id: int) -> Unit | None:
@@ -71,6 +98,74 @@ class UnitRepository:
             .first()
         )
 
+    @staticmethod
+    def get_selected_units(db: Session, unit_ids: list[int], identifiers: list[str]) -> list[Unit]:
+        """Units with any of ``unit_ids``, or an engine/chassis number in ``identifiers``.
+
+        Their sale is loaded up front, since status changes read it on flush.
+        """
+        conditions = []
+        if unit_ids:
+            conditions.append(Unit.id.in_(set(unit_ids)))
+        if identifiers:
+            conditions.append(Unit.engine_number.in_(set(identifiers)))
+            conditions.append(Unit.chassis_number.in_(set(identifiers)))
+        if not conditions:
+            return []
+        return db.query(Unit).options(selectinload(Unit.sale)).filter(or_(*conditions)).all()
+
+    @staticmethod
+    def get_existing_identifiers(db: Session, identifiers: list[str]) -> set[str]:
+        """The subset of ``identifiers`` already used as an engine or chassis number."""
+        if not identifiers:
+            return set()
+        wanted = set(identifiers)
+        rows = db.query(Unit.engine_number, Unit.chassis_number).filter(
+            or_(Unit.engine_number.in_(wanted), Unit.chassis_number.in_(wanted))
+        )
+        return {value for row in rows for value in row if value in wanted}
+
+    @staticmethod
+    def add_units(db: Session, payloads: list[dict]) -> list[Unit]:
+        """Add units in one flush, without committing."""
+        units = [Unit(**payload) for payload in payloads]
+        db.add_all(units)
+        db.flush()
+        return units
+
+    @staticmethod
+    def update_units(db: Session, units: list[Unit], **values) -> None:
+        """Write the same ``values`` to ``units`` in one versioned UPDATE, without committing.
+
+        The flush would send one ``WHERE id = ? AND version = ?`` per unit, so the
+        batch goes out as one compare-and-set instead and the counters, sales,
+        unit indexes and data versions the flush hooks maintain are kept in step
+        here. A unit written since it was loaded raises ``StaleDataError``.
+        """
+        if not units:
+            return
+        sold_before = [unit.status == UnitStatus.SOLD for unit in units]
+        apply_unit_changes(db, units, values)
+        compare_and_set_many(db, units, **values)
+        for unit, sold in zip(units, sold_before, strict=True):
+            sync_sale(unit, sold, sold_date_changed="sold_date" in values)
+        record_unit_writes(db, units)
+        mark_written(db, units=True)
+        db.flush()
+
+    @staticmethod
+    def delete_units(db: Session, units: list[Unit]) -> None:
+        """Delete units and their transfers, without committing."""
+        if not units:
+            return
+        db.query(Transfer).filter(Transfer.unit_id.in_([unit.id for unit in units])) \
+          .delete(synchronize_session=False)
+        for unit in units:
+            # The transfers are gone; spare the flush one collection load per unit.
+            attributes.set_committed_value(unit, "transfers", [])
+            db.delete(unit)
+        db.flush()
+
     @staticmethod
     def create_unit(db: Session, unit_data: UnitCreate) -> Unit:
         payload = unit_data.model_dump()
@@ -78,33 +173,35 @@ class UnitRepository:
             raise ValueError("current_location_id is required")
         unit = Unit(**payload)
         db.add(unit)
-        db.commit()
-        db.refresh(unit)
-        return UnitRepository.get_unit(db, unit.id)
+        db.flush()
+        return unit
 
     @staticmethod
     def update_unit(db: Session, unit: Unit, unit_update: UnitUpdate) -> Unit:
-        update_data = unit_update.model_dump(exclude_unset=True)
+        # ``version`` is the client's expected version, not a value to store.
+        update_data = unit_update.model_dump(exclude_unset=True, exclude={"version"})
         if "current_location_id" in update_data and update_data["current_location_id"] is None:
             raise ValueError("current_location_id is required")
 
         for field, value in update_data.items():
             setattr(unit, field, value)
-
-        db.commit()
-        db.refresh(unit)
-
-        return UnitRepository.get_unit(db, unit.id)
+        return unit
 
     @staticmethod
     def delete_unit(db: Session, unit_id: int) -> None:
         db.query(Transfer).filter(Transfer.unit_id == unit_id).delete()
-        db.query(Unit).filter(Unit.id == unit_id).delete()
-        db.commit()
+        # Delete through the ORM (not a bulk delete) so the flush keeps
+        # inventory_counters in step.
+        unit = db.query(Unit).filter(Unit.id == unit_id).one_or_none()
+        if unit is not None:
+            db.delete(unit)
 
     @staticmethod
-    def get_unit_transfers(db: Session, unit_id: int, skip: int, limit: int) -> list[Transfer]:
-        return (
+    def get_unit_transfers(
+        db: Session, unit_id: int, skip: int, limit: int, cursor: str | None = None
+    ) -> list[Transfer]:
+        """A unit's transfers, newest first, keyed on ``(dispatched_at, id)``."""
+        query = (
             db.query(Transfer)
             .options(
                 selectinload(Transfer.dispatched_by),
@@ -113,33 +210,61 @@ class UnitRepository:
                 selectinload(Transfer.destination_location)
             )
             .filter(Transfer.unit_id == unit_id)
-            .order_by(Transfer.dispatched_at.desc())
+        )
+        if cursor:
+            query = query.filter(
+                after_cursor([Transfer.dispatched_at, Transfer.id], cursor, descending=True)
+            )
+        return (
+            query.order_by(Transfer.dispatched_at.desc(), Transfer.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
         )
 
     @staticmethod
-    def get_stats(db: Session) -> dict:
-        total_units = db.query(Unit).count()
-        in_stock_units = db.query(Unit).filter(Unit.status == UnitStatus.AVAILABLE).count()
-        sold_units = db.query(Unit).filter(Unit.status == UnitStatus.SOLD).count()
-        in_transit_units = db.query(Unit).filter(Unit.status == UnitStatus.IN_TRANSIT).count()
-
-        inventory_by_location = (
-            db.query(Location.name, func.count(Unit.id).label("count"))
-            .join(Unit, Unit.current_location_id == Location.id, isouter=True)
+    def count_by_status(db: Session) -> dict:
+        """Total and per-status unit counts, read from ``inventory_counters``."""
+        def total(*criteria):
+            counted = func.sum(InventoryCounter.count)
+            if criteria:
+                counted = counted.filter(*criteria)
+            return func.coalesce(counted, 0)
+
+        row = db.query(
+            total().label("total"),
+            total(InventoryCounter.status == UnitStatus.AVAILABLE).label("available"),
+            total(InventoryCounter.status == UnitStatus.SOLD).label("sold"),
+            total(InventoryCounter.status == UnitStatus.IN_TRANSIT).label("in_transit"),
+        ).one()
+        return {
+            "total": row.total,
+            "available": row.available,
+            "sold": row.sold,
+            "in_transit": row.in_transit,
+        }
+
+    @staticmethod
+    def count_by_location(db: Session) -> list[dict]:
+        """Unit count for every location (zero for empty ones), from ``inventory_counters``."""
+        rows = (
+            db.query(
+                Location.name,
+                func.coalesce(func.sum(InventoryCounter.count), 0).label("count"),
+            )
+            .join(InventoryCounter, InventoryCounter.location_id == Location.id, isouter=True)
             .group_by(Location.id, Location.name)
             .all()
         )
+        return [{"location": row.name, "count": row.count} for row in rows]
 
+    @staticmethod
+    def get_stats(db: Session) -> dict:
+        counts = UnitRepository.count_by_status(db)
         return {
-            "total_units": total_units,
-            "in_stock_units": in_stock_units,
-            "sold_units": sold_units,
-            "in_transit_units": in_transit_units,
-            "inventory_by_location": [
-                {"location": loc.name, "count": loc.count}
-                for loc in inventory_by_location
-            ]
+            "total_units": counts["total"],
+            "in_stock_units": counts["available"],
+            "sold_units": counts["sold"],
+            "in_transit_units": counts["in_transit"],
+            "inventory_by_location": UnitRepository.count_by_location(db),
         }
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from app.models.models import ShipmentStatus
+from app.schemas.unit import UnitReferences, UnitSelection
+
+
+class ShipmentCreate(UnitSelection):
+    """Dispatch the selected units. ``origin_location_id`` defaults to where they all are."""
+    destination_location_id: int = Field(..., gt=0)
+    origin_location_id: Optional[int] = Field(None, gt=0)
+    notes: Optional[str] = None
+
+
+class ShipmentReceive(UnitReferences):
+    """Scanned units to receive; leave both lists empty to receive the whole shipment."""
+
+
+class ShipmentFilters(BaseModel):
+    destination_location_id: Optional[int] = None
+    origin_location_id: Optional[int] = None
+    status: Optional[ShipmentStatus] = None
+    open: Optional[bool] = None
+
+
+class ShipmentItem(BaseModel):
+    id: int
+    unit_id: int
+    transfer_id: int
+    received_at: Optional[datetime] = None
+    received_by_id: Optional[int] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ShipmentSummary(BaseModel):
+    id: int
+    origin_location_id: int
+    destination_location_id: int
+    status: ShipmentStatus
+    dispatched_by_id: Optional[int] = None
+    dispatched_at: Optional[datetime] = None
+    received_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Shipment(ShipmentSummary):
+    items: List[ShipmentItem] = []
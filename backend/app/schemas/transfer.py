@@ -28,6 +28,8 @@ class TransferUpdate(BaseModel):
     status: Optional[TransferStatus] = None
     dispatched_at: Optional[datetime] = None
     received_at: Optional[datetime] = None
+    # The version the client last read; a different current version is a 409.
+    version: Optional[int] = Field(None, ge=1)
 
 
 class TransferFilters(BaseModel):
@@ -41,6 +43,7 @@ class TransferFilters(BaseModel):
 
 class Transfer(TransferBase):
     id: int
+    version: Optional[int] = None
     model_config = ConfigDict(from_attributes=True)
 
 
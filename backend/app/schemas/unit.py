@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from app.models.models import UnitStatus
 from  app.schemas.location import Location
 
@@ -44,6 +44,8 @@ class UnitUpdate(BaseModel):
     status: Optional[UnitStatus] = None
     sold_date: Optional[datetime] = None
     notes: Optional[str] = None
+    # The version the client last read; a different current version is a 409.
+    version: Optional[int] = Field(None, ge=1)
 
     @field_validator("engine_number", "chassis_number", mode="before")
     @classmethod
@@ -74,4 +76,55 @@ class Unit(UnitBase):
     brand: Optional[str] = None
     color: Optional[str] = None
     current_location: Optional[Location] = None
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    version: Optional[int] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# Bulk operations: at most this many units per request.
+BULK_MAX_ITEMS = 1000
+
+class UnitReferences(BaseModel):
+    """Units addressed by id and/or by engine or chassis number (possibly none)."""
+    unit_ids: List[int] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    identifiers: List[str] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
+    @field_validator("identifiers", mode="before")
+    @classmethod
+    def normalize_identifiers(cls, v):
+        if not isinstance(v, list):
+            return v
+        return [str(item).strip().upper() for item in v if item is not None and str(item).strip()]
+
+class UnitSelection(UnitReferences):
+    """Units addressed by id and/or by engine or chassis number; at least one."""
+
+    @model_validator(mode="after")
+    def require_units(self):
+        if not self.unit_ids and not self.identifiers:
+            raise ValueError("unit_ids or identifiers is required")
+        if len(self.unit_ids) + len(self.identifiers) > BULK_MAX_ITEMS:
+            raise ValueError(f"At most {BULK_MAX_ITEMS} units per request")
+        return self
+
+class UnitBulkCreate(BaseModel):
+    units: List[UnitCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class UnitBulkStatus(UnitSelection):
+    status: UnitStatus
+
+class UnitBulkSell(UnitSelection):
+    sold_date: Optional[datetime] = None
+
+class UnitBulkMove(UnitSelection):
+    location_id: int = Field(..., gt=0)
+
+class UnitBulkItemResult(BaseModel):
+    """Outcome for one requested item; ``key`` is the id or identifier sent (its index on create)."""
+    key: str
+    unit_id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class UnitBulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[UnitBulkItemResult]
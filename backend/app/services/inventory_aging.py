@@ -0,0 +1,116 @@
+"""Inventory aging and days-to-sell analytics.
+
+The report queries fetch flat rows (one per unit or sale, a handful of columns)
+and everything else happens in pandas: ages are computed for the whole column
+at once, binned with ``pd.cut`` and aggregated with ``groupby``, so the cost is
+a couple of scans rather than per-unit Python work.
+
+Ages are whole days: 0–30 days, 31–90 days, and anything older in ``90+``.
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+AGING_BUCKETS = ["0-30", "31-90", "90+"]
+_BUCKET_EDGES = [-np.inf, 30, 90, np.inf]
+
+AGING_COLUMNS = [
+    "location_id", "location", "model", "batch_period", "created_at", "arrived_at",
+]
+SALE_COLUMNS = ["model", "created_at", "sold_at"]
+
+
+def _days_between(start: pd.Series, end) -> pd.Series:
+    """Whole days from ``start`` to ``end``; naive timestamps are taken as UTC."""
+    start = pd.to_datetime(start, utc=True)
+    end = pd.to_datetime(end, utc=True)
+    return ((end - start).dt.total_seconds() // 86400).clip(lower=0)
+
+
+def _none_if_nan(value):
+    return None if pd.isna(value) else value
+
+
+def aging_summary(rows: Iterable, now: datetime) -> dict:
+    """Aging buckets per (location, model, batch_period) for units in stock.
+
+    ``rows`` hold ``AGING_COLUMNS``. Age counts from ``created_at``; days in
+    location from ``arrived_at`` (the last reception), or ``created_at`` for
+    units that never moved.
+    """
+    frame = pd.DataFrame(list(rows), columns=AGING_COLUMNS)
+    if frame.empty:
+        return {
+            "total_units": 0,
+            "by_bucket": dict.fromkeys(AGING_BUCKETS, 0),
+            "groups": [],
+        }
+
+    frame["age_days"] = _days_between(frame["created_at"], now)
+    frame["days_in_location"] = _days_between(
+        frame["arrived_at"].fillna(frame["created_at"]), now
+    )
+    frame["bucket"] = pd.cut(frame["age_days"], _BUCKET_EDGES, labels=AGING_BUCKETS)
+    keys = ["location_id", "location", "model", "batch_period"]
+
+    # One indicator column per bucket, so a single groupby counts every bucket.
+    frame = frame.join(pd.get_dummies(frame["bucket"]).astype(int))
+    table = (
+        frame.groupby(keys, dropna=False)
+        .agg(
+            total=("age_days", "size"),
+            median_age_days=("age_days", "median"),
+            median_days_in_location=("days_in_location", "median"),
+            max_days_in_location=("days_in_location", "max"),
+            **{label: (label, "sum") for label in AGING_BUCKETS},
+        )
+        .reset_index()
+        .sort_values(keys, na_position="last")
+    )
+
+    groups = [
+        {
+            "location_id": int(record["location_id"]),
+            "location": record["location"],
+            "model": record["model"],
+            "batch_period": _none_if_nan(record["batch_period"]),
+            "buckets": {label: int(record[label]) for label in AGING_BUCKETS},
+            "total": int(record["total"]),
+            "median_age_days": float(record["median_age_days"]),
+            "median_days_in_location": float(record["median_days_in_location"]),
+            "max_days_in_location": int(record["max_days_in_location"]),
+        }
+        for record in table.to_dict("records")
+    ]
+    by_bucket = frame["bucket"].value_counts().reindex(AGING_BUCKETS, fill_value=0)
+    return {
+        "total_units": len(frame),
+        "by_bucket": {label: int(count) for label, count in by_bucket.items()},
+        "groups": groups,
+    }
+
+
+def days_to_sell_summary(rows: Iterable) -> list[dict]:
+    """Median and 90th-percentile days from arrival (``created_at``) to sale, per model."""
+    frame = pd.DataFrame(list(rows), columns=SALE_COLUMNS)
+    if frame.empty:
+        return []
+    frame["days"] = _days_between(frame["created_at"], frame["sold_at"])
+    frame = frame.dropna(subset=["days"])
+    stats = frame.groupby("model")["days"].agg(
+        sales="size",
+        median_days="median",
+        p90_days=lambda days: days.quantile(0.9),
+    )
+    return [
+        {
+            "model": model,
+            "sales": int(row.sales),
+            "median_days": float(row.median_days),
+            "p90_days": float(row.p90_days),
+        }
+        for model, row in stats.sort_index().iterrows()
+    ]
@@ -0,0 +1,230 @@
+"""Incremental maintenance of the ``inventory_counters`` summary table.
+
+Every flush that inserts, updates or deletes ``Unit`` rows turns those changes
+into +1/-1 deltas per (location, status, model, product_type) and applies them
+to ``inventory_counters`` on the same connection, so the summary commits or
+rolls back together with the unit write itself. This covers unit CRUD,
+transfers (which move/re-status units through the ORM) and imports alike.
+
+Bulk ``query(Unit).update()/.delete()`` statements bypass the flush and must not
+be used on units. ``UnitRepository.update_units``, which also bypasses it,
+applies its deltas through ``apply_unit_changes``. If the table ever drifts, ``reconcile_counters`` rebuilds it
+from ``units`` and reports the difference.
+"""
+
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+
+from app.models.models import InventoryCounter, Unit, UnitStatus
+
+CounterKey = tuple[int, UnitStatus, str, str]
+
+_COUNTER_FIELDS = ("current_location_id", "status", "model", "product_type")
+_DELTAS = "inventory_counter_deltas"
+
+
+def _counter_key(location_id, status, model, product_type) -> CounterKey:
+    # Mirrors the column default applied on insert when status is left unset.
+    status = status or UnitStatus.WAREHOUSE_UNIDENTIFIED
+    return (location_id, UnitStatus(status), model, product_type or "")
+
+
+def _current_key(unit: Unit) -> CounterKey:
+    return _counter_key(*(getattr(unit, field) for field in _COUNTER_FIELDS))
+
+
+def _committed_key(unit: Unit) -> CounterKey:
+    values = []
+    for field in _COUNTER_FIELDS:
+        history = attributes.get_history(unit, field)
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(unit, field))
+    return _counter_key(*values)
+
+
+def _noop_set(target, value, oldvalue, initiator) -> None:
+    return None
+
+
+# Load the previous value on assignment even when the attribute was expired (e.g.
+# after a commit), so the flush always knows which counter to decrement.
+for _field in _COUNTER_FIELDS:
+    event.listen(getattr(Unit, _field), "set", _noop_set, active_history=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_unit_deltas(session: Session, flush_context, instances) -> None:
+    deltas: Counter = session.info.setdefault(_DELTAS, Counter())
+    for obj in session.new:
+        if isinstance(obj, Unit):
+            deltas[_current_key(obj)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Unit):
+            deltas[_committed_key(obj)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Unit) and session.is_modified(obj):
+            old_key, new_key = _committed_key(obj), _current_key(obj)
+            if old_key != new_key:
+                deltas[old_key] -= 1
+                deltas[new_key] += 1
+
+
+def _apply_deltas(session: Session, deltas: Counter) -> None:
+    rows = [
+        {
+            "location_id": location_id,
+            "status": status,
+            "model": model,
+            "product_type": product_type,
+            "count": delta,
+        }
+        for (location_id, status, model, product_type), delta in deltas.items()
+        if delta
+    ]
+    if rows:
+        apply_counter_deltas(session, rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_unit_deltas(session: Session, flush_context) -> None:
+    deltas: Counter | None = session.info.pop(_DELTAS, None)
+    if deltas:
+        _apply_deltas(session, deltas)
+
+
+def apply_unit_changes(session: Session, units: list[Unit], values: dict[str, Any]) -> None:
+    """Move ``units`` to the counters ``values`` puts them in, for a write outside the flush.
+
+    Call it before the units' in-memory state takes ``values``.
+    """
+    deltas: Counter = Counter()
+    for unit in units:
+        old_key = _current_key(unit)
+        new_key = _counter_key(*(values.get(field, getattr(unit, field)) for field in _COUNTER_FIELDS))
+        if old_key != new_key:
+            deltas[old_key] -= 1
+            deltas[new_key] += 1
+    _apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_unit_deltas(session: Session) -> None:
+    session.info.pop(_DELTAS, None)
+
+
+def apply_counter_deltas(session: Session, rows: list[dict[str, Any]]) -> None:
+    """Add each row's ``count`` to its counter, creating missing counters.
+
+    Uses a single ``INSERT ... ON CONFLICT DO UPDATE`` executemany on PostgreSQL
+    and SQLite, and an update-then-insert fallback elsewhere.
+    """
+    connection = session.connection()
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(InventoryCounter)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in InventoryCounter.__table__.primary_key],
+            set_={"count": InventoryCounter.count + stmt.excluded["count"]},
+        )
+        connection.execute(stmt, rows)
+        return
+
+    table = InventoryCounter.__table__
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(
+                table.c.location_id == row["location_id"],
+                table.c.status == row["status"],
+                table.c.model == row["model"],
+                table.c.product_type == row["product_type"],
+            )
+            .values(count=table.c.count + row["count"])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def count_units_by_key(db: Session) -> dict[CounterKey, int]:
+    """Recount units from the source table, grouped by counter key."""
+    rows = (
+        db.query(
+            Unit.current_location_id,
+            Unit.status,
+            Unit.model,
+            Unit.product_type,
+            func.count(Unit.id),
+        )
+        .group_by(Unit.current_location_id, Unit.status, Unit.model, Unit.product_type)
+        .all()
+    )
+    counts: Counter = Counter()
+    for location_id, status, model, product_type, count in rows:
+        counts[_counter_key(location_id, status, model, product_type)] += count
+    return dict(counts)
+
+
+def read_counters(db: Session) -> dict[CounterKey, int]:
+    """Current non-zero counters."""
+    rows = db.query(InventoryCounter).filter(InventoryCounter.count != 0).all()
+    return {
+        _counter_key(r.location_id, r.status, r.model, r.product_type): r.count
+        for r in rows
+    }
+
+
+def reconcile_counters(db: Session, dry_run: bool = False) -> list[dict]:
+    """Compare counters against ``units`` and, unless ``dry_run``, rebuild them.
+
+    Returns one entry per drifted key with the ``expected`` (recounted) and
+    ``actual`` (stored) values; an empty list means the table was accurate. The
+    rebuild replaces the whole table in one transaction. On PostgreSQL the
+    ``units`` table is share-locked meanwhile so no write lands between the
+    recount and the commit.
+    """
+    if not dry_run and db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE units IN SHARE MODE")
+
+    expected = count_units_by_key(db)
+    actual = read_counters(db)
+    drift = [
+        {
+            "location_id": key[0],
+            "status": key[1].value,
+            "model": key[2],
+            "product_type": key[3] or None,
+            "expected": expected.get(key, 0),
+            "actual": actual.get(key, 0),
+        }
+        for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], k[1].value, k[2], k[3]))
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+
+    if dry_run:
+        db.rollback()
+        return drift
+
+    db.query(InventoryCounter).delete()
+    db.add_all([
+        InventoryCounter(
+            location_id=location_id,
+            status=status,
+            model=model,
+            product_type=product_type,
+            count=count,
+        )
+        for (location_id, status, model, product_type), count in expected.items()
+    ])
+    db.commit()
+    return drift
@@ -0,0 +1,439 @@
+"""Inventory history: daily snapshots, checkpoints and point-in-time state.
+
+``take_snapshot`` copies today's ``inventory_counters`` into
+``inventory_snapshots`` (one row per location, status and model). It is meant
+to run once a day, shortly before midnight in ``REPORT_TIMEZONE``; re-running
+it for the same day replaces that day's rows.
+
+``backfill_snapshots`` reconstructs past days by replaying each unit's history:
+
+* a unit exists from ``created_at``, at the origin of its first transfer (or
+  its current location when it never moved);
+* a transfer with a destination puts it ``IN_TRANSIT`` at the origin when
+  dispatched and ``AVAILABLE`` at the destination when received (cancelled
+  transfers are ignored);
+* a ``sales`` row makes it ``SOLD`` at the selling location.
+
+After its last event a unit is in its current state, so the replay always ends
+in the live inventory. Statuses nothing in the log explains (e.g. a unit still
+unidentified in the warehouse) are taken from the unit's current status.
+Deleted units left no trace and are not counted.
+
+``units_as_of`` answers "where was each unit, and in what status, at time T"
+with the same rules. Replaying every unit from the beginning would grow with
+the whole log, so ``take_checkpoint`` periodically saves every unit's state
+(every ``INVENTORY_CHECKPOINT_DAYS``, default 7, from the snapshot job). A query
+loads the latest checkpoint before T and replays only the events after it. The
+replay is column-wise in pandas: events are sorted by unit and time, and each
+unit's state at T follows from its last event at or before T.
+"""
+
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, exists, func, insert, literal, or_, select, union
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    InventoryCheckpoint,
+    InventoryCheckpointUnit,
+    InventoryCounter,
+    InventorySnapshot,
+    Sale,
+    Transfer,
+    TransferStatus,
+    Unit,
+    UnitStatus,
+)
+from app.services.timeseries import get_zone
+
+INVENTORY_CHECKPOINT_DAYS = int(os.getenv("INVENTORY_CHECKPOINT_DAYS", "7"))
+
+SnapshotKey = tuple[int, UnitStatus, str]
+State = tuple[int, UnitStatus]
+Event = tuple[datetime, str, Optional[int]]
+
+DISPATCH, RECEIVE, SALE = "dispatch", "receive", "sale"
+EVENT_COLUMNS = ["unit_id", "happened_at", "kind", "location_id"]
+_EVENT_STATUS = {
+    DISPATCH: UnitStatus.IN_TRANSIT,
+    RECEIVE: UnitStatus.AVAILABLE,
+    SALE: UnitStatus.SOLD,
+}
+
+
+def today() -> date:
+    return datetime.now(get_zone()).date()
+
+
+def _local_date(value: Optional[datetime], zone) -> Optional[date]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(zone).date()
+
+
+def write_snapshot(db: Session, day: date, counts: dict[SnapshotKey, int]) -> int:
+    """Replace the snapshot rows of ``day`` with ``counts``; returns rows written."""
+    db.execute(delete(InventorySnapshot).where(InventorySnapshot.snapshot_date == day))
+    rows = [
+        {
+            "snapshot_date": day,
+            "location_id": location_id,
+            "status": status,
+            "model": model,
+            "count": count,
+        }
+        for (location_id, status, model), count in counts.items()
+        if count and location_id is not None
+    ]
+    if rows:
+        db.execute(insert(InventorySnapshot), rows)
+    return len(rows)
+
+
+def take_snapshot(db: Session, day: Optional[date] = None) -> int:
+    """Snapshot the current counters as the stock of ``day`` (default: today)."""
+    rows = (
+        db.query(
+            InventoryCounter.location_id,
+            InventoryCounter.status,
+            InventoryCounter.model,
+            func.sum(InventoryCounter.count),
+        )
+        .group_by(InventoryCounter.location_id, InventoryCounter.status, InventoryCounter.model)
+        .all()
+    )
+    written = write_snapshot(
+        db, day or today(), {(loc, status, model): count for loc, status, model, count in rows}
+    )
+    db.commit()
+    return written
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _event_criteria(
+    after: Optional[datetime], until: Optional[datetime]
+) -> tuple[list, list]:
+    """Criteria on ``Transfer`` and ``Sale`` for rows with an event in ``(after, until]``.
+
+    A transfer row carries two events, so it matches when either does; callers
+    drop the individual events outside the window.
+    """
+    transfer_criteria = [
+        Transfer.destination_location_id.isnot(None),
+        Transfer.status != TransferStatus.CANCELLED,
+    ]
+    sale_criteria = []
+    if after is not None:
+        transfer_criteria.append(
+            or_(Transfer.dispatched_at > after, Transfer.received_at > after)
+        )
+        sale_criteria.append(Sale.sold_at > after)
+    if until is not None:
+        transfer_criteria.append(
+            or_(Transfer.dispatched_at <= until, Transfer.received_at <= until)
+        )
+        sale_criteria.append(Sale.sold_at <= until)
+    return transfer_criteria, sale_criteria
+
+
+def _event_rows(
+    db: Session,
+    unit_criteria: Optional[list] = None,
+    after: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Iterator[tuple[int, datetime, str, Optional[int]]]:
+    """``(unit_id, happened_at, kind, location_id)`` per event, transfers first, unordered.
+
+    ``unit_criteria`` (on ``Unit``) restricts the units with a join, so the
+    database filters them however many there are.
+    """
+    transfer_criteria, sale_criteria = _event_criteria(after, until)
+    transfers = db.query(
+        Transfer.unit_id,
+        Transfer.origin_location_id,
+        Transfer.destination_location_id,
+        Transfer.dispatched_at,
+        Transfer.received_at,
+    ).filter(*transfer_criteria)
+    sales = db.query(Sale.unit_id, Sale.location_id, Sale.sold_at).filter(*sale_criteria)
+    if unit_criteria is not None:
+        transfers = transfers.join(Unit, Unit.id == Transfer.unit_id).filter(*unit_criteria)
+        sales = sales.join(Unit, Unit.id == Sale.unit_id).filter(*unit_criteria)
+
+    for unit_id, origin, destination, dispatched_at, received_at in transfers.yield_per(1000):
+        if dispatched_at is not None:
+            yield unit_id, _utc(dispatched_at), DISPATCH, origin
+        if received_at is not None:
+            yield unit_id, _utc(received_at), RECEIVE, destination
+    for unit_id, location_id, sold_at in sales.yield_per(1000):
+        yield unit_id, _utc(sold_at), SALE, location_id
+
+
+def load_events(
+    db: Session,
+    unit_criteria: Optional[list] = None,
+    after: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict[int, list[Event]]:
+    """Location-changing events per unit, oldest first.
+
+    ``unit_criteria`` restricts the units; ``after``/``until`` keep only the
+    events in ``(after, until]``.
+    """
+    events: dict[int, list[Event]] = defaultdict(list)
+    for unit_id, happened_at, kind, location in _event_rows(db, unit_criteria, after, until):
+        events[unit_id].append((happened_at, kind, location))
+
+    low = _utc(after) if after is not None else None
+    high = _utc(until) if until is not None else None
+    for unit_events in events.values():
+        unit_events.sort(key=lambda e: e[0])
+        unit_events[:] = [
+            e for e in unit_events
+            if (low is None or e[0] > low) and (high is None or e[0] <= high)
+        ]
+    return events
+
+
+def event_frame(
+    db: Session,
+    unit_criteria: Optional[list] = None,
+    after: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """The events of ``load_events`` as columns, sorted by unit, then time."""
+    frame = pd.DataFrame(
+        list(_event_rows(db, unit_criteria, after, until)), columns=EVENT_COLUMNS
+    )
+    frame["happened_at"] = pd.to_datetime(frame["happened_at"], utc=True)
+    frame["location_id"] = frame["location_id"].astype("Int64")
+    keep = np.ones(len(frame), dtype=bool)
+    if after is not None:
+        keep &= (frame["happened_at"] > _utc(after)).to_numpy()
+    if until is not None:
+        keep &= (frame["happened_at"] <= _utc(until)).to_numpy()
+    frame = frame[keep]
+    # lexsort is stable: simultaneous events keep their load order, as in load_events.
+    order = np.lexsort((frame["happened_at"].to_numpy(), frame["unit_id"].to_numpy()))
+    return frame.iloc[order].reset_index(drop=True)
+
+
+def initial_state(
+    events: list[Event], current_location: int, current_status: UnitStatus
+) -> State:
+    """Where and how a unit started: at the origin of its first dispatch, not yet moved."""
+    location = next((loc for _, kind, loc in events if kind == DISPATCH and loc), current_location)
+    if current_status in (UnitStatus.SOLD, UnitStatus.IN_TRANSIT):
+        return location, UnitStatus.AVAILABLE
+    return location, current_status
+
+
+def apply_event(state: State, kind: str, location: Optional[int]) -> State:
+    if kind == DISPATCH:
+        return location or state[0], UnitStatus.IN_TRANSIT
+    if kind == RECEIVE:
+        return location, UnitStatus.AVAILABLE
+    return location or state[0], UnitStatus.SOLD
+
+
+def replay_daily_counts(
+    db: Session, date_from: date, date_to: date
+) -> dict[date, dict[SnapshotKey, int]]:
+    """End-of-day unit counts for every day in ``[date_from, date_to]``, from history."""
+    zone = get_zone()
+    events = load_events(db)
+
+    # A state held over the days [start, end) adds +1 at start and -1 at end; a
+    # running sum of these deltas gives the end-of-day counts.
+    deltas: Counter = Counter()
+    units = db.query(Unit.id, Unit.model, Unit.current_location_id, Unit.status, Unit.created_at)
+    for unit_id, model, current_location, current_status, created_at in units.yield_per(1000):
+        start = _local_date(created_at, zone) or date_from
+        unit_events = events.get(unit_id, [])
+        state = initial_state(unit_events, current_location, current_status)
+
+        for happened_at, kind, event_location in unit_events:
+            day = max(_local_date(happened_at, zone), start)
+            deltas[((state[0], state[1], model), start)] += 1
+            deltas[((state[0], state[1], model), day)] -= 1
+            state, start = apply_event(state, kind, event_location), day
+
+        # The last state runs to today and is, by definition, the current one.
+        deltas[((current_location, current_status, model), start)] += 1
+
+    running: Counter = Counter()
+    changes: dict[date, list] = defaultdict(list)
+    for (key, day), delta in deltas.items():
+        if day < date_from:
+            running[key] += delta
+        elif day <= date_to:
+            changes[day].append((key, delta))
+
+    by_day: dict[date, dict[SnapshotKey, int]] = {}
+    day = date_from
+    while day <= date_to:
+        for key, delta in changes.get(day, ()):
+            running[key] += delta
+        by_day[day] = {key: count for key, count in running.items() if count > 0}
+        day += timedelta(days=1)
+    return by_day
+
+
+def backfill_snapshots(db: Session, date_from: date, date_to: Optional[date] = None) -> int:
+    """Rebuild the snapshots of ``[date_from, date_to]`` (default: up to yesterday) from history.
+
+    Idempotent: each day's rows are replaced. Returns the number of rows written.
+    """
+    date_to = date_to or today() - timedelta(days=1)
+    written = 0
+    for day, counts in replay_daily_counts(db, date_from, date_to).items():
+        written += write_snapshot(db, day, counts)
+    db.commit()
+    return written
+
+
+def take_checkpoint(db: Session, taken_at: Optional[datetime] = None) -> InventoryCheckpoint:
+    """Save every unit's current location and status as a checkpoint."""
+    checkpoint = InventoryCheckpoint(taken_at=taken_at or datetime.now(timezone.utc))
+    db.add(checkpoint)
+    db.flush()
+    db.execute(
+        insert(InventoryCheckpointUnit).from_select(
+            ["checkpoint_id", "unit_id", "location_id", "status"],
+            select(literal(checkpoint.id), Unit.id, Unit.current_location_id, Unit.status),
+        )
+    )
+    db.commit()
+    return checkpoint
+
+
+def checkpoint_due(db: Session) -> bool:
+    """True when the latest checkpoint is older than ``INVENTORY_CHECKPOINT_DAYS``."""
+    latest = db.query(func.max(InventoryCheckpoint.taken_at)).scalar()
+    return latest is None or _utc(latest) <= datetime.now(timezone.utc) - timedelta(
+        days=INVENTORY_CHECKPOINT_DAYS
+    )
+
+
+def replay_frame(states: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """``states`` (indexed by unit id) after ``events``, vectorized with ``apply_event``'s rules.
+
+    Only a unit's last event decides its status; its location is the last one
+    any of its events names (a dispatch or sale without one leaves it in place).
+    """
+    events = events[events["unit_id"].isin(states.index)]
+    if events.empty:
+        return states
+    located = events["location_id"].groupby(events["unit_id"]).ffill()
+    last = events.assign(location_id=located).drop_duplicates("unit_id", keep="last")
+    last = last.set_index("unit_id")
+
+    states = states.copy()
+    states.loc[last.index, "status"] = last["kind"].map(_EVENT_STATUS)
+    states.loc[last.index, "location_id"] = last["location_id"].fillna(
+        states.loc[last.index, "location_id"]
+    )
+    return states
+
+
+def _state_frame(rows) -> pd.DataFrame:
+    frame = pd.DataFrame(list(rows), columns=["unit_id", "location_id", "status"])
+    frame["location_id"] = frame["location_id"].astype("Int64")
+    return frame.set_index("unit_id")
+
+
+def _units_with_events(after: datetime, until: datetime):
+    """Ids of the units with an event in ``(after, until]``, as a subquery."""
+    transfer_criteria, sale_criteria = _event_criteria(after, until)
+    return union(
+        select(Transfer.unit_id).where(*transfer_criteria),
+        select(Sale.unit_id).where(*sale_criteria),
+    )
+
+
+def units_as_of(
+    db: Session,
+    as_of: datetime,
+    criteria: Iterable = (),
+    location_id: Optional[int] = None,
+) -> dict[int, State]:
+    """``unit_id -> (location_id, status)`` of the units matching ``criteria`` at ``as_of``.
+
+    Units in the latest checkpoint before ``as_of`` start from their saved state
+    and replay only the events since it; with ``location_id``, only the saved
+    rows at that location or with such events are read. Units created after
+    that checkpoint (every unit, when there is none) replay their whole history,
+    ending in their current state when nothing happened to them after ``as_of``.
+    ``criteria`` are applied in SQL to every query, so a narrow filter reads
+    only its own units and events.
+    """
+    as_of = _utc(as_of)
+    criteria = [or_(Unit.created_at.is_(None), Unit.created_at <= as_of), *criteria]
+    fresh = criteria
+    frames = []
+
+    checkpoint = (
+        db.query(InventoryCheckpoint)
+        .filter(InventoryCheckpoint.taken_at <= as_of)
+        .order_by(InventoryCheckpoint.taken_at.desc())
+        .first()
+    )
+    if checkpoint is not None:
+        saved = db.query(
+            InventoryCheckpointUnit.unit_id,
+            InventoryCheckpointUnit.location_id,
+            InventoryCheckpointUnit.status,
+        ).join(Unit, Unit.id == InventoryCheckpointUnit.unit_id).filter(
+            InventoryCheckpointUnit.checkpoint_id == checkpoint.id, *criteria
+        )
+        if location_id is not None:
+            saved = saved.filter(or_(
+                InventoryCheckpointUnit.location_id == location_id,
+                InventoryCheckpointUnit.unit_id.in_(
+                    _units_with_events(checkpoint.taken_at, as_of)
+                ),
+            ))
+        delta = event_frame(db, criteria, after=checkpoint.taken_at, until=as_of)
+        frames.append(replay_frame(_state_frame(saved.yield_per(1000)), delta))
+        fresh = [*criteria, ~exists().where(
+            InventoryCheckpointUnit.checkpoint_id == checkpoint.id,
+            InventoryCheckpointUnit.unit_id == Unit.id,
+        )]
+
+    current = _state_frame(
+        db.query(Unit.id, Unit.current_location_id, Unit.status).filter(*fresh).yield_per(1000)
+    )
+    history = event_frame(db, fresh)
+    # Units with nothing after as_of were already in their current state then.
+    later = history.loc[history["happened_at"] > as_of, "unit_id"].unique()
+    replayed = current.index.intersection(later)
+    frames.append(current.drop(replayed))
+
+    # The others start as initial_state() has it, then replay up to as_of.
+    start = current.loc[replayed].copy()
+    dispatches = history[(history["kind"] == DISPATCH) & history["location_id"].notna()]
+    origins = dispatches.drop_duplicates("unit_id").set_index("unit_id")["location_id"]
+    start["location_id"] = origins.reindex(start.index).fillna(start["location_id"])
+    moved_on = start["status"].isin([UnitStatus.SOLD, UnitStatus.IN_TRANSIT])
+    start.loc[moved_on, "status"] = UnitStatus.AVAILABLE
+    frames.append(replay_frame(start, history[history["happened_at"] <= as_of]))
+
+    states = pd.concat(frames)
+    if location_id is not None:
+        states = states[states["location_id"] == location_id]
+    return {
+        int(unit_id): (None if pd.isna(location) else int(location), UnitStatus(status))
+        for unit_id, location, status in zip(
+            states.index, states["location_id"], states["status"], strict=True
+        )
+    }
@@ -1,15 +1,51 @@
 
 """Report generation service."""
 
-import io
-from datetime import datetime, timedelta
+import enum
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
-import pandas as pd
-from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import func, desc, or_, and_, cast, String
-from fastapi import Response
-
-from app.models.models import Unit, Location, Transfer, Import, UnitStatus, TransferStatus
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, desc, or_, cast, literal, String
+from fastapi.responses import StreamingResponse
+
+from app.core.cache import stats_cache
+from app.core.pagination import after_cursor, cursor_page, decode_cursor, encode_cursor
+from app.models.models import (
+    Unit, Location, Transfer, Import, Sale, InventorySnapshot, User, UnitStatus, TransferStatus,
+)
+from app.repositories.transfer_repository import TransferRepository
+from app.repositories.unit_repository import UnitRepository
+from app.services.inventory_aging import AGING_BUCKETS, aging_summary, days_to_sell_summary
+from app.services.inventory_cube import PivotDimension, inventory_cube
+from app.services.inventory_history import units_as_of
+from app.services.report_export import (
+    EXPORT_BATCH_SIZE, ExportFormat, table_response, xlsx_response,
+)
+from app.services.route_analytics import route_summary
+from app.services.timeseries import (
+    Granularity, bucket_counts, bucket_expression, bucket_label, bucket_of,
+    fill_buckets, get_zone,
+)
+
+INVENTORY_EXPORT_COLUMNS = [
+    "id", "engine_number", "chassis_number", "brand", "model", "color",
+    "location", "status", "created_at", "sold_date",
+]
+TRANSFER_EXPORT_COLUMNS = [
+    "id", "unit_id", "dispatched_by_id", "received_by_id", "origin_location_id",
+    "destination_location_id", "status", "dispatched_at", "received_at",
+]
+SALES_EXPORT_COLUMNS = [
+    "id", "engine_number", "chassis_number", "brand", "model", "color",
+    "location", "batch_period", "sold_date",
+]
+
+
+class SeriesMetric(str, enum.Enum):
+    SALES = "sales"
+    TRANSFERS = "transfers"
 
 
 class ReportService:
@@ -17,102 +53,82 @@ class ReportService:
 
     @staticmethod
     def get_dashboard_stats(db: Session) -> dict:
-        total_units = db.query(Unit).count()
-        in_stock_units = db.query(Unit).filter(Unit.status == UnitStatus.AVAILABLE).count()
-        sold_units = db.query(Unit).filter(Unit.status == UnitStatus.SOLD).count()
-        in_transit_units = db.query(Unit).filter(Unit.status == UnitStatus.IN_TRANSIT).count()
-        total_locations = db.query(Location).count()
-
-        recent_transfers = db.query(Transfer).options(
-            selectinload(Transfer.dispatched_by),
-            selectinload(Transfer.received_by),
-            selectinload(Transfer.origin_location),
-            selectinload(Transfer.destination_location),
-        ).order_by(desc(Transfer.dispatched_at)).limit(10).all()
-
-        inventory_by_location = db.query(
-            Location.name.label("location"),
-            func.count(Unit.id).label("count"),
-        ).join(Unit, Unit.current_location_id == Location.id, isouter=True) \
-         .group_by(Location.id, Location.name).all()
+        """Dashboard aggregates, served from the short-lived stats cache.
+
+        Polled by every logged-in user, so the result is cached for
+        ``STATS_CACHE_TTL_SECONDS`` and dropped on any inventory write.
+        """
+        return stats_cache.get_or_set("dashboard", lambda: ReportService._build_dashboard_stats(db))
+
+    @staticmethod
+    def _build_dashboard_stats(db: Session) -> dict:
+        # One conditional-aggregate round trip per entity; the location total
+        # falls out of the per-location breakdown, which lists every location.
+        unit_counts = UnitRepository.count_by_status(db)
+        transfer_counts = TransferRepository.count_by_status(db)
+        inventory_by_location = UnitRepository.count_by_location(db)
+
+        # Flat projections: names come back in the same row instead of being
+        # lazy-loaded (or selectin-loaded) from related entities.
+        origin, destination = aliased(Location), aliased(Location)
+        dispatcher, receiver = aliased(User), aliased(User)
+        recent_transfers = db.query(
+            Transfer.id,
+            Unit.engine_number.label("unit_engine"),
+            origin.name.label("origin_location"),
+            destination.name.label("destination_location"),
+            (dispatcher.first_name + " " + dispatcher.last_name).label("dispatched_by"),
+            (receiver.first_name + " " + receiver.last_name).label("received_by"),
+            Transfer.status,
+            Transfer.dispatched_at,
+            Transfer.received_at,
+        ).outerjoin(Unit, Unit.id == Transfer.unit_id) \
+         .outerjoin(origin, origin.id == Transfer.origin_location_id) \
+         .outerjoin(destination, destination.id == Transfer.destination_location_id) \
+         .outerjoin(dispatcher, dispatcher.id == Transfer.dispatched_by_id) \
+         .outerjoin(receiver, receiver.id == Transfer.received_by_id) \
+         .order_by(desc(Transfer.dispatched_at)).limit(10).all()
 
         inventory_by_brand = db.query(
             Unit.brand.label("brand"),
             func.count(Unit.id).label("count"),
         ).group_by(Unit.brand).all()
 
-        six_months_ago = datetime.now() - timedelta(days=180)
-        sales_by_month = db.query(
-            func.substr(cast(Unit.sold_date, String), 1, 7).label("month"),
-            func.count(Unit.id).label("count"),
-        ).filter(
-            and_(Unit.status == UnitStatus.SOLD, Unit.sold_date >= six_months_ago)
-        ).group_by(func.substr(cast(Unit.sold_date, String), 1, 7)) \
-         .order_by(func.substr(cast(Unit.sold_date, String), 1, 7)).all()
-
-        recent_imports = db.query(Import).options(
-            selectinload(Import.user)
-        ).order_by(desc(Import.import_date)).limit(5).all()
+        six_months_ago = datetime.now(timezone.utc) - timedelta(days=180)
+        sales_by_month = bucket_counts(
+            db, Sale.sold_at, Granularity.MONTH, date_from=six_months_ago
+        )
 
-        active_transfers = db.query(Transfer).filter(
-            Transfer.status.in_([TransferStatus.PENDING, TransferStatus.IN_TRANSIT])
-        ).count()
+        recent_imports = db.query(
+            Import.id,
+            Import.original_filename.label("filename"),
+            Import.total_records,
+            Import.successful_imports.label("successful"),
+            Import.failed_imports.label("failed"),
+            Import.import_date.label("date"),
+            (User.first_name + " " + User.last_name).label("user"),
+        ).outerjoin(User, User.id == Import.user_id) \
+         .order_by(desc(Import.import_date)).limit(5).all()
 
         return {
-            "units": {
-                "total": total_units,
-                "available": in_stock_units,
-                "sold": sold_units,
-                "in_transit": in_transit_units,
-            },
-            "locations": {"total": total_locations},
-            "transfers": {"active": active_transfers},
-            "recent_transfers": [
-                {
-                    "id": t.id,
-                    "unit_engine": t.unit.engine_number if t.unit else None,
-                    "origin_location": t.origin_location.name if t.origin_location else None,
-                    "destination_location": t.destination_location.name if t.destination_location else None,
-                    "dispatched_by": f"{t.dispatched_by.first_name} {t.dispatched_by.last_name}" if t.dispatched_by else None,
-                    "received_by": f"{t.received_by.first_name} {t.received_by.last_name}" if t.received_by else None,
-                    "status": t.status,
-                    "dispatched_at": t.dispatched_at,
-                    "received_at": t.received_at,
-                }
-                for t in recent_transfers
-            ],
-            "inventory_by_location": [
-                {"location": item.location, "count": item.count}
-                for item in inventory_by_location
-            ],
+            "units": unit_counts,
+            "locations": {"total": len(inventory_by_location)},
+            "transfers": {"active": transfer_counts["pending"] + transfer_counts["in_transit"]},
+            "recent_transfers": [row._asdict() for row in recent_transfers],
+            "inventory_by_location": inventory_by_location,
             "inventory_by_brand": [
                 {"brand": item.brand, "count": item.count}
                 for item in inventory_by_brand
             ],
             "sales_by_month": [
-                {
-                    "month": item.month if item.month else None,
-                    "count": item.count,
-                }
+                {"month": item["bucket"], "count": item["count"]}
                 for item in sales_by_month
             ],
-            "recent_imports": [
-                {
-                    "id": imp.id,
-                    "filename": imp.original_filename,
-                    "total_records": imp.total_records,
-                    "successful": imp.successful_imports,
-                    "failed": imp.failed_imports,
-                    "date": imp.import_date,
-                    "user": f"{imp.user.first_name} {imp.user.last_name}" if imp.user else None,
-                }
-                for imp in recent_imports
-            ],
+            "recent_imports": [row._asdict() for row in recent_imports],
         }
 
     @staticmethod
-    def get_inventory_report(
-        db: Session,
+    def _inventory_criteria(
         brand: Optional[str] = None,
         model: Optional[str] = None,
         color: Optional[str] = None,
@@ -120,55 +136,199 @@ class ReportService:
         status: Optional[UnitStatus] = None,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-    ) -> dict:
-        query = db.query(Unit).options(selectinload(Unit.current_location))
-
+    ) -> list:
+        criteria = []
         if brand:
-            query = query.filter(Unit.brand == brand)
+            criteria.append(Unit.brand == brand)
         if model:
-            query = query.filter(Unit.model == model)
+            criteria.append(Unit.model == model)
         if color:
-            query = query.filter(Unit.color == color)
+            criteria.append(Unit.color == color)
         if location_id:
-            query = query.filter(Unit.current_location_id == location_id)
+            criteria.append(Unit.current_location_id == location_id)
         if status:
-            query = query.filter(Unit.status == status)
+            criteria.append(Unit.status == status)
         if date_from:
-            query = query.filter(Unit.created_at >= date_from)
+            criteria.append(Unit.created_at >= date_from)
         if date_to:
-            query = query.filter(Unit.created_at <= date_to)
+            criteria.append(Unit.created_at <= date_to)
+        return criteria
 
-        units = query.all()
+    @staticmethod
+    def _inventory_summary(db: Session, criteria: list) -> dict:
+        """Unit counts by status and by location in a single statement.
+
+        PostgreSQL computes both breakdowns with one ``GROUPING SETS`` scan; other
+        dialects (SQLite in tests) get the equivalent ``UNION ALL`` of two
+        group-bys, still in one round trip.
+        """
+        by_status: dict[str, int] = {}
+        by_location: dict[str, int] = {}
+
+        if db.get_bind().dialect.name == "postgresql":
+            rows = db.query(
+                func.grouping(Unit.status).label("status_rolled_up"),
+                Unit.status,
+                Location.name,
+                func.count(Unit.id).label("count"),
+            ).join(Location, Location.id == Unit.current_location_id) \
+             .filter(*criteria) \
+             .group_by(func.grouping_sets(Unit.status, Location.name)).all()
+            for row in rows:
+                if row.status_rolled_up:
+                    by_location[row.name] = row.count
+                else:
+                    by_status[row.status.value] = row.count
+            return {"by_status": by_status, "by_location": by_location}
+
+        status_counts = db.query(
+            literal("status").label("dimension"),
+            cast(Unit.status, String).label("key"),
+            func.count(Unit.id).label("count"),
+        ).filter(*criteria).group_by(Unit.status)
+        location_counts = db.query(
+            literal("location").label("dimension"),
+            Location.name.label("key"),
+            func.count(Unit.id).label("count"),
+        ).join(Location, Location.id == Unit.current_location_id) \
+         .filter(*criteria).group_by(Location.name)
+        for row in status_counts.union_all(location_counts).all():
+            target = by_status if row.dimension == "status" else by_location
+            target[row.key] = row.count
+        return {"by_status": by_status, "by_location": by_location}
 
-        by_status = {}
-        by_location = {}
-        for unit in units:
-            status_key = unit.status.value if unit.status else "unknown"
-            by_status[status_key] = by_status.get(status_key, 0) + 1
-            location_key = unit.current_location.name if unit.current_location else "No Location"
-            by_location[location_key] = by_location.get(location_key, 0) + 1
+    @staticmethod
+    def _inventory_units_query(db: Session, criteria: list):
+        """Column projection of the inventory rows, ordered by the keyset ``id``."""
+        return db.query(
+            Unit.id,
+            Unit.engine_number,
+            Unit.chassis_number,
+            Unit.brand,
+            Unit.model,
+            Unit.color,
+            Location.name.label("location"),
+            Unit.status,
+            Unit.created_at,
+            Unit.sold_date,
+        ).join(Location, Location.id == Unit.current_location_id) \
+         .filter(*criteria).order_by(Unit.id)
 
+    @staticmethod
+    def _inventory_unit_dict(row) -> dict:
         return {
-            "total_units": len(units),
-            "summary": {
-                "by_status": by_status,
-                "by_location": by_location,
+            "id": row.id,
+            "engine_number": row.engine_number,
+            "chassis_number": row.chassis_number,
+            "brand": row.brand,
+            "model": row.model,
+            "color": row.color,
+            "location": row.location,
+            "status": row.status.value if row.status else None,
+            "created_at": row.created_at,
+            "sold_date": row.sold_date,
+        }
+
+    @staticmethod
+    def get_inventory_report(
+        db: Session,
+        brand: Optional[str] = None,
+        model: Optional[str] = None,
+        color: Optional[str] = None,
+        location_id: Optional[int] = None,
+        status: Optional[UnitStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        as_of: Optional[datetime] = None,
+    ) -> dict:
+        """Inventory summary plus one keyset-paginated page of matching units.
+
+        The summary is aggregated in SQL over every matching unit; the unit list
+        holds at most ``limit`` rows after ``cursor`` (the ``next_cursor`` of the
+        previous page), so latency tracks the page size, not the fleet size.
+
+        With ``as_of``, locations and statuses are those the units had at that
+        time, reconstructed from the transfers log.
+        """
+        if as_of:
+            return ReportService._inventory_as_of_report(
+                db, as_of, location_id=location_id, status=status, cursor=cursor, limit=limit,
+                criteria=ReportService._inventory_criteria(
+                    brand=brand, model=model, color=color, date_from=date_from, date_to=date_to,
+                ),
+            )
+        criteria = ReportService._inventory_criteria(
+            brand=brand, model=model, color=color, location_id=location_id,
+            status=status, date_from=date_from, date_to=date_to,
+        )
+        summary = ReportService._inventory_summary(db, criteria)
+
+        query = ReportService._inventory_units_query(db, criteria)
+        if cursor:
+            (after_id,) = decode_cursor(cursor, 1)
+            query = query.filter(Unit.id > after_id)
+        rows = query.limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "total_units": sum(summary["by_status"].values()),
+            "summary": summary,
+            "units": [ReportService._inventory_unit_dict(row) for row in rows],
+            "pagination": {
+                "limit": limit,
+                "cursor": cursor,
+                "next_cursor": encode_cursor(rows[-1].id) if has_next else None,
+                "has_next": has_next,
+            },
+        }
+
+    @staticmethod
+    def _inventory_as_of_report(
+        db: Session,
+        as_of: datetime,
+        criteria: list,
+        location_id: Optional[int] = None,
+        status: Optional[UnitStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> dict:
+        states = units_as_of(db, as_of, criteria, location_id=location_id or None)
+        if status:
+            states = {k: v for k, v in states.items() if v[1] == status}
+
+        names = dict(db.query(Location.id, Location.name).all())
+        by_status = Counter(unit_status.value for _, unit_status in states.values())
+        by_location = Counter(names.get(location) for location, _ in states.values())
+
+        ids = sorted(states)
+        if cursor:
+            (after_id,) = decode_cursor(cursor, 1)
+            ids = ids[bisect_right(ids, after_id):]
+        has_next = len(ids) > limit
+        ids = ids[:limit]
+        rows = ReportService._inventory_units_query(db, [Unit.id.in_(ids)]).all() if ids else []
+
+        units = []
+        for row in rows:
+            location, unit_status = states[row.id]
+            unit = ReportService._inventory_unit_dict(row)
+            unit.update(location=names.get(location), status=unit_status.value)
+            units.append(unit)
+
+        return {
+            "as_of": as_of,
+            "total_units": len(states),
+            "summary": {"by_status": dict(by_status), "by_location": dict(by_location)},
+            "units": units,
+            "pagination": {
+                "limit": limit,
+                "cursor": cursor,
+                "next_cursor": encode_cursor(ids[-1]) if has_next else None,
+                "has_next": has_next,
             },
-            "units": [
-                {
-                    "id": unit.id,
-                    "engine_number": unit.engine_number,
-                    "chassis_number": unit.chassis_number,
-                    "brand": unit.brand,
-                    "model": unit.model,
-                    "color": unit.color,
-                    "location": unit.current_location.name if unit.current_location else None,
-                    "status": unit.status.value if unit.status else None,
-                    "created_at": unit.created_at,
-                    "sold_date": unit.sold_date,
-                }
-                for unit in units
-            ],
         }
 
     @staticmethod
@@ -180,50 +340,67 @@ class ReportService:
         date_to: Optional[datetime] = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> dict:
-        query = db.query(Transfer).options(
-            selectinload(Transfer.dispatched_by),
-            selectinload(Transfer.received_by),
-            selectinload(Transfer.origin_location),
-            selectinload(Transfer.destination_location),
-        )
+        """Transfer summary plus one page of transfers, newest first.
 
+        The page is keyed on ``(dispatched_at, id)``: pass the previous page's
+        ``pagination.next_cursor`` as ``cursor`` to continue without an offset.
+        """
+        criteria = []
         if user_id:
-            query = query.filter(
+            criteria.append(
                 or_(Transfer.dispatched_by_id == user_id, Transfer.received_by_id == user_id)
             )
         if location_id:
-            query = query.filter(
+            criteria.append(
                 or_(
                     Transfer.origin_location_id == location_id,
                     Transfer.destination_location_id == location_id,
                 )
             )
         if date_from:
-            query = query.filter(Transfer.dispatched_at >= date_from)
+            criteria.append(Transfer.dispatched_at >= date_from)
         if date_to:
-            query = query.filter(Transfer.dispatched_at <= date_to)
-
-        total_transfers = query.count()
-        transfers = query.order_by(desc(Transfer.dispatched_at)).offset(skip).limit(limit).all()
-
-        by_status = db.query(
-            Transfer.status, func.count(Transfer.id).label("count")
-        ).group_by(Transfer.status).all()
-
-        by_month = db.query(
-            func.substr(cast(Transfer.dispatched_at, String), 1, 7).label("month"),
-            func.count(Transfer.id).label("count"),
-        ).group_by(func.substr(cast(Transfer.dispatched_at, String), 1, 7)) \
-         .order_by(func.substr(cast(Transfer.dispatched_at, String), 1, 7)).all()
+            criteria.append(Transfer.dispatched_at <= date_to)
+
+        # One grouped scan of the filtered transfers yields the total and both
+        # summaries; only the page itself needs a second query.
+        zone = get_zone()
+        month, month_start = bucket_expression(db, Transfer.dispatched_at, Granularity.MONTH, zone)
+        summary_rows = db.query(
+            Transfer.status, month, func.count(Transfer.id)
+        ).filter(*criteria).group_by(Transfer.status, month).all()
+
+        by_status: Counter = Counter()
+        by_month: Counter = Counter()
+        for status, bucket, count in summary_rows:
+            by_status[status.value] += count
+            if bucket is not None:
+                by_month[month_start(bucket)] += count
+        total_transfers = sum(by_status.values())
+
+        sort_key = [Transfer.dispatched_at, Transfer.id]
+        page = db.query(
+            *(getattr(Transfer, column) for column in TRANSFER_EXPORT_COLUMNS)
+        ).filter(*criteria)
+        if cursor:
+            page = page.filter(after_cursor(sort_key, cursor, descending=True))
+        transfers, next_cursor = cursor_page(
+            page.order_by(*(desc(column) for column in sort_key)).offset(skip).limit(limit + 1).all(),
+            limit,
+            lambda t: (t.dispatched_at, t.id),
+        )
 
         return {
             "total_transfers": total_transfers,
             "summary": {
-                "by_status": {item.status.value: item.count for item in by_status},
+                "by_status": dict(by_status),
                 "by_month": [
-                    {"month": item.month if item.month else None, "count": item.count}
-                    for item in by_month
+                    {"month": item["bucket"], "count": item["count"]}
+                    for item in fill_buckets(
+                        by_month, Granularity.MONTH, zone, date_from=date_from, date_to=date_to
+                    )
                 ],
             },
             "transfers": [
@@ -244,8 +421,10 @@ class ReportService:
                 "skip": skip,
                 "limit": limit,
                 "total": total_transfers,
-                "has_next": skip + limit < total_transfers,
-                "has_previous": skip > 0,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "has_next": next_cursor is not None,
+                "has_previous": skip > 0 or cursor is not None,
             },
         }
 
@@ -255,141 +434,444 @@ class ReportService:
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
         location_id: Optional[int] = None,
+        model: Optional[str] = None,
+        batch_period: Optional[str] = None,
     ) -> dict:
-        query = db.query(Unit).options(
-            selectinload(Unit.current_location)
-        ).filter(Unit.status == UnitStatus.SOLD)
-
-        if date_from:
-            query = query.filter(Unit.sold_date >= date_from)
-        if date_to:
-            query = query.filter(Unit.sold_date <= date_to)
-        if location_id:
-            sold_units_sub = db.query(Transfer.unit_id).filter(
-                or_(
-                    Transfer.origin_location_id == location_id,
-                    Transfer.destination_location_id == location_id,
-                )
-            ).subquery()
-            query = query.filter(Unit.id.in_(sold_units_sub))
-
-        sold_units = query.all()
+        criteria = ReportService._sales_criteria(
+            date_from=date_from, date_to=date_to, location_id=location_id,
+            model=model, batch_period=batch_period,
+        )
 
-        sales_by_month = {}
-        for unit in sold_units:
-            if unit.sold_date:
-                month_key = unit.sold_date.strftime("%Y-%m")
-                sales_by_month.setdefault(month_key, {"count": 0})
-                sales_by_month[month_key]["count"] += 1
+        # One grouped scan of the filtered sales yields every summary.
+        zone = get_zone()
+        month, month_start = bucket_expression(db, Sale.sold_at, Granularity.MONTH, zone)
+        summary_rows = db.query(
+            Sale.location_id, Location.name, Sale.model, Sale.batch_period, month,
+            func.count(Sale.id),
+        ).outerjoin(Location, Location.id == Sale.location_id) \
+         .filter(*criteria) \
+         .group_by(Sale.location_id, Location.name, Sale.model, Sale.batch_period, month).all()
+
+        by_location: Counter = Counter()
+        by_model: Counter = Counter()
+        by_batch_period: Counter = Counter()
+        by_month: Counter = Counter()
+        for sale_location_id, location_name, sale_model, period, bucket, count in summary_rows:
+            by_location[(sale_location_id, location_name)] += count
+            by_model[sale_model] += count
+            by_batch_period[period] += count
+            by_month[month_start(bucket)] += count
+
+        sales = ReportService._sales_query(db, criteria).all()
 
         return {
-            "total_sales": len(sold_units),
+            "total_sales": sum(by_model.values()),
             "summary": {
                 "by_month": [
-                    {"month": month, "count": data["count"]}
-                    for month, data in sorted(sales_by_month.items())
+                    {"month": item["bucket"], "count": item["count"]}
+                    for item in fill_buckets(
+                        by_month, Granularity.MONTH, zone, date_from=date_from, date_to=date_to
+                    )
+                ],
+                "by_location": [
+                    {"location_id": key[0], "location": key[1], "count": count}
+                    for key, count in by_location.most_common()
+                ],
+                "by_model": [
+                    {"model": key, "count": count} for key, count in by_model.most_common()
+                ],
+                "by_batch_period": [
+                    {"batch_period": key, "count": count}
+                    for key, count in by_batch_period.most_common()
                 ],
             },
             "sales": [
-                {
-                    "id": unit.id,
-                    "engine_number": unit.engine_number,
-                    "chassis_number": unit.chassis_number,
-                    "brand": unit.brand,
-                    "model": unit.model,
-                    "color": unit.color,
-                    "sold_date": unit.sold_date,
-                }
-                for unit in sold_units
+                {column: getattr(sale, column) for column in SALES_EXPORT_COLUMNS}
+                for sale in sales
             ],
         }
 
     @staticmethod
-    def _prepare_df_for_excel(df: pd.DataFrame) -> pd.DataFrame:
-        for col in df.columns:
-            if df[col].dtype.name.startswith("datetime"):
-                df[col] = df[col].apply(lambda x: x.replace(tzinfo=None) if pd.notna(x) and hasattr(x, 'tzinfo') and x.tzinfo is not None else x)
-        return df
+    def get_time_series(
+        db: Session,
+        metric: SeriesMetric = SeriesMetric.SALES,
+        granularity: Granularity = Granularity.MONTH,
+        tz: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> dict:
+        """Counts of sales (by ``sold_at``) or transfers (by ``dispatched_at``) per bucket."""
+        if metric is SeriesMetric.SALES:
+            column, criteria = Sale.sold_at, []
+        else:
+            column, criteria = Transfer.dispatched_at, []
+        series = bucket_counts(
+            db, column, granularity, tz=tz,
+            date_from=date_from, date_to=date_to, criteria=criteria,
+        )
+        return {
+            "metric": metric.value,
+            "granularity": granularity.value,
+            "timezone": get_zone(tz).key,
+            "series": series,
+        }
 
     @staticmethod
-    def export_inventory_excel(
+    def get_aging_report(
         db: Session,
-        brand: Optional[str] = None,
-        model: Optional[str] = None,
         location_id: Optional[int] = None,
-        status: Optional[UnitStatus] = None,
-    ) -> Response:
-        report_data = ReportService.get_inventory_report(
-            db, brand=brand, model=model, location_id=location_id, status=status
+        model: Optional[str] = None,
+        batch_period: Optional[str] = None,
+    ) -> dict:
+        """Aging buckets of the stock on hand and days-to-sell per model.
+
+        Two flat queries (units in stock with their last reception, sales with
+        their unit's arrival) feed the vectorized summaries in
+        ``app.services.inventory_aging``.
+        """
+        now = datetime.now(timezone.utc)
+        criteria = [Unit.status != UnitStatus.SOLD]
+        if location_id:
+            criteria.append(Unit.current_location_id == location_id)
+        if model:
+            criteria.append(Unit.model == model)
+        if batch_period:
+            criteria.append(Unit.batch_period == batch_period)
+
+        arrivals = (
+            db.query(Transfer.unit_id, func.max(Transfer.received_at).label("arrived_at"))
+            .filter(Transfer.received_at.isnot(None))
+            .group_by(Transfer.unit_id)
+            .subquery()
+        )
+        stock = (
+            db.query(
+                Unit.current_location_id,
+                Location.name,
+                Unit.model,
+                Unit.batch_period,
+                Unit.created_at,
+                arrivals.c.arrived_at,
+            )
+            .join(Location, Location.id == Unit.current_location_id)
+            .outerjoin(arrivals, arrivals.c.unit_id == Unit.id)
+            .filter(*criteria)
         )
 
-        df = ReportService._prepare_df_for_excel(pd.DataFrame(report_data["units"]))
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Inventory', index=False)
-
-            summary_data = []
-            for category, data in report_data["summary"].items():
-                for key, value in data.items():
-                    summary_data.append({"Category": category, "Item": key, "Count": value})
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-
-        output.seek(0)
-        filename = f"inventory_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        sales = (
+            db.query(Sale.model, Unit.created_at, Sale.sold_at)
+            .join(Unit, Unit.id == Sale.unit_id)
+            .filter(*ReportService._sales_criteria(
+                location_id=location_id, model=model, batch_period=batch_period,
+            ))
         )
 
+        return {
+            "as_of": now,
+            "buckets": AGING_BUCKETS,
+            **aging_summary(stock.yield_per(EXPORT_BATCH_SIZE), now),
+            "days_to_sell": days_to_sell_summary(sales.yield_per(EXPORT_BATCH_SIZE)),
+        }
+
     @staticmethod
-    def export_transfers_excel(
+    def get_route_analytics(
         db: Session,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-    ) -> Response:
-        report_data = ReportService.get_transfers_report(
-            db, date_from=date_from, date_to=date_to, limit=10000
-        )
+    ) -> dict:
+        """Origin × destination transfer volumes and transit-time percentiles.
+
+        One windowed scan of the non-cancelled transfers dispatched in the range:
+        ``count(*) OVER (PARTITION BY origin, destination)`` tags each row with
+        its route's volume and orders the busiest routes first; durations and
+        percentiles are computed in ``app.services.route_analytics``.
+        """
+        criteria = [
+            Transfer.origin_location_id.isnot(None),
+            Transfer.destination_location_id.isnot(None),
+            Transfer.status != TransferStatus.CANCELLED,
+        ]
+        if date_from:
+            criteria.append(Transfer.dispatched_at >= date_from)
+        if date_to:
+            criteria.append(Transfer.dispatched_at <= date_to)
+
+        route_transfers = func.count(Transfer.id).over(
+            partition_by=(Transfer.origin_location_id, Transfer.destination_location_id)
+        ).label("route_transfers")
+        rows = db.query(
+            Transfer.origin_location_id,
+            Transfer.destination_location_id,
+            Transfer.dispatched_at,
+            Transfer.received_at,
+            route_transfers,
+        ).filter(*criteria).order_by(desc(route_transfers), Transfer.dispatched_at)
+
+        names = dict(db.query(Location.id, Location.name).all())
+        routes = route_summary(rows.yield_per(EXPORT_BATCH_SIZE), names)
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "total_transfers": sum(route["transfers"] for route in routes),
+            "routes": routes,
+        }
 
-        df = ReportService._prepare_df_for_excel(pd.DataFrame(report_data["transfers"]))
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Transfers', index=False)
-
-        output.seek(0)
-        filename = f"transfers_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
+    @staticmethod
+    def get_cohort_report(
+        db: Session,
+        batch_period: Optional[str] = None,
+        product_type: Optional[str] = None,
+    ) -> dict:
+        """Per (batch_period, product_type) cohort: units, sold, sell-through and distribution.
+
+        ``by_location`` covers the cohort's units still in stock. One grouped
+        statement over the indexed batch columns yields every count; the cohorts
+        are rolled up from its rows in Python.
+        """
+        criteria = []
+        if batch_period:
+            criteria.append(Unit.batch_period == batch_period)
+        if product_type:
+            criteria.append(Unit.product_type == product_type)
+
+        rows = db.query(
+            Unit.batch_period,
+            Unit.product_type,
+            Location.name,
+            Unit.status,
+            func.count(Unit.id),
+        ).join(Location, Location.id == Unit.current_location_id) \
+         .filter(*criteria) \
+         .group_by(Unit.batch_period, Unit.product_type, Location.name, Unit.status).all()
+
+        cohorts: dict[tuple, dict] = {}
+        for cohort_batch, cohort_type, location, status, count in rows:
+            cohort = cohorts.setdefault((cohort_batch, cohort_type), {
+                "batch_period": cohort_batch,
+                "product_type": cohort_type,
+                "units": 0,
+                "sold": 0,
+                "by_status": Counter(),
+                "by_location": Counter(),
+            })
+            cohort["units"] += count
+            cohort["by_status"][status.value] += count
+            if status == UnitStatus.SOLD:
+                cohort["sold"] += count
+            else:
+                cohort["by_location"][location] += count
+
+        results = []
+        for key in sorted(cohorts, key=lambda k: (k[0] is None, k[0] or "", k[1] is None, k[1] or "")):
+            cohort = cohorts[key]
+            cohort["sell_through"] = round(100 * cohort["sold"] / cohort["units"], 1)
+            cohort["by_status"] = dict(cohort["by_status"])
+            cohort["by_location"] = dict(cohort["by_location"])
+            results.append(cohort)
+        return {"total_units": sum(c["units"] for c in results), "cohorts": results}
 
     @staticmethod
-    def export_sales_excel(
+    def get_pivot(
         db: Session,
+        dimensions: list[PivotDimension],
+        filters: Optional[dict[PivotDimension, list]] = None,
+    ) -> dict:
+        """Unit counts per combination of ``dimensions``, answered by the in-memory cube.
+
+        Costs one data-version check (plus a rebuild when another worker has
+        written since) and, with the location dimension, one name lookup.
+        """
+        filters = {dimension: values for dimension, values in (filters or {}).items() if values}
+        inventory_cube.ensure_fresh(db)
+        rows = inventory_cube.pivot(dimensions, filters)
+
+        if PivotDimension.LOCATION in dimensions:
+            names = dict(db.query(Location.id, Location.name).all())
+            for row in rows:
+                row["location_name"] = names.get(row["location"])
+
+        return {
+            "dimensions": [dimension.value for dimension in dimensions],
+            "filters": {dimension.value: values for dimension, values in filters.items()},
+            "total_units": sum(row["count"] for row in rows),
+            "rows": rows,
+        }
+
+    @staticmethod
+    def get_inventory_history(
+        db: Session,
+        model: Optional[str] = None,
+        location_id: Optional[int] = None,
+        status: Optional[UnitStatus] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> dict:
+        """End-of-day stock per day from ``inventory_snapshots`` (default: last 90 days).
+
+        Days without a snapshot are left out rather than reported as zero stock.
+        """
+        date_to = date_to or datetime.now(get_zone()).date()
+        date_from = date_from or date_to - timedelta(days=90)
+        criteria = [
+            InventorySnapshot.snapshot_date >= date_from,
+            InventorySnapshot.snapshot_date <= date_to,
+        ]
+        if model:
+            criteria.append(InventorySnapshot.model == model)
+        if location_id:
+            criteria.append(InventorySnapshot.location_id == location_id)
+        if status:
+            criteria.append(InventorySnapshot.status == status)
+
+        rows = (
+            db.query(
+                InventorySnapshot.snapshot_date,
+                InventorySnapshot.status,
+                func.sum(InventorySnapshot.count),
+            )
+            .filter(*criteria)
+            .group_by(InventorySnapshot.snapshot_date, InventorySnapshot.status)
+            .order_by(InventorySnapshot.snapshot_date)
+            .all()
+        )
+        series: dict[date, dict] = {}
+        for day, row_status, count in rows:
+            point = series.setdefault(day, {"date": day, "count": 0, "by_status": {}})
+            point["count"] += count
+            point["by_status"][row_status.value] = count
+
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "filters": {"model": model, "location_id": location_id, "status": status},
+            "series": list(series.values()),
+        }
+
+    @staticmethod
+    def _month_key(value: datetime, zone) -> str:
+        return bucket_label(bucket_of(value, Granularity.MONTH, zone), Granularity.MONTH)
+
+    @staticmethod
+    def _sales_criteria(
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
         location_id: Optional[int] = None,
-    ) -> Response:
-        report_data = ReportService.get_sales_report(
-            db, date_from=date_from, date_to=date_to, location_id=location_id
+        model: Optional[str] = None,
+        batch_period: Optional[str] = None,
+    ) -> list:
+        criteria = []
+        if date_from:
+            criteria.append(Sale.sold_at >= date_from)
+        if date_to:
+            criteria.append(Sale.sold_at <= date_to)
+        if location_id:
+            criteria.append(Sale.location_id == location_id)
+        if model:
+            criteria.append(Sale.model == model)
+        if batch_period:
+            criteria.append(Sale.batch_period == batch_period)
+        return criteria
+
+    @staticmethod
+    def _sales_query(db: Session, criteria: list):
+        """Column projection of the sales fact rows, shared by the sales report and its export."""
+        return db.query(
+            Unit.id,
+            Unit.engine_number,
+            Unit.chassis_number,
+            Unit.brand,
+            Sale.model,
+            Unit.color,
+            Location.name.label("location"),
+            Sale.batch_period,
+            Sale.sold_at.label("sold_date"),
+        ).join(Unit, Unit.id == Sale.unit_id) \
+         .outerjoin(Location, Location.id == Sale.location_id) \
+         .filter(*criteria).order_by(Sale.sold_at, Sale.id)
+
+    @staticmethod
+    def export_inventory(
+        db: Session,
+        brand: Optional[str] = None,
+        model: Optional[str] = None,
+        location_id: Optional[int] = None,
+        status: Optional[UnitStatus] = None,
+        fmt: ExportFormat = ExportFormat.XLSX,
+        compress: bool = False,
+    ) -> StreamingResponse:
+        criteria = ReportService._inventory_criteria(
+            brand=brand, model=model, location_id=location_id, status=status
         )
+        if fmt is not ExportFormat.XLSX:
+            query = ReportService._inventory_units_query(db, criteria)
+            return table_response(db, query, fmt, "inventory_report", compress)
+
+        def sheets():
+            rows = ReportService._inventory_units_query(db, criteria).yield_per(EXPORT_BATCH_SIZE)
+            yield "Inventory", INVENTORY_EXPORT_COLUMNS, rows
+            summary = ReportService._inventory_summary(db, criteria)
+            yield "Summary", ["Category", "Item", "Count"], (
+                (category, key, value)
+                for category, data in summary.items()
+                for key, value in data.items()
+            )
+
+        return xlsx_response(sheets(), "inventory_report", compress)
+
+    @staticmethod
+    def export_transfers(
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        fmt: ExportFormat = ExportFormat.XLSX,
+        compress: bool = False,
+    ) -> StreamingResponse:
+        query = db.query(*(getattr(Transfer, column) for column in TRANSFER_EXPORT_COLUMNS))
+        if date_from:
+            query = query.filter(Transfer.dispatched_at >= date_from)
+        if date_to:
+            query = query.filter(Transfer.dispatched_at <= date_to)
+        query = query.order_by(desc(Transfer.dispatched_at))
+        if fmt is not ExportFormat.XLSX:
+            return table_response(db, query, fmt, "transfers_report", compress)
 
-        df = ReportService._prepare_df_for_excel(pd.DataFrame(report_data["sales"]))
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Sales', index=False)
-
-            summary_data = []
-            for item in report_data["summary"]["by_month"]:
-                summary_data.append({"Month": item["month"], "Count": item["count"]})
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-
-        output.seek(0)
-        filename = f"sales_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        def sheets():
+            yield "Transfers", TRANSFER_EXPORT_COLUMNS, query.yield_per(EXPORT_BATCH_SIZE)
+
+        return xlsx_response(sheets(), "transfers_report", compress)
+
+    @staticmethod
+    def export_sales(
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        location_id: Optional[int] = None,
+        model: Optional[str] = None,
+        batch_period: Optional[str] = None,
+        fmt: ExportFormat = ExportFormat.XLSX,
+        compress: bool = False,
+    ) -> StreamingResponse:
+        criteria = ReportService._sales_criteria(
+            date_from=date_from, date_to=date_to, location_id=location_id,
+            model=model, batch_period=batch_period,
         )
+        query = ReportService._sales_query(db, criteria)
+        if fmt is not ExportFormat.XLSX:
+            return table_response(db, query, fmt, "sales_report", compress)
+
+        def sheets():
+            # The monthly summary is tallied while the sales rows stream past.
+            by_month: dict[str, int] = {}
+            zone = get_zone()
+
+            def sales_rows():
+                for row in query.yield_per(EXPORT_BATCH_SIZE):
+                    if row.sold_date:
+                        month = ReportService._month_key(row.sold_date, zone)
+                        by_month[month] = by_month.get(month, 0) + 1
+                    yield row
+
+            yield "Sales", SALES_EXPORT_COLUMNS, sales_rows()
+            yield "Summary", ["Month", "Count"], sorted(by_month.items())
+
+        return xlsx_response(sheets(), "sales_report", compress)
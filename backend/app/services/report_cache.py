@@ -0,0 +1,87 @@
+"""Versioned report cache with strong ETags and conditional GET.
+
+A report response is identified by its endpoint, its normalized query
+parameters, the inventory data version (``app.core.cache``) and the current day
+in the report timezone (some reports are relative to "now"). That identity is
+hashed into a strong ``ETag``:
+
+* ``If-None-Match`` matching it is answered with ``304`` after a single version
+  lookup, without building or serializing the report.
+* Otherwise the serialized JSON body is served from ``report_cache`` or built,
+  stored and served. Entries for older versions are never hit again and age out
+  after ``REPORT_CACHE_TTL_SECONDS`` (default 300s, ``0`` disables the cache).
+
+The version is read before the report is built, so a write racing the build can
+only make a cached body newer than its version, never older.
+"""
+
+import enum
+import hashlib
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Mapping
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, current_data_version
+from app.services.timeseries import get_zone
+
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))
+
+report_cache = TTLCache(ttl_seconds=REPORT_CACHE_TTL_SECONDS, maxsize=512)
+
+# Clients must revalidate every time; the ETag makes that a cheap 304.
+_CACHE_CONTROL = "private, no-cache"
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def normalize_params(params: Mapping[str, Any]) -> tuple:
+    """Order-independent, hashable form of the filters; unset ones are dropped."""
+    return tuple(sorted(
+        (name, _normalize(value)) for name, value in params.items() if value is not None
+    ))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cached_report(
+    request: Request,
+    db: Session,
+    endpoint: str,
+    params: Mapping[str, Any],
+    build: Callable[[], Any],
+) -> Response:
+    """Serve ``build()`` as JSON through the versioned cache, honoring ``If-None-Match``."""
+    key = (
+        endpoint,
+        normalize_params(params),
+        current_data_version(db),
+        datetime.now(get_zone()).date().isoformat(),
+    )
+    etag = '"' + hashlib.sha256(repr(key).encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = report_cache.get(key)
+    if body is None:
+        body = JSONResponse(jsonable_encoder(build())).body
+        report_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
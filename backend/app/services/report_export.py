@@ -0,0 +1,300 @@
+"""Streaming report exports.
+
+Exports are produced row by row: the rows come from a server-side cursor
+(``Query.yield_per``) and are encoded as they arrive, so memory stays flat no
+matter how many rows are exported. Everything runs inside the response body
+iterator; the response headers go out straight away, before the query has run.
+
+* ``xlsx`` goes into a write-only openpyxl workbook. Sheets are supplied lazily
+  as ``(title, header, rows)`` tuples, so a workbook can carry summary sheets.
+* ``csv`` and ``ndjson`` are encoded line by line. On PostgreSQL, CSV is
+  produced by the server itself with ``COPY (...) TO STDOUT``.
+* ``parquet`` is written in row groups of ``EXPORT_BATCH_SIZE`` rows and needs
+  the optional ``pyarrow`` package (``pip install thunderrol-api[parquet]``).
+
+xlsx and parquet files end with a directory/footer, so they are spooled to a
+temporary file and streamed back once complete. Any format can additionally be
+gzip-compressed on the fly.
+"""
+
+import csv
+import enum
+import io
+import json
+import queue
+import tempfile
+import threading
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Iterable, Iterator, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric
+from sqlalchemy.orm import Query, Session
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rows fetched per round trip from the server-side cursor.
+EXPORT_BATCH_SIZE = 1000
+_CHUNK_SIZE = 64 * 1024
+
+Sheet = tuple[str, Sequence[str], Iterable[Sequence[Any]]]
+
+
+class ExportFormat(str, enum.Enum):
+    XLSX = "xlsx"
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
+_MEDIA_TYPES = {
+    ExportFormat.XLSX: XLSX_MEDIA_TYPE,
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def excel_value(value: Any) -> Any:
+    """Convert a DB value into something openpyxl can write.
+
+    Excel has no timezone support, so aware datetimes keep their wall-clock
+    time and drop the offset; enums are written as their value.
+    """
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def text_value(value: Any) -> Any:
+    """Convert a DB value for the text formats (CSV and NDJSON)."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _iter_file(output) -> Iterator[bytes]:
+    output.seek(0)
+    while chunk := output.read(_CHUNK_SIZE):
+        yield chunk
+
+
+def iter_xlsx(sheets: Iterable[Sheet]) -> Iterator[bytes]:
+    """Build a workbook from ``sheets`` in constant memory and yield its bytes."""
+    workbook = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.append(list(header))
+        for row in rows:
+            sheet.append([excel_value(value) for value in row])
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        yield from _iter_file(output)
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([text_value(value) for value in row])
+        if buffer.tell() >= _CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    lines: list[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(
+            {name: text_value(value) for name, value in zip(header, row, strict=True)},
+            ensure_ascii=False,
+        )
+        lines.append(line)
+        size += len(line) + 1
+        if size >= _CHUNK_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines, size = [], 0
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _arrow_type(column_type):
+    import pyarrow as pa
+
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_value(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def iter_parquet(query: Query) -> Iterator[bytes]:
+    """Write ``query`` to Parquet, one row group per fetched batch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column["name"], _arrow_type(column["type"]))
+        for column in query.column_descriptions
+    ])
+    rows = iter(query.yield_per(EXPORT_BATCH_SIZE))
+    with tempfile.TemporaryFile() as output:
+        with pq.ParquetWriter(output, schema) as writer:
+            while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+                columns = zip(*batch, strict=True)
+                writer.write_batch(pa.record_batch(
+                    [
+                        pa.array([_arrow_value(v) for v in values], type=field.type)
+                        for field, values in zip(schema, columns, strict=True)
+                    ],
+                    schema=schema,
+                ))
+        yield from _iter_file(output)
+
+
+class _QueueWriter:
+    """File-like sink handing ``COPY`` output to the consuming generator."""
+
+    def __init__(self, chunks: queue.Queue, stop: threading.Event):
+        self.chunks = chunks
+        self.stop = stop
+
+    def write(self, data) -> None:
+        while not self.stop.is_set():
+            try:
+                self.chunks.put(data, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("export cancelled")
+
+
+def iter_copy_csv(db: Session, query: Query) -> Iterator[bytes]:
+    """Stream ``query`` as CSV produced by PostgreSQL's ``COPY ... TO STDOUT``.
+
+    psycopg2's ``copy_expert`` pushes data into a file object and only returns
+    once the copy is done, so it runs in a worker thread feeding a bounded queue
+    that this generator drains; a slow client therefore throttles the copy
+    rather than buffering it.
+    """
+    connection = db.connection()
+    sql = query.statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    copy_sql = f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    raw_connection = connection.connection.driver_connection
+
+    chunks: queue.Queue = queue.Queue(maxsize=16)
+    stop = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        try:
+            with raw_connection.cursor() as cursor:
+                cursor.copy_expert(copy_sql, _QueueWriter(chunks, stop))
+        except BaseException as exc:  # handed to the consumer
+            chunks.put(exc)
+        else:
+            chunks.put(done)
+
+    worker = threading.Thread(target=produce, name="export-copy", daemon=True)
+    worker.start()
+    try:
+        while (item := chunks.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield bytes(item)
+    finally:
+        stop.set()
+        while worker.is_alive():
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.1)
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def export_filename(prefix: str, extension: str) -> str:
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+def stream_response(
+    chunks: Iterable[bytes],
+    fmt: ExportFormat,
+    filename_prefix: str,
+    compress: bool = False,
+) -> StreamingResponse:
+    filename = export_filename(filename_prefix, fmt.value)
+    media_type = _MEDIA_TYPES[fmt]
+    if compress:
+        chunks = iter_gzip(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def xlsx_response(
+    sheets: Iterable[Sheet], filename_prefix: str, compress: bool = False
+) -> StreamingResponse:
+    return stream_response(iter_xlsx(sheets), ExportFormat.XLSX, filename_prefix, compress)
+
+
+def table_response(
+    db: Session,
+    query: Query,
+    fmt: ExportFormat,
+    filename_prefix: str,
+    compress: bool = False,
+) -> StreamingResponse:
+    """Stream a single-table export of ``query`` in ``fmt`` (anything but xlsx)."""
+    header = [column["name"] for column in query.column_descriptions]
+    if fmt is ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=400,
+                detail="Parquet export requires the optional 'pyarrow' package",
+            ) from None
+        chunks = iter_parquet(query)
+    elif fmt is ExportFormat.CSV and db.get_bind().dialect.name == "postgresql":
+        chunks = iter_copy_csv(db, query)
+    elif fmt is ExportFormat.CSV:
+        chunks = iter_csv(header, query.yield_per(EXPORT_BATCH_SIZE))
+    else:
+        chunks = iter_ndjson(header, query.yield_per(EXPORT_BATCH_SIZE))
+    return stream_response(chunks, fmt, filename_prefix, compress)
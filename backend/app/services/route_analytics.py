@@ -0,0 +1,66 @@
+"""Transfer route analytics: origin × destination flows and transit times.
+
+The report query returns one flat row per transfer, already tagged with its
+route's volume by a window function. The durations and per-route percentiles
+are then computed column-wise in pandas. Transit time is
+``received_at - dispatched_at`` in hours, so transfers still on the road count
+towards volume but not towards the percentiles.
+"""
+
+from typing import Iterable
+
+import pandas as pd
+
+ROUTE_COLUMNS = [
+    "origin_location_id", "destination_location_id", "dispatched_at", "received_at",
+    "route_transfers",
+]
+
+
+def _hours(value) -> float | None:
+    return None if pd.isna(value) else round(float(value), 2)
+
+
+def route_summary(rows: Iterable, names: dict[int, str]) -> list[dict]:
+    """Per-route volume and transit-time distribution, busiest route first."""
+    frame = pd.DataFrame(list(rows), columns=ROUTE_COLUMNS)
+    if frame.empty:
+        return []
+
+    dispatched = pd.to_datetime(frame["dispatched_at"], utc=True)
+    received = pd.to_datetime(frame["received_at"], utc=True)
+    frame["transit_hours"] = (received - dispatched).dt.total_seconds() / 3600
+    frame["received"] = received.notna()
+
+    route = ["origin_location_id", "destination_location_id"]
+    grouped = frame.groupby(route, sort=False)
+    stats = grouped.agg(
+        transfers=("route_transfers", "first"),
+        received=("received", "sum"),
+        mean=("transit_hours", "mean"),
+        max=("transit_hours", "max"),
+    )
+    percentiles = grouped["transit_hours"].quantile([0.5, 0.95]).unstack()
+    table = stats.join(percentiles).reset_index().sort_values(
+        ["transfers", "origin_location_id", "destination_location_id"],
+        ascending=[False, True, True],
+    )
+
+    return [
+        {
+            "origin_location_id": int(record["origin_location_id"]),
+            "origin_location": names.get(record["origin_location_id"]),
+            "destination_location_id": int(record["destination_location_id"]),
+            "destination_location": names.get(record["destination_location_id"]),
+            "transfers": int(record["transfers"]),
+            "received": int(record["received"]),
+            "in_transit": int(record["transfers"] - record["received"]),
+            "transit_hours": {
+                "p50": _hours(record[0.5]),
+                "p95": _hours(record[0.95]),
+                "mean": _hours(record["mean"]),
+                "max": _hours(record["max"]),
+            },
+        }
+        for record in table.to_dict("records")
+    ]
@@ -0,0 +1,63 @@
+"""Maintenance of the ``sales`` fact table.
+
+A ``Sale`` row is attached to a unit in the flush where the unit becomes
+``SOLD``, whether it is created sold, marked sold through the unit API or sold
+through a transfer. It records the unit's location, model and batch period at
+that moment, and ``sold_at`` (the unit's ``sold_date``, or the flush time when
+none was set). If the unit later leaves ``SOLD`` the row is removed; correcting
+``sold_date`` on a sold unit updates ``sold_at``.
+
+Like ``inventory_counters``, this relies on unit writes going through the ORM.
+"""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes
+
+from app.models.models import Sale, Unit, UnitStatus
+
+
+def _was_sold(unit: Unit) -> bool:
+    history = attributes.get_history(unit, "status")
+    previous = history.deleted or history.unchanged
+    return bool(previous) and previous[0] == UnitStatus.SOLD
+
+
+def _record_sale(unit: Unit) -> None:
+    sold_at = unit.sold_date or datetime.now(UTC)
+    if unit.sale is None:
+        unit.sale = Sale(
+            location_id=unit.current_location_id,
+            model=unit.model,
+            batch_period=unit.batch_period,
+            sold_at=sold_at,
+        )
+    else:
+        unit.sale.sold_at = sold_at
+
+
+def sync_sale(unit: Unit, sold_before: bool, sold_date_changed: bool = False) -> None:
+    """Attach, update or drop ``unit``'s sale after a write of its status.
+
+    The flush calls it for every unit it writes; ``UnitRepository.update_units``
+    calls it for the units it writes outside the flush.
+    """
+    sold_now = unit.status == UnitStatus.SOLD
+    if sold_now and not sold_before:
+        _record_sale(unit)
+    elif sold_before and not sold_now:
+        unit.sale = None
+    elif sold_now and unit.sold_date and sold_date_changed:
+        _record_sale(unit)
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_sales(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new):
+        if isinstance(obj, Unit) and obj.status == UnitStatus.SOLD:
+            _record_sale(obj)
+    for obj in list(session.dirty):
+        if not isinstance(obj, Unit) or not session.is_modified(obj):
+            continue
+        sync_sale(obj, _was_sold(obj), attributes.get_history(obj, "sold_date").has_changes())
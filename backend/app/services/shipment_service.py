@@ -0,0 +1,197 @@
+"""Shipments: dispatch and receive a truckload of units in one call each."""
+
+from datetime import datetime, UTC
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.concurrency import compare_and_set, snapshot
+from app.database.database import unit_of_work
+from app.models.models import (
+    Shipment,
+    ShipmentItem,
+    ShipmentStatus,
+    TransferStatus,
+    Unit,
+    UnitStatus,
+)
+from app.repositories.location_repository import LocationRepository
+from app.repositories.shipment_repository import ShipmentRepository
+from app.repositories.transfer_repository import TransferRepository
+from app.repositories.unit_repository import UnitRepository
+from app.schemas.shipment import Shipment as ShipmentSchema
+from app.schemas.shipment import ShipmentCreate, ShipmentFilters, ShipmentReceive
+from app.services.unit_service import UnitService
+
+
+class ShipmentService:
+    """Service for shipment operations.
+
+    Units and transfers are written with one compare-and-set UPDATE each
+    (``UnitRepository.update_units`` keeps inventory_counters and the unit indexes
+    in step); the per-unit transfer and manifest rows are inserted with one
+    executemany each, and every call commits once.
+    """
+
+    @staticmethod
+    def get_shipments(
+        db: Session, filters: ShipmentFilters, limit: int, cursor: str | None = None
+    ) -> list[Shipment]:
+        return ShipmentRepository.get_shipments(db, filters, limit, cursor)
+
+    @staticmethod
+    def get_shipment(db: Session, shipment_id: int) -> Shipment:
+        shipment = ShipmentRepository.get_shipment(db, shipment_id)
+        if not shipment:
+            raise HTTPException(status_code=404, detail="Shipment not found")
+        return shipment
+
+    @staticmethod
+    def _rejected(message: str, errors: list[dict]) -> HTTPException:
+        return HTTPException(status_code=400, detail={"message": message, "errors": errors})
+
+    @staticmethod
+    def _unit_error(unit: Unit, origin_location_id: int | None) -> str | None:
+        if unit.status == UnitStatus.IN_TRANSIT:
+            return "Unit is already in transit"
+        if unit.status == UnitStatus.SOLD:
+            return "Unit has been sold"
+        if origin_location_id and unit.current_location_id != origin_location_id:
+            return "Unit is not at the origin location"
+        return None
+
+    @staticmethod
+    def dispatch_shipment(db: Session, data: ShipmentCreate, user_id: int) -> Shipment:
+        """Put every selected unit in transit under one shipment, or none of them."""
+        locations = LocationRepository.get_existing_ids(
+            db, [data.destination_location_id, data.origin_location_id]
+        )
+        if data.destination_location_id not in locations:
+            raise HTTPException(status_code=404, detail="Destination location not found")
+        if data.origin_location_id and data.origin_location_id not in locations:
+            raise HTTPException(status_code=404, detail="Origin location not found")
+
+        units, errors, seen = [], [], set()
+        for key, unit in UnitService.select_units(db, data):
+            if unit is None:
+                error = "Unit not found"
+            elif unit.id in seen:
+                error = "Unit selected more than once"
+            else:
+                seen.add(unit.id)
+                units.append(unit)
+                error = ShipmentService._unit_error(unit, data.origin_location_id)
+            if error:
+                errors.append({"key": key, "unit_id": unit.id if unit else None, "error": error})
+        if errors:
+            raise ShipmentService._rejected("Shipment cannot be dispatched", errors)
+
+        origin_location_id = data.origin_location_id
+        if origin_location_id is None:
+            origins = {unit.current_location_id for unit in units}
+            if len(origins) > 1:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Units are at different locations; pass origin_location_id",
+                )
+            origin_location_id = origins.pop()
+        if origin_location_id == data.destination_location_id:
+            raise HTTPException(status_code=400, detail="Origin and destination locations must be different")
+
+        now = datetime.now(UTC)
+        # A unit written concurrently surfaces as StaleDataError -> 409 (app.main).
+        with unit_of_work(db):
+            shipment = ShipmentRepository.create_shipment(
+                db,
+                origin_location_id=origin_location_id,
+                destination_location_id=data.destination_location_id,
+                status=ShipmentStatus.IN_TRANSIT,
+                dispatched_by_id=user_id,
+                dispatched_at=now,
+                notes=data.notes,
+            )
+            shipment_id = shipment.id
+            UnitRepository.update_units(db, units, status=UnitStatus.IN_TRANSIT)
+            transfer_ids = TransferRepository.add_unit_transfers(db, [
+                {
+                    "unit_id": unit.id,
+                    "dispatched_by_id": user_id,
+                    "origin_location_id": origin_location_id,
+                    "destination_location_id": data.destination_location_id,
+                    "status": TransferStatus.IN_TRANSIT,
+                    "dispatched_at": now,
+                }
+                for unit in units
+            ])
+            ShipmentRepository.add_items(db, [
+                {"shipment_id": shipment_id, "unit_id": unit.id, "transfer_id": transfer_ids[unit.id]}
+                for unit in units
+            ])
+        return ShipmentRepository.get_shipment(db, shipment_id)
+
+    @staticmethod
+    def _select_items(items: list[ShipmentItem], data: ShipmentReceive) -> list[ShipmentItem]:
+        """The manifest items named by ``data`` (all of them when it names none)."""
+        if not data.unit_ids and not data.identifiers:
+            return items
+        by_id = {item.unit_id: item for item in items}
+        by_identifier = {
+            identifier: item
+            for item in items
+            for identifier in (item.unit.engine_number, item.unit.chassis_number)
+            if identifier
+        }
+        selected, errors = {}, []
+        for key, item in (
+            *((str(unit_id), by_id.get(unit_id)) for unit_id in data.unit_ids),
+            *((identifier, by_identifier.get(identifier)) for identifier in data.identifiers),
+        ):
+            if item is None:
+                errors.append({"key": key, "unit_id": None, "error": "Unit is not on this shipment"})
+            else:
+                selected[item.id] = item
+        if errors:
+            raise ShipmentService._rejected("Shipment cannot be received", errors)
+        return list(selected.values())
+
+    @staticmethod
+    def receive_shipment(
+        db: Session, shipment_id: int, data: ShipmentReceive, user_id: int
+    ) -> Shipment:
+        """Receive the whole shipment or the scanned units; items already received are skipped.
+
+        The shipment row is locked first, so concurrent receipts of one shipment
+        take turns, and its status is decided by the items left in the database.
+        """
+        shipment = ShipmentRepository.lock_shipment(db, shipment_id)
+        if not shipment:
+            raise HTTPException(status_code=404, detail="Shipment not found")
+        if shipment.status == ShipmentStatus.RECEIVED:
+            raise HTTPException(status_code=400, detail="Shipment has already been received")
+
+        items = ShipmentRepository.get_items_for_receipt(db, shipment_id)
+        selected = ShipmentService._select_items(items, data)
+
+        def current() -> dict | None:
+            return snapshot(ShipmentSchema, ShipmentRepository.get_shipment(db, shipment_id))
+
+        now = datetime.now(UTC)
+        with compare_and_set(db, current):
+            arriving = [item for item in selected if item.received_at is None]
+            for item in arriving:
+                item.received_at, item.received_by_id = now, user_id
+            TransferRepository.update_transfers(
+                db, [item.transfer for item in arriving],
+                status=TransferStatus.RECEIVED, received_at=now, received_by_id=user_id,
+            )
+            UnitRepository.update_units(
+                db, [item.unit for item in arriving],
+                status=UnitStatus.AVAILABLE,
+                current_location_id=shipment.destination_location_id,
+            )
+            db.flush()
+            if ShipmentRepository.count_pending_items(db, shipment_id) == 0:
+                shipment.status, shipment.received_at = ShipmentStatus.RECEIVED, now
+            else:
+                shipment.status = ShipmentStatus.PARTIALLY_RECEIVED
+        return ShipmentRepository.get_shipment(db, shipment_id)
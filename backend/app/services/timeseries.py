@@ -0,0 +1,165 @@
+"""Time bucketing for report time series.
+
+Counts rows per day, week (ISO, starting Monday), month or quarter of a
+timestamp column, in a given IANA timezone (``REPORT_TIMEZONE``, default
+America/Mexico_City). The range filter is applied to the raw column so the
+``sold_date``/``dispatched_at`` indexes are used, and buckets with no rows are
+filled with zero so charts get a continuous axis.
+
+* PostgreSQL groups by ``date_trunc(<granularity>, timezone(<tz>, column))``.
+* SQLite has no timezone support, so it groups by UTC hour in SQL and folds the
+  hours into local buckets in Python (exact for whole-hour UTC offsets).
+"""
+
+import enum
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+REPORT_TIMEZONE = os.getenv("REPORT_TIMEZONE", "America/Mexico_City")
+
+
+class Granularity(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+
+
+def get_zone(name: Optional[str] = None) -> ZoneInfo:
+    name = name or REPORT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {name}") from None
+
+
+def truncate(day: date, granularity: Granularity) -> date:
+    """First day of the bucket containing ``day``."""
+    if granularity is Granularity.DAY:
+        return day
+    if granularity is Granularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity is Granularity.MONTH:
+        return day.replace(day=1)
+    return day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+
+
+def next_bucket(start: date, granularity: Granularity) -> date:
+    if granularity is Granularity.DAY:
+        return start + timedelta(days=1)
+    if granularity is Granularity.WEEK:
+        return start + timedelta(days=7)
+    months = 1 if granularity is Granularity.MONTH else 3
+    year, month = divmod(start.month - 1 + months, 12)
+    return start.replace(year=start.year + year, month=month + 1)
+
+
+def bucket_range(first: date, last: date, granularity: Granularity) -> Iterator[date]:
+    start = first
+    while start <= last:
+        yield start
+        start = next_bucket(start, granularity)
+
+
+def bucket_label(start: date, granularity: Granularity) -> str:
+    """``YYYY-MM-DD`` for days and weeks, ``YYYY-MM`` for months, ``YYYY-Qn`` for quarters."""
+    if granularity is Granularity.MONTH:
+        return start.strftime("%Y-%m")
+    if granularity is Granularity.QUARTER:
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return start.isoformat()
+
+
+def bucket_of(value: datetime, granularity: Granularity, zone: ZoneInfo) -> date:
+    """Bucket of a timestamp in ``zone``; naive values are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return truncate(value.astimezone(zone).date(), granularity)
+
+
+def bucket_expression(
+    db: Session, column, granularity: Granularity, zone: ZoneInfo
+) -> tuple[Any, Callable[[Any], date]]:
+    """SQL expression to group ``column`` by, plus a function mapping its values to buckets.
+
+    The expression can be combined with other GROUP BY columns; several of its
+    values may map to the same bucket (SQLite groups by hour), so callers must
+    sum counts per bucket.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        expression = func.date_trunc(granularity.value, func.timezone(zone.key, column))
+        return expression, lambda value: value.date()
+
+    expression = func.strftime("%Y-%m-%d %H:00:00", column)
+    return expression, lambda value: bucket_of(datetime.fromisoformat(value), granularity, zone)
+
+
+def fill_buckets(
+    counts: Mapping[date, int],
+    granularity: Granularity,
+    zone: ZoneInfo,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> list[dict]:
+    """Turn per-bucket ``counts`` into a series with every bucket in the range.
+
+    The range runs from ``date_from`` (or the first bucket) up to ``date_to``
+    (or the last bucket; now, for an open-ended range).
+    """
+    starts = sorted(counts)
+    if starts or date_from:
+        first = bucket_of(date_from, granularity, zone) if date_from else starts[0]
+        if date_to:
+            last = bucket_of(date_to, granularity, zone)
+        elif date_from:
+            last = max([*starts, bucket_of(datetime.now(timezone.utc), granularity, zone)])
+        else:
+            last = starts[-1]
+        starts = list(bucket_range(first, last, granularity))
+    return [
+        {"bucket": bucket_label(start, granularity), "start": start, "count": counts.get(start, 0)}
+        for start in starts
+    ]
+
+
+def bucket_counts(
+    db: Session,
+    column,
+    granularity: Granularity = Granularity.MONTH,
+    tz: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    criteria: Iterable = (),
+    fill: bool = True,
+) -> list[dict]:
+    """Row counts per bucket of ``column``, oldest first.
+
+    Returns ``[{"bucket": label, "start": date, "count": n}, ...]``, with empty
+    buckets included unless ``fill`` is false.
+    """
+    zone = get_zone(tz)
+    criteria = [column.isnot(None), *criteria]
+    if date_from:
+        criteria.append(column >= date_from)
+    if date_to:
+        criteria.append(column <= date_to)
+
+    bucket, to_start = bucket_expression(db, column, granularity, zone)
+    rows = db.query(bucket, func.count()).filter(*criteria).group_by(bucket).all()
+    counts: Counter = Counter()
+    for value, count in rows:
+        counts[to_start(value)] += count
+
+    if not fill:
+        return [
+            {"bucket": bucket_label(start, granularity), "start": start, "count": counts[start]}
+            for start in sorted(counts)
+        ]
+    return fill_buckets(counts, granularity, zone, date_from=date_from, date_to=date_to)
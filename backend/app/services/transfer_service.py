@@ -2,20 +2,33 @@ from datetime import datetime, UTC
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.models.models import Transfer, TransferStatus, Unit, UnitStatus
+from app.core.cache import stats_cache
+from app.core.concurrency import check_version, claim, compare_and_set, snapshot
+from app.models.models import Location, Transfer, TransferStatus, Unit, UnitStatus, User
 from app.models.schemas import TransferCreate as UnitTransferCreate
-from app.repositories.location_repository import LocationRepository
 from app.repositories.transfer_repository import TransferRepository
 from app.repositories.unit_repository import UnitRepository
-from app.repositories.user_repository import UserRepository
+from app.schemas.transfer import Transfer as TransferSchema
 from app.schemas.transfer import TransferCreate, TransferFilters, TransferUpdate, TransferStats
+from app.schemas.unit import Unit as UnitSchema
+
+# Referencing field, referenced model and the 404 detail, in the order they are reported.
+RELATIONS = (
+    ("unit_id", Unit, "Unit not found"),
+    ("dispatched_by_id", User, "Dispatching user not found"),
+    ("received_by_id", User, "Receiving user not found"),
+    ("origin_location_id", Location, "Origin location not found"),
+    ("destination_location_id", Location, "Destination location not found"),
+)
 
 
 class TransferService:
 
     @staticmethod
-    def get_transfers(db: Session, filters: TransferFilters, skip: int, limit: int) -> list[Transfer]:
-        return TransferRepository.get_transfers(db, filters, skip, limit)
+    def get_transfers(
+        db: Session, filters: TransferFilters, skip: int, limit: int, cursor: str | None = None
+    ) -> list[dict]:
+        return TransferRepository.get_transfers(db, filters, skip, limit, cursor)
 
     @staticmethod
     def get_transfer_by_id(db: Session, transfer_id: int) -> Transfer:
@@ -31,13 +44,16 @@ class TransferService:
         if payload.status == TransferStatus.RECEIVED and payload.received_at is None:
             payload.received_at = datetime.now(UTC)
 
-        # Update unit status based on transfer
-        unit = UnitRepository.get_unit(db, transfer_data.unit_id)
-        if unit and transfer_data.destination_location_id:
-            unit.status = UnitStatus.IN_TRANSIT
-            db.commit()
+        def current() -> dict | None:
+            return snapshot(UnitSchema, UnitRepository.get_unit(db, transfer_data.unit_id))
 
-        return TransferRepository.create_transfer(db, payload)
+        with compare_and_set(db, current):
+            # Claim the unit so a concurrent transfer of it conflicts.
+            unit = UnitRepository.get_unit(db, transfer_data.unit_id)
+            claim(unit)
+            if transfer_data.destination_location_id:
+                unit.status = UnitStatus.IN_TRANSIT
+            return TransferRepository.create_transfer(db, payload)
 
     @staticmethod
     def transfer_unit_with_status_update(
@@ -63,29 +79,29 @@ class TransferService:
         if from_location_id and to_location_id and from_location_id == to_location_id:
             raise HTTPException(status_code=400, detail="Origin and destination locations must be different")
 
-        if to_location_id is not None:
-            transfer_status = TransferStatus.IN_TRANSIT
-            unit.status = UnitStatus.IN_TRANSIT
-        else:
-            transfer_status = TransferStatus.RECEIVED
-            unit.status = UnitStatus.SOLD
-            unit.sold_date = datetime.now(UTC)
-
-        db.commit()
-        db.refresh(unit)
-
-        TransferRepository.create_unit_transfer(
-            db=db,
-            unit_id=unit_id,
-            dispatched_by_id=user_id,
-            origin_location_id=from_location_id,
-            destination_location_id=to_location_id,
-            status=transfer_status,
-            dispatched_at=datetime.now(UTC),
-            received_at=datetime.now(UTC) if transfer_status == TransferStatus.RECEIVED else None,
-        )
-
-        return UnitRepository.get_unit(db, unit.id)
+        now = datetime.now(UTC)
+        with compare_and_set(db, lambda: snapshot(UnitSchema, UnitRepository.get_unit(db, unit_id))):
+            claim(unit)
+            if to_location_id is not None:
+                transfer_status = TransferStatus.IN_TRANSIT
+                unit.status = UnitStatus.IN_TRANSIT
+            else:
+                transfer_status = TransferStatus.RECEIVED
+                unit.status = UnitStatus.SOLD
+                unit.sold_date = now
+
+            TransferRepository.create_unit_transfer(
+                db=db,
+                unit_id=unit_id,
+                dispatched_by_id=user_id,
+                origin_location_id=from_location_id,
+                destination_location_id=to_location_id,
+                status=transfer_status,
+                dispatched_at=now,
+                received_at=now if transfer_status == TransferStatus.RECEIVED else None,
+            )
+
+        return UnitRepository.get_unit(db, unit_id)
 
     @staticmethod
     def create_unit_transfer_record(
@@ -127,6 +143,11 @@ class TransferService:
         if not db_transfer:
             raise HTTPException(status_code=404, detail="Transfer not found")
 
+        def current() -> dict | None:
+            return snapshot(TransferSchema, TransferRepository.get_transfer(db, transfer_id))
+
+        check_version(db_transfer, transfer_update.version, current)
+
         merged_data = TransferCreate(
             unit_id=transfer_update.unit_id if transfer_update.unit_id is not None else db_transfer.unit_id,
             dispatched_by_id=transfer_update.dispatched_by_id if transfer_update.dispatched_by_id is not None else db_transfer.dispatched_by_id,
@@ -137,66 +158,71 @@ class TransferService:
             dispatched_at=transfer_update.dispatched_at if transfer_update.dispatched_at is not None else db_transfer.dispatched_at,
             received_at=transfer_update.received_at if transfer_update.received_at is not None else db_transfer.received_at,
         )
-        TransferService._validate_relations(db, merged_data)
+        # References the update leaves alone are already held by the transfer row.
+        TransferService._validate_relations(
+            db, merged_data, fields=transfer_update.model_dump(exclude_none=True).keys()
+        )
 
         update_payload = transfer_update.model_copy(deep=True)
         if update_payload.status == TransferStatus.RECEIVED and update_payload.received_at is None:
             update_payload.received_at = datetime.now(UTC)
 
-        # When marking as RECEIVED, update unit status and location
-        if update_payload.status == TransferStatus.RECEIVED:
-            unit = UnitRepository.get_unit(db, db_transfer.unit_id)
-            if unit:
-                unit.status = UnitStatus.AVAILABLE
-                dest = merged_data.destination_location_id
-                if dest:
-                    unit.current_location_id = dest
-                db.commit()
-
-        return TransferRepository.update_transfer(db, db_transfer, update_payload)
+        with compare_and_set(db, current):
+            # When marking as RECEIVED, update unit status and location
+            if update_payload.status == TransferStatus.RECEIVED:
+                unit = UnitRepository.get_unit(db, db_transfer.unit_id)
+                if unit:
+                    unit.status = UnitStatus.AVAILABLE
+                    dest = merged_data.destination_location_id
+                    if dest:
+                        unit.current_location_id = dest
+            return TransferRepository.update_transfer(db, db_transfer, update_payload)
 
     @staticmethod
     def delete_transfer(db: Session, transfer_id: int) -> dict:
         db_transfer = TransferRepository.get_transfer(db, transfer_id)
         if not db_transfer:
             raise HTTPException(status_code=404, detail="Transfer not found")
-        TransferRepository.delete_transfer(db, db_transfer)
+        with compare_and_set(db, lambda: snapshot(TransferSchema, TransferRepository.get_transfer(db, transfer_id))):
+            TransferRepository.delete_transfer(db, db_transfer)
         return {"message": "Transfer deleted successfully"}
 
     @staticmethod
     def get_transfer_stats(db: Session) -> TransferStats:
-        total_transfers = TransferRepository.count_transfers(db)
-        pending_transfers = TransferRepository.count_transfers_by_status(db, TransferStatus.PENDING)
-        in_transit_transfers = TransferRepository.count_transfers_by_status(db, TransferStatus.IN_TRANSIT)
-        received_transfers = TransferRepository.count_transfers_by_status(db, TransferStatus.RECEIVED)
-        cancelled_transfers = TransferRepository.count_transfers_by_status(db, TransferStatus.CANCELLED)
+        return stats_cache.get_or_set("transfer_stats", lambda: TransferService._build_transfer_stats(db))
+
+    @staticmethod
+    def _build_transfer_stats(db: Session) -> TransferStats:
+        counts = TransferRepository.count_by_status(db)
         recent_transfers = TransferRepository.get_recent_transfers(db)
 
         return TransferStats(
-            total_transfers=total_transfers,
-            pending_transfers=pending_transfers,
-            in_transit_transfers=in_transit_transfers,
-            received_transfers=received_transfers,
-            cancelled=cancelled_transfers,
+            total_transfers=counts["total"],
+            pending_transfers=counts["pending"],
+            in_transit_transfers=counts["in_transit"],
+            received_transfers=counts["received"],
+            cancelled=counts["cancelled"],
             recent_transfers=recent_transfers,
         )
 
     @staticmethod
-    def _validate_relations(db: Session, transfer_data: TransferCreate) -> None:
-        if not UnitRepository.get_unit(db, transfer_data.unit_id):
-            raise HTTPException(status_code=404, detail="Unit not found")
-
-        if transfer_data.dispatched_by_id and not UserRepository.get_user_by_id(db, transfer_data.dispatched_by_id):
-            raise HTTPException(status_code=404, detail="Dispatching user not found")
-
-        if transfer_data.received_by_id and not UserRepository.get_user_by_id(db, transfer_data.received_by_id):
-            raise HTTPException(status_code=404, detail="Receiving user not found")
-
-        if transfer_data.origin_location_id and not LocationRepository.get_location(db, transfer_data.origin_location_id):
-            raise HTTPException(status_code=404, detail="Origin location not found")
-
-        if transfer_data.destination_location_id and not LocationRepository.get_location(db, transfer_data.destination_location_id):
-            raise HTTPException(status_code=404, detail="Destination location not found")
+    def _validate_relations(db: Session, transfer_data: TransferCreate, fields=None) -> None:
+        """Check every referenced unit, user and location with one query.
+
+        ``fields`` limits the existence check to those references (the origin and
+        destination must still differ).
+        """
+        references = [
+            (field, model, detail, getattr(transfer_data, field))
+            for field, model, detail in RELATIONS
+            if getattr(transfer_data, field) and (fields is None or field in fields)
+        ]
+        existing = TransferRepository.get_existing_relations(
+            db, [(model, row_id) for _, model, _, row_id in references]
+        )
+        for _, model, detail, row_id in references:
+            if (model, row_id) not in existing:
+                raise HTTPException(status_code=404, detail=detail)
 
         if (
             transfer_data.origin_location_id
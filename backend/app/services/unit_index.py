@@ -0,0 +1,177 @@
+"""Shared upkeep of the in-process indexes derived from the units table.
+
+``app.services.inventory_cube`` and ``app.services.identifier_index`` each keep
+a read-optimized copy of some unit columns. ``UnitIndex`` keeps them in step
+with the database the same way:
+
+* units written in this process are collected in ``after_flush`` (each index
+  decides what it records per unit), or by ``record_unit_writes`` for batch
+  UPDATEs that bypass the flush, and merged into every tracked index when
+  their transaction commits;
+* an index remembers the ``units`` data version it reflects. A commit that moves
+  the version by exactly one merges its deltas; any other gap (a unit written by
+  another worker, a bulk ``query().update()``) makes the next read rebuild it,
+  after one version check per request;
+* a rebuild loads new arrays without holding the index's lock and swaps them in
+  at the end, so reads and merges carry on meanwhile. Other requests that find
+  the index stale wait for that one rebuild, or, with ``serve_stale_while_building``,
+  keep reading the previous arrays until it lands.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Mapping, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import COMMITTED_UNITS_VERSION, UNITS_VERSION, current_data_version
+from app.models.models import Unit
+
+_STALE = "unit_indexes_stale"
+_TRACKED: list["UnitIndex"] = []
+
+
+class UnitIndex(ABC):
+    """Base class: subclasses load, install and merge their own arrays."""
+
+    # session.info key prefix for this index's deltas.
+    name = "unit_index"
+    # Read the previous arrays rather than wait while another request rebuilds.
+    serve_stale_while_building = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.version: Optional[int] = None
+        self._built = False
+
+    # -- subclass hooks ------------------------------------------------------
+
+    @abstractmethod
+    def _load(self, db: Session) -> Any:
+        """Read the units into a new state; runs without the lock, must not touch ``self``."""
+
+    @abstractmethod
+    def _install(self, state: Any) -> None:
+        """Make a loaded state current (called with the lock held)."""
+
+    @abstractmethod
+    def _merge(self, deltas: Mapping[int, Optional[tuple]]) -> bool:
+        """Fold committed deltas in (lock held); ``False`` asks for a rebuild."""
+
+    @abstractmethod
+    def unit_values(self, unit: Unit) -> tuple:
+        """What a delta records for a written unit."""
+
+    def changed(self, unit: Unit) -> bool:
+        """Whether an updated unit changed anything this index holds."""
+        return True
+
+    # -- upkeep ----------------------------------------------------------------
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version = None
+
+    def build(self, db: Session, version: Optional[int] = None) -> None:
+        """Load every unit into new arrays, then swap them in."""
+        if version is None:
+            version = current_data_version(db, UNITS_VERSION)
+        state = self._load(db)
+        with self._lock:
+            self._install(state)
+            self.version = version
+            self._built = True
+
+    def apply(self, deltas: Mapping[int, Optional[tuple]], version: int) -> None:
+        """Merge a committed transaction's unit changes (``None`` = deleted unit)."""
+        with self._lock:
+            if self.version is None:
+                return
+            if version != self.version + 1 or not self._merge(deltas):
+                self.version = None
+                return
+            self.version = version
+
+    def ensure_fresh(self, db: Session) -> None:
+        version = current_data_version(db, UNITS_VERSION)
+        if self.version == version:
+            return
+        wait = not (self.serve_stale_while_building and self._built)
+        if not self._build_lock.acquire(blocking=wait):
+            return  # another request is rebuilding; read the previous arrays meanwhile
+        try:
+            # Another request may have rebuilt it while this one waited.
+            if self.version is None or self.version < version:
+                self.build(db, version)
+        finally:
+            self._build_lock.release()
+
+
+IndexT = TypeVar("IndexT", bound=UnitIndex)
+
+
+def track(index: IndexT) -> IndexT:
+    """Keep ``index`` in step with the unit writes committed in this process."""
+    _TRACKED.append(index)
+    return index
+
+
+def _deltas_key(index: UnitIndex) -> str:
+    return f"{index.name}_deltas"
+
+
+def record_unit_writes(session: Session, units: list[Unit]) -> None:
+    """Collect deltas for units written outside the flush (``UnitRepository.update_units``)."""
+    for index in _TRACKED:
+        deltas = session.info.setdefault(_deltas_key(index), {})
+        for unit in units:
+            deltas[unit.id] = index.unit_values(unit)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_unit_deltas(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still hold the flushed changes here.
+    new = [obj for obj in session.new if isinstance(obj, Unit)]
+    dirty = [obj for obj in session.dirty if isinstance(obj, Unit)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Unit)]
+    if not (new or dirty or deleted):
+        return
+    record_unit_writes(session, new)
+    for index in _TRACKED:
+        deltas = session.info.setdefault(_deltas_key(index), {})
+        for unit in dirty:
+            if index.changed(unit):
+                deltas[unit.id] = index.unit_values(unit)
+        for unit in deleted:
+            deltas[unit.id] = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _detect_bulk_unit_write(orm_execute_state) -> None:
+    if not (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        return
+    if any(m.class_ is Unit for m in orm_execute_state.all_mappers):
+        orm_execute_state.session.info[_STALE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_unit_deltas(session: Session) -> None:
+    stale = session.info.pop(_STALE, False)
+    version = session.info.get(COMMITTED_UNITS_VERSION)
+    for index in _TRACKED:
+        deltas = session.info.pop(_deltas_key(index), None) or {}
+        if stale:
+            index.invalidate()
+        elif version is not None:
+            index.apply(deltas, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_unit_deltas(session: Session) -> None:
+    session.info.pop(_STALE, None)
+    for index in _TRACKED:
+        session.info.pop(_deltas_key(index), None)
@@ -5,11 +5,25 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import datetime, UTC
 
+from app.core.cache import stats_cache
+from app.core.concurrency import check_version, compare_and_set, snapshot
+from app.database.database import unit_of_work
 from app.models.models import Unit, Transfer, UnitStatus, TransferStatus
-from app.schemas.unit import UnitCreate, UnitFilters, UnitUpdate
+from app.schemas.unit import Unit as UnitSchema
+from app.schemas.unit import (
+    UnitBulkCreate,
+    UnitBulkItemResult,
+    UnitBulkResult,
+    UnitCreate,
+    UnitFilters,
+    UnitSelection,
+    UnitUpdate,
+)
 from app.models.schemas import TransferCreate
 from app.repositories.location_repository import LocationRepository
+from app.repositories.transfer_repository import TransferRepository
 from app.repositories.unit_repository import UnitRepository
+from app.services.identifier_index import lookup_units, normalize_identifier
 from app.services.transfer_service import TransferService
 
 
@@ -17,8 +31,20 @@ class UnitService:
     """Service for unit operations."""
 
     @staticmethod
-    def get_units(db: Session, filters: UnitFilters, skip: int, limit: int) -> list[Unit]:
-        return UnitRepository.get_units(db, filters, skip, limit)
+    def get_units(
+        db: Session, filters: UnitFilters, skip: int, limit: int, cursor: str | None = None
+    ) -> list[dict]:
+        return UnitRepository.get_units(db, filters, skip, limit, cursor)
+
+    @staticmethod
+    def search_units(db: Session, term: str, filters: UnitFilters, limit: int) -> list[Unit]:
+        if not term.split():
+            return []
+        return UnitRepository.search_units(db, term, filters, limit)
+
+    @staticmethod
+    def lookup_units(db: Session, code: str, limit: int) -> dict:
+        return {"code": normalize_identifier(code), "units": lookup_units(db, code, limit)}
 
     @staticmethod
     def create_unit(db: Session, unit_data: UnitCreate) -> Unit:
@@ -34,9 +60,11 @@ class UnitService:
                 detail="A unit with this engine number or chassis number already exists"
             )
         try:
-            return UnitRepository.create_unit(db, unit_data)
+            with unit_of_work(db):
+                unit_id = UnitRepository.create_unit(db, unit_data).id
         except ValueError as exc:
             raise HTTPException(status_code=422, detail=str(exc)) from exc
+        return UnitRepository.get_unit(db, unit_id)
 
     @staticmethod
     def get_unit_by_id(db: Session, unit_id: int) -> Unit:
@@ -70,36 +98,42 @@ class UnitService:
                     detail="Another unit with this engine number or chassis number already exists"
                 )
 
+        def current() -> dict | None:
+            return snapshot(UnitSchema, UnitRepository.get_unit(db, unit_id))
+
+        check_version(unit, unit_update.version, current)
         old_location_id = unit.current_location_id
         old_status = unit.status
 
+        # The unit and its transfer records are written in one transaction.
         try:
-            updated_unit = UnitRepository.update_unit(db, unit, unit_update)
-        except ValueError as exc:
-            raise HTTPException(status_code=422, detail=str(exc)) from exc
+            with compare_and_set(db, current):
+                UnitRepository.update_unit(db, unit, unit_update)
 
-        if "current_location_id" in update_data and update_data["current_location_id"] != old_location_id:
-            TransferService.create_unit_transfer_record(
-                db=db,
-                unit_id=unit.id,
-                user_id=user_id,
-                origin_location_id=old_location_id,
-                destination_location_id=update_data["current_location_id"],
-                status=TransferStatus.IN_TRANSIT,
-                dispatched_at=datetime.now(UTC),
-            )
+                if "current_location_id" in update_data and update_data["current_location_id"] != old_location_id:
+                    TransferService.create_unit_transfer_record(
+                        db=db,
+                        unit_id=unit_id,
+                        user_id=user_id,
+                        origin_location_id=old_location_id,
+                        destination_location_id=update_data["current_location_id"],
+                        status=TransferStatus.IN_TRANSIT,
+                        dispatched_at=datetime.now(UTC),
+                    )
 
-        if "status" in update_data and update_data["status"] != old_status:
-            transfer_status = TransferStatus.RECEIVED if update_data["status"] == UnitStatus.SOLD else TransferStatus.PENDING
-            TransferService.create_unit_transfer_record(
-                db=db,
-                unit_id=unit.id,
-                user_id=user_id,
-                status=transfer_status,
-                received_at=datetime.now(UTC) if transfer_status == TransferStatus.RECEIVED else None,
-            )
+                if "status" in update_data and update_data["status"] != old_status:
+                    transfer_status = TransferStatus.RECEIVED if update_data["status"] == UnitStatus.SOLD else TransferStatus.PENDING
+                    TransferService.create_unit_transfer_record(
+                        db=db,
+                        unit_id=unit_id,
+                        user_id=user_id,
+                        status=transfer_status,
+                        received_at=datetime.now(UTC) if transfer_status == TransferStatus.RECEIVED else None,
+                    )
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
 
-        return updated_unit
+        return UnitRepository.get_unit(db, unit_id)
 
     @staticmethod
     def delete_unit(db: Session, unit_id: int) -> dict:
@@ -113,19 +147,22 @@ class UnitService:
                 detail="Cannot delete unit in transit. The transit should be completed first."
             )
 
-        UnitRepository.delete_unit(db, unit_id)
+        with compare_and_set(db, lambda: snapshot(UnitSchema, UnitRepository.get_unit(db, unit_id))):
+            UnitRepository.delete_unit(db, unit_id)
         return {"message": "Unit deleted successfully"}
 
     @staticmethod
     def get_stats(db: Session) -> dict:
-        return UnitRepository.get_stats(db)
+        return stats_cache.get_or_set("unit_stats", lambda: UnitRepository.get_stats(db))
 
     @staticmethod
-    def get_unit_transfers(db: Session, unit_id: int, skip: int, limit: int) -> list[Transfer]:
+    def get_unit_transfers(
+        db: Session, unit_id: int, skip: int, limit: int, cursor: str | None = None
+    ) -> list[Transfer]:
         unit = UnitRepository.get_unit(db, unit_id)
         if not unit:
             raise HTTPException(status_code=404, detail="Unit not found")
-        return UnitRepository.get_unit_transfers(db, unit_id, skip, limit)
+        return UnitRepository.get_unit_transfers(db, unit_id, skip, limit, cursor)
 
     @staticmethod
     def transfer_unit(db: Session, unit_id: int, transfer_data: TransferCreate, user_id: int) -> Unit:
@@ -134,3 +171,179 @@ class UnitService:
     @staticmethod
     def get_active_transfer(db: Session, unit_id: int) -> Transfer:
         return TransferService.get_active_transfer_for_unit(db, unit_id)
+
+    # -- bulk operations ------------------------------------------------------
+    #
+    # Each runs in one unit of work: the selected units are loaded with one query,
+    # written with one compare-and-set UPDATE (UnitRepository.update_units, which
+    # keeps inventory_counters and sales in step), their transfer rows are inserted
+    # with one executemany and the whole batch commits once. Items that cannot be
+    # applied are reported, not raised.
+
+    @staticmethod
+    def _bulk_result(results: list[UnitBulkItemResult]) -> UnitBulkResult:
+        succeeded = sum(result.ok for result in results)
+        return UnitBulkResult(
+            succeeded=succeeded, failed=len(results) - succeeded, results=results
+        )
+
+    @staticmethod
+    def select_units(db: Session, selection: UnitSelection) -> list[tuple[str, Unit | None]]:
+        """``(key, unit)`` per requested id or identifier, in request order."""
+        units = UnitRepository.get_selected_units(db, selection.unit_ids, selection.identifiers)
+        by_id = {unit.id: unit for unit in units}
+        by_identifier = {}
+        for unit in units:
+            for identifier in (unit.engine_number, unit.chassis_number):
+                if identifier:
+                    by_identifier[identifier] = unit
+        return [
+            *((str(unit_id), by_id.get(unit_id)) for unit_id in selection.unit_ids),
+            *((identifier, by_identifier.get(identifier)) for identifier in selection.identifiers),
+        ]
+
+    @staticmethod
+    def _apply_to_selection(db: Session, selection: UnitSelection, apply) -> UnitBulkResult:
+        """Run ``apply(unit)`` (returns an error or None) once per selected unit."""
+        results, seen = [], set()
+        for key, unit in UnitService.select_units(db, selection):
+            if unit is None:
+                error = "Unit not found"
+            elif unit.id in seen:
+                error = "Unit selected more than once"
+            else:
+                seen.add(unit.id)
+                error = apply(unit)
+            results.append(UnitBulkItemResult(
+                key=key, unit_id=unit.id if unit else None, ok=error is None, error=error,
+            ))
+        return UnitService._bulk_result(results)
+
+    @staticmethod
+    def _transfer_row(unit_id: int, user_id: int, **values) -> dict:
+        # executemany needs the same keys on every row.
+        return {
+            "unit_id": unit_id,
+            "dispatched_by_id": user_id,
+            "origin_location_id": None,
+            "destination_location_id": None,
+            "status": TransferStatus.PENDING,
+            "dispatched_at": None,
+            "received_at": None,
+            **values,
+        }
+
+    @staticmethod
+    def bulk_create_units(db: Session, data: UnitBulkCreate) -> UnitBulkResult:
+        locations = LocationRepository.get_existing_ids(
+            db, [unit.current_location_id for unit in data.units]
+        )
+        taken = UnitRepository.get_existing_identifiers(db, [
+            identifier
+            for unit in data.units
+            for identifier in (unit.engine_number, unit.chassis_number)
+            if identifier
+        ])
+
+        results, payloads, pending = [], [], []
+        for index, unit in enumerate(data.units):
+            identifiers = {i for i in (unit.engine_number, unit.chassis_number) if i}
+            if unit.current_location_id not in locations:
+                error = "Location not found"
+            elif identifiers & taken:
+                error = "A unit with this engine number or chassis number already exists"
+            else:
+                error = None
+                taken |= identifiers
+                payloads.append(unit.model_dump())
+            result = UnitBulkItemResult(key=str(index), ok=error is None, error=error)
+            results.append(result)
+            if error is None:
+                pending.append(result)
+
+        with unit_of_work(db):
+            for result, unit in zip(pending, UnitRepository.add_units(db, payloads), strict=True):
+                result.unit_id = unit.id
+        return UnitService._bulk_result(results)
+
+    @staticmethod
+    def bulk_update_status(
+        db: Session,
+        selection: UnitSelection,
+        status: UnitStatus,
+        user_id: int,
+        sold_date: datetime | None = None,
+    ) -> UnitBulkResult:
+        """Set ``status`` on every selected unit, with the same transfer record as ``update_unit``."""
+        now = datetime.now(UTC)
+        values = {"status": status}
+        if status == UnitStatus.SOLD:
+            values["sold_date"] = sold_date or now
+        changed, transfers = [], []
+
+        def apply(unit: Unit) -> None:
+            if unit.status == status:
+                return
+            changed.append(unit)
+            if status == UnitStatus.SOLD:
+                transfers.append(UnitService._transfer_row(
+                    unit.id, user_id, status=TransferStatus.RECEIVED, received_at=now,
+                ))
+            else:
+                transfers.append(UnitService._transfer_row(unit.id, user_id))
+
+        with unit_of_work(db):
+            result = UnitService._apply_to_selection(db, selection, apply)
+            UnitRepository.update_units(db, changed, **values)
+            TransferRepository.add_unit_transfers(db, transfers)
+        return result
+
+    @staticmethod
+    def bulk_sell_units(
+        db: Session, selection: UnitSelection, user_id: int, sold_date: datetime | None = None
+    ) -> UnitBulkResult:
+        return UnitService.bulk_update_status(
+            db, selection, UnitStatus.SOLD, user_id, sold_date=sold_date
+        )
+
+    @staticmethod
+    def bulk_move_units(
+        db: Session, selection: UnitSelection, location_id: int, user_id: int
+    ) -> UnitBulkResult:
+        if not LocationRepository.get_location(db, location_id):
+            raise HTTPException(status_code=404, detail="Location not found")
+        now = datetime.now(UTC)
+        moved, transfers = [], []
+
+        def apply(unit: Unit) -> None:
+            if unit.current_location_id == location_id:
+                return
+            moved.append(unit)
+            transfers.append(UnitService._transfer_row(
+                unit.id, user_id,
+                origin_location_id=unit.current_location_id,
+                destination_location_id=location_id,
+                status=TransferStatus.IN_TRANSIT,
+                dispatched_at=now,
+            ))
+
+        with unit_of_work(db):
+            result = UnitService._apply_to_selection(db, selection, apply)
+            UnitRepository.update_units(db, moved, current_location_id=location_id)
+            TransferRepository.add_unit_transfers(db, transfers)
+        return result
+
+    @staticmethod
+    def bulk_delete_units(db: Session, selection: UnitSelection) -> UnitBulkResult:
+        doomed = []
+
+        def apply(unit: Unit) -> str | None:
+            if unit.status == UnitStatus.IN_TRANSIT:
+                return "Cannot delete unit in transit. The transit should be completed first."
+            doomed.append(unit)
+            return None
+
+        with unit_of_work(db):
+            result = UnitService._apply_to_selection(db, selection, apply)
+            UnitRepository.delete_units(db, doomed)
+        return result
@@ -0,0 +1,47 @@
+"""Add inventory_counters summary table
+
+Revision ID: 004_inventory_counters
+Revises: 003_batch_meta
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004_inventory_counters'
+down_revision = '003_batch_meta'
+branch_labels = None
+depends_on = None
+
+UNIT_STATUS = postgresql.ENUM(
+    'WAREHOUSE_UNIDENTIFIED', 'AVAILABLE', 'SOLD', 'IN_TRANSIT',
+    name='unitstatus', create_type=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_counters',
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('status', UNIT_STATUS, nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('product_type', sa.String(length=100), nullable=False, server_default=''),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id']),
+        sa.PrimaryKeyConstraint('location_id', 'status', 'model', 'product_type'),
+    )
+    # Seed the counters from the current fleet.
+    op.execute(
+        """
+        INSERT INTO inventory_counters (location_id, status, model, product_type, count)
+        SELECT current_location_id, status, model, COALESCE(product_type, ''), COUNT(*)
+        FROM units
+        GROUP BY current_location_id, status, model, COALESCE(product_type, '')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_counters')
@@ -0,0 +1,24 @@
+"""Index units.sold_date and transfers.dispatched_at for time-series reports
+
+Revision ID: 005_report_date_indexes
+Revises: 004_inventory_counters
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005_report_date_indexes'
+down_revision = '004_inventory_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_units_sold_date'), 'units', ['sold_date'], unique=False)
+    op.create_index(op.f('ix_transfers_dispatched_at'), 'transfers', ['dispatched_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transfers_dispatched_at'), table_name='transfers')
+    op.drop_index(op.f('ix_units_sold_date'), table_name='units')
@@ -0,0 +1,29 @@
+"""Add data_versions table for versioned report caching
+
+Revision ID: 006_data_versions
+Revises: 005_report_date_indexes
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_data_versions'
+down_revision = '005_report_date_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.execute("INSERT INTO data_versions (name, version) VALUES ('inventory', 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('data_versions')
@@ -0,0 +1,57 @@
+"""Add sales fact table
+
+Revision ID: 007_sales
+Revises: 006_data_versions
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_sales'
+down_revision = '006_data_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=True),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('batch_period', sa.String(length=100), nullable=True),
+        sa.Column('sold_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('unit_id'),
+    )
+    op.create_index(op.f('ix_sales_id'), 'sales', ['id'], unique=False)
+    op.create_index(op.f('ix_sales_sold_at'), 'sales', ['sold_at'], unique=False)
+    op.create_index('ix_sales_location_sold_at', 'sales', ['location_id', 'sold_at'], unique=False)
+    op.create_index('ix_sales_model_sold_at', 'sales', ['model', 'sold_at'], unique=False)
+    op.create_index('ix_sales_batch_period_sold_at', 'sales', ['batch_period', 'sold_at'], unique=False)
+
+    # Units sold before this table existed: their current location is the best
+    # record of where they were sold.
+    op.execute(
+        """
+        INSERT INTO sales (unit_id, location_id, model, batch_period, sold_at)
+        SELECT id, current_location_id, model, batch_period,
+               COALESCE(sold_date, updated_at, created_at, now())
+        FROM units
+        WHERE status = 'SOLD'
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_batch_period_sold_at', table_name='sales')
+    op.drop_index('ix_sales_model_sold_at', table_name='sales')
+    op.drop_index('ix_sales_location_sold_at', table_name='sales')
+    op.drop_index(op.f('ix_sales_sold_at'), table_name='sales')
+    op.drop_index(op.f('ix_sales_id'), table_name='sales')
+    op.drop_table('sales')
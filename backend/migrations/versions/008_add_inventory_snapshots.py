@@ -0,0 +1,49 @@
+"""Add inventory_snapshots table
+
+Revision ID: 008_inventory_snapshots
+Revises: 007_sales
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008_inventory_snapshots'
+down_revision = '007_sales'
+branch_labels = None
+depends_on = None
+
+UNIT_STATUS = postgresql.ENUM(
+    'WAREHOUSE_UNIDENTIFIED', 'AVAILABLE', 'SOLD', 'IN_TRANSIT',
+    name='unitstatus', create_type=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_snapshots',
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('status', UNIT_STATUS, nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('snapshot_date', 'location_id', 'status', 'model'),
+    )
+    op.create_index(
+        'ix_inventory_snapshots_model_date', 'inventory_snapshots', ['model', 'snapshot_date'], unique=False
+    )
+    op.create_index(
+        'ix_inventory_snapshots_location_date', 'inventory_snapshots', ['location_id', 'snapshot_date'],
+        unique=False,
+    )
+    # History before this table is rebuilt with
+    # ``python -m app.database.snapshot_inventory --backfill --from <day>``.
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_snapshots_location_date', table_name='inventory_snapshots')
+    op.drop_index('ix_inventory_snapshots_model_date', table_name='inventory_snapshots')
+    op.drop_table('inventory_snapshots')
@@ -0,0 +1,50 @@
+"""Add inventory checkpoint tables
+
+Revision ID: 009_inventory_checkpoints
+Revises: 008_inventory_snapshots
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009_inventory_checkpoints'
+down_revision = '008_inventory_snapshots'
+branch_labels = None
+depends_on = None
+
+UNIT_STATUS = postgresql.ENUM(
+    'WAREHOUSE_UNIDENTIFIED', 'AVAILABLE', 'SOLD', 'IN_TRANSIT',
+    name='unitstatus', create_type=False,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_inventory_checkpoints_id'), 'inventory_checkpoints', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_inventory_checkpoints_taken_at'), 'inventory_checkpoints', ['taken_at'], unique=False
+    )
+    op.create_table(
+        'inventory_checkpoint_units',
+        sa.Column('checkpoint_id', sa.Integer(), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('status', UNIT_STATUS, nullable=False),
+        sa.ForeignKeyConstraint(['checkpoint_id'], ['inventory_checkpoints.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('checkpoint_id', 'unit_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_checkpoint_units')
+    op.drop_index(op.f('ix_inventory_checkpoints_taken_at'), table_name='inventory_checkpoints')
+    op.drop_index(op.f('ix_inventory_checkpoints_id'), table_name='inventory_checkpoints')
+    op.drop_table('inventory_checkpoints')
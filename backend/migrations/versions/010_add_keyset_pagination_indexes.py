@@ -0,0 +1,30 @@
+"""Index the sort keys of keyset-paginated lists
+
+Revision ID: 010_keyset_pagination_indexes
+Revises: 009_inventory_checkpoints
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010_keyset_pagination_indexes'
+down_revision = '009_inventory_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_transfers_unit_dispatched_at_id', 'transfers', ['unit_id', 'dispatched_at', 'id'], unique=False
+    )
+    op.create_index('ix_transfers_dispatched_at_id', 'transfers', ['dispatched_at', 'id'], unique=False)
+    op.create_index('ix_imports_import_date_id', 'imports', ['import_date', 'id'], unique=False)
+    op.create_index('ix_import_errors_import_id_id', 'import_errors', ['import_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_errors_import_id_id', table_name='import_errors')
+    op.drop_index('ix_imports_import_date_id', table_name='imports')
+    op.drop_index('ix_transfers_dispatched_at_id', table_name='transfers')
+    op.drop_index('ix_transfers_unit_dispatched_at_id', table_name='transfers')
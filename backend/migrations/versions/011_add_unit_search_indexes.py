@@ -0,0 +1,30 @@
+"""Trigram GIN indexes for unit search
+
+Revision ID: 011_unit_search_indexes
+Revises: 010_keyset_pagination_indexes
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011_unit_search_indexes'
+down_revision = '010_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ('engine_number', 'chassis_number', 'model', 'brand', 'notes')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        op.create_index(
+            f'ix_units_{column}_trgm', 'units', [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(SEARCH_COLUMNS):
+        op.drop_index(f'ix_units_{column}_trgm', table_name='units')
@@ -0,0 +1,25 @@
+"""Row versions for optimistic concurrency on units and transfers
+
+Revision ID: 012_row_versions
+Revises: 011_unit_search_indexes
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_row_versions'
+down_revision = '011_unit_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('units', 'transfers'):
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    for table in ('transfers', 'units'):
+        op.drop_column(table, 'version')
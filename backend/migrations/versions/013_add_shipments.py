@@ -0,0 +1,70 @@
+"""Shipments and their manifest items
+
+Revision ID: 013_shipments
+Revises: 012_row_versions
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_shipments'
+down_revision = '012_row_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'shipments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('origin_location_id', sa.Integer(), nullable=False),
+        sa.Column('destination_location_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('IN_TRANSIT', 'PARTIALLY_RECEIVED', 'RECEIVED', name='shipmentstatus'),
+            nullable=False,
+        ),
+        sa.Column('dispatched_by_id', sa.Integer(), nullable=True),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['origin_location_id'], ['locations.id']),
+        sa.ForeignKeyConstraint(['destination_location_id'], ['locations.id']),
+        sa.ForeignKeyConstraint(['dispatched_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_shipments_id'), 'shipments', ['id'], unique=False)
+    op.create_index(
+        'ix_shipments_destination_status_id', 'shipments',
+        ['destination_location_id', 'status', 'id'], unique=False,
+    )
+
+    op.create_table(
+        'shipment_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shipment_id', sa.Integer(), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('transfer_id', sa.Integer(), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('received_by_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['transfer_id'], ['transfers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['received_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('shipment_id', 'unit_id', name='uq_shipment_items_shipment_unit'),
+    )
+    op.create_index(op.f('ix_shipment_items_id'), 'shipment_items', ['id'], unique=False)
+    op.create_index(op.f('ix_shipment_items_unit_id'), 'shipment_items', ['unit_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_shipment_items_unit_id'), table_name='shipment_items')
+    op.drop_index(op.f('ix_shipment_items_id'), table_name='shipment_items')
+    op.drop_table('shipment_items')
+    op.drop_index('ix_shipments_destination_status_id', table_name='shipments')
+    op.drop_index(op.f('ix_shipments_id'), table_name='shipments')
+    op.drop_table('shipments')
+    op.execute('DROP TYPE IF EXISTS shipmentstatus')
@@ -0,0 +1,22 @@
+"""Add the units data version row
+
+Revision ID: 014_units_data_version
+Revises: 013_shipments
+Create Date: 2026-10-21 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '014_units_data_version'
+down_revision = '013_shipments'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("INSERT INTO data_versions (name, version) VALUES ('units', 0)")
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM data_versions WHERE name = 'units'")
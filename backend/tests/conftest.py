@@ -6,18 +6,22 @@ Sync engine matches production (app uses sync SQLAlchemy).
 
 import pytest
 import asyncio
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Generator
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, func
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.database.database import Base, get_db
 from app.models.models import User, UserRole, Location, Unit, Transfer, Import, ImportError
+from app.models.models import Shipment, ShipmentItem
 from app.models.models import UnitStatus, TransferStatus
 from app.core.security import Security
+from app.core.cache import stats_cache
+from app.services.report_cache import report_cache
 
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
@@ -52,6 +56,40 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    """Start every test with empty report caches so results never leak across tests."""
+    stats_cache.clear()
+    report_cache.clear()
+    yield
+    stats_cache.clear()
+    report_cache.clear()
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager collecting every SQL statement sent to the test database.
+
+        with count_queries() as statements:
+            ...
+        assert len(statements) == 3
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+
+    return counter
+
+
 @pytest.fixture(scope="session")
 def setup_database():
     Base.metadata.create_all(bind=test_engine)
@@ -169,3 +207,53 @@ def sold_unit_with_history(test_users, test_locations):
     db.delete(unit)
     db.commit()
     db.close()
+
+
+@pytest.fixture
+def make_units(db_session, test_locations):
+    """Factory committing units in ``db_session``; returns them in order.
+
+        units = make_units(3, prefix="BULK", status=UnitStatus.SOLD)
+        units = make_units(prefix="CUBE", each=[{"color": "Azul"}, {"model": "CUBE-B"}])
+
+    Unit ``i`` gets serials ``<prefix>-ENG-<i>``/``<prefix>-CH-<i>`` and model
+    ``<prefix>-M`` at the first test location; keyword arguments override any
+    column for every unit, ``each`` per unit (and sets the count). Every unit
+    the test created, through the factory or the API, is deleted afterwards with
+    its transfers and shipments.
+    """
+    last_id = db_session.query(func.max(Unit.id)).scalar() or 0
+
+    def make(count: int = 1, prefix: str = "UNIT", *, each=(), **values) -> list[Unit]:
+        units = [
+            Unit(**{
+                "engine_number": f"{prefix}-ENG-{i}",
+                "chassis_number": f"{prefix}-CH-{i}",
+                "brand": "Thunderrol",
+                "model": f"{prefix}-M",
+                "color": "Rojo",
+                "current_location_id": test_locations[0].id,
+                "status": UnitStatus.AVAILABLE,
+                **values,
+                **overrides,
+            })
+            for i, overrides in enumerate(each or [{}] * count)
+        ]
+        db_session.add_all(units)
+        db_session.commit()
+        return units
+
+    yield make
+
+    db_session.expire_all()  # other sessions may have moved the units' versions on
+    unit_ids = [unit_id for (unit_id,) in db_session.query(Unit.id).filter(Unit.id > last_id)]
+    shipment_ids = {
+        shipment_id for (shipment_id,) in
+        db_session.query(ShipmentItem.shipment_id).filter(ShipmentItem.unit_id.in_(unit_ids))
+    }
+    db_session.query(ShipmentItem).filter(ShipmentItem.shipment_id.in_(shipment_ids)).delete()
+    db_session.query(Shipment).filter(Shipment.id.in_(shipment_ids)).delete()
+    db_session.query(Transfer).filter(Transfer.unit_id.in_(unit_ids)).delete()
+    for unit in db_session.query(Unit).filter(Unit.id.in_(unit_ids)):
+        db_session.delete(unit)
+    db_session.commit()
@@ -0,0 +1,125 @@
+"""Unit tests for the in-process stats cache and the inventory data version."""
+
+from unittest.mock import patch
+
+from app.core.cache import UNITS_VERSION, TTLCache, current_data_version, stats_cache
+from app.models.models import Location, Unit, User
+
+
+def test_get_or_set_computes_once():
+    """The factory only runs on a miss."""
+    cache = TTLCache(ttl_seconds=60)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"total": 1}
+
+    assert cache.get_or_set("k", factory) == {"total": 1}
+    assert cache.get_or_set("k", factory) == {"total": 1}
+    assert len(calls) == 1
+
+
+def test_entries_expire_after_ttl():
+    """Expired entries are recomputed."""
+    cache = TTLCache(ttl_seconds=5)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.set("k", "old")
+    with patch("app.core.cache.time.monotonic", return_value=106.0):
+        assert cache.get("k") is None
+
+
+def test_zero_ttl_disables_caching():
+    """A TTL of 0 never stores anything."""
+    cache = TTLCache(ttl_seconds=0)
+    cache.set("k", "v")
+    assert cache.get("k") is None
+
+
+def test_maxsize_is_bounded():
+    """The cache evicts instead of growing past maxsize."""
+    cache = TTLCache(ttl_seconds=60, maxsize=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert len(cache._entries) == 2
+    assert cache.get("c") == "c"
+
+
+def test_inventory_commit_clears_stats_cache(db_session):
+    """Committing a write to an inventory table invalidates cached stats."""
+    stats_cache.set("dashboard", {"cached": True})
+    location = Location(name="Cache Invalidation", address="Calle 9")
+    db_session.add(location)
+    db_session.commit()
+    assert stats_cache.get("dashboard") is None
+
+    db_session.delete(location)
+    db_session.commit()
+
+
+def test_user_commit_invalidates_cached_reports(db_session, test_users):
+    """Reports show user names, so renaming a user drops them and moves the version."""
+    stats_cache.set("dashboard", {"cached": True})
+    before = current_data_version(db_session)
+    user = db_session.get(User, test_users[0].id)
+    first_name = user.first_name
+    user.first_name = "Renamed"
+    db_session.commit()
+    assert stats_cache.get("dashboard") is None
+    assert current_data_version(db_session) == before + 1
+
+    user.first_name = first_name
+    db_session.commit()
+
+
+def test_read_only_commit_keeps_stats_cache(db_session):
+    """A commit without inventory writes leaves cached stats alone."""
+    stats_cache.set("dashboard", {"cached": True})
+    db_session.query(Location).count()
+    db_session.commit()
+    assert stats_cache.get("dashboard") == {"cached": True}
+
+
+def test_inventory_commit_bumps_data_version(db_session):
+    """Each committed inventory write bumps the shared data version once."""
+    before = current_data_version(db_session)
+    location = Location(name="Version Bump", address="Calle 10")
+    db_session.add(location)
+    db_session.commit()
+    assert current_data_version(db_session) == before + 1
+
+    db_session.delete(location)
+    db_session.commit()
+    assert current_data_version(db_session) == before + 2
+
+
+def test_read_only_commit_keeps_data_version(db_session):
+    """Reads and rollbacks leave the data version alone."""
+    before = current_data_version(db_session)
+    db_session.query(Location).count()
+    db_session.commit()
+    db_session.add(Location(name="Rolled Back", address="Calle 11"))
+    db_session.flush()
+    db_session.rollback()
+    assert current_data_version(db_session) == before
+
+
+def test_units_version_moves_with_unit_writes_only(db_session, test_locations):
+    """Unit writes bump the units version; other inventory writes leave it alone."""
+    before = current_data_version(db_session, UNITS_VERSION)
+    location = Location(name="Units Version", address="Calle 11")
+    db_session.add(location)
+    db_session.commit()
+    assert current_data_version(db_session, UNITS_VERSION) == before
+
+    unit = Unit(
+        engine_number="UNITS-VERSION-1", brand="Thunderrol", model="UV", color="Rojo",
+        current_location_id=test_locations[0].id,
+    )
+    db_session.add(unit)
+    db_session.commit()
+    assert current_data_version(db_session, UNITS_VERSION) == before + 1
+
+    db_session.delete(unit)
+    db_session.delete(location)
+    db_session.commit()
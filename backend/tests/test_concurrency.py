@@ -0,0 +1,102 @@
+"""Optimistic concurrency on units and transfers: version checks and 409 conflicts."""
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models.models import Transfer, TransferStatus, Unit
+from app.models.schemas import TransferCreate as UnitTransferCreate
+from app.repositories.unit_repository import UnitRepository
+from app.services.transfer_service import TransferService
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def versioned_unit(make_units):
+    [unit] = make_units(prefix="OCC", chassis_number=None)
+    return unit
+
+
+@pytest.mark.asyncio
+async def test_update_with_stale_version_is_a_conflict(client: AsyncClient, auth_headers, versioned_unit):
+    """A client that read an older version gets 409 and the current state."""
+    url = f"/api/v1/units/{versioned_unit.id}"
+    read = (await client.get(url, headers=auth_headers)).json()
+    assert read["version"] == 1
+
+    first = await client.put(url, json={"color": "Azul", "version": 1}, headers=auth_headers)
+    assert first.status_code == 200
+    assert first.json()["version"] == 2
+
+    second = await client.put(url, json={"color": "Verde", "version": 1}, headers=auth_headers)
+    assert second.status_code == 409
+    current = second.json()["detail"]["current"]
+    assert (current["color"], current["version"]) == ("AZUL", 2)
+
+
+@pytest.mark.asyncio
+async def test_transfer_update_checks_version(client: AsyncClient, auth_headers, db_session, versioned_unit):
+    transfer = Transfer(unit_id=versioned_unit.id, status=TransferStatus.PENDING)
+    db_session.add(transfer)
+    db_session.commit()
+
+    url = f"/api/v1/transfers/{transfer.id}"
+    response = await client.put(url, json={"status": "IN_TRANSIT", "version": 2}, headers=auth_headers)
+    assert response.status_code == 409
+    assert response.json()["detail"]["current"]["status"] == "PENDING"
+
+    response = await client.put(url, json={"status": "IN_TRANSIT", "version": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+
+def test_concurrent_dispatch_of_same_unit_conflicts(test_users, test_locations, versioned_unit):
+    """Both requests read the unit before either writes; only the first may dispatch it."""
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        dispatch = UnitTransferCreate(
+            from_location_id=test_locations[0].id, to_location_id=test_locations[1].id,
+            unit_ids=[versioned_unit.id],
+        )
+        read_by_second = second.get(Unit, versioned_unit.id)
+        assert read_by_second.version == 1
+
+        TransferService.transfer_unit_with_status_update(
+            first, versioned_unit.id, dispatch, test_users[0].id
+        )
+        with pytest.raises(HTTPException) as exc:
+            TransferService.transfer_unit_with_status_update(
+                second, versioned_unit.id, dispatch, test_users[1].id
+            )
+
+        assert exc.value.status_code == 409
+        assert exc.value.detail["current"]["status"] == "IN_TRANSIT"
+        assert exc.value.detail["current"]["version"] == 2
+        assert second.query(Transfer).filter(Transfer.unit_id == versioned_unit.id).count() == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_batch_update_conflicts_if_any_unit_changed(test_locations, make_units):
+    """One UPDATE writes the whole batch, or nothing when a unit moved on since it was read."""
+    unit_ids = [unit.id for unit in make_units(3, prefix="OCC-BATCH")]
+    session, other = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        units = session.query(Unit).filter(Unit.id.in_(unit_ids)).order_by(Unit.id).all()
+        other.get(Unit, unit_ids[1]).color = "Azul"
+        other.commit()
+
+        with pytest.raises(StaleDataError):
+            UnitRepository.update_units(session, units, current_location_id=test_locations[1].id)
+        session.rollback()
+        assert {unit.current_location_id for unit in units} == {test_locations[0].id}
+
+        UnitRepository.update_units(session, units, current_location_id=test_locations[1].id)
+        session.commit()
+        rows = other.query(Unit.current_location_id, Unit.version).filter(Unit.id.in_(unit_ids))
+        assert sorted(rows) == [(test_locations[1].id, 2), (test_locations[1].id, 2), (test_locations[1].id, 3)]
+    finally:
+        session.close()
+        other.close()
@@ -0,0 +1,134 @@
+"""Tests for the in-memory engine/chassis identifier index and /units/lookup."""
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.cache import UNITS_VERSION, current_data_version
+from app.models.models import Unit, UnitStatus
+from app.services.identifier_index import (
+    CHASSIS,
+    ENGINE,
+    IdentifierIndex,
+    identifier_index,
+    lookup_units,
+    normalize_identifier,
+)
+
+
+@pytest.fixture
+def scan_units(make_units, test_locations):
+    return make_units(prefix="SCAN", status=UnitStatus.WAREHOUSE_UNIDENTIFIED, each=[
+        {"engine_number": "SCAN-4471-0", "chassis_number": "SCH-9001", "model": "SCAN-A"},
+        {"engine_number": "SCAN-4471-5", "chassis_number": None, "model": "SCAN-A",
+         "color": "Azul"},
+        {"engine_number": "SCAN-9999", "chassis_number": "SCH-4471", "model": "SCAN-B",
+         "color": "Negro", "current_location_id": test_locations[1].id},
+    ])
+
+
+def test_normalize_identifier():
+    assert normalize_identifier(" scan 4471-0 ") == "SCAN44710"
+    assert normalize_identifier(None) == ""
+
+
+def test_lookup_exact_then_prefix(db_session, scan_units):
+    index = IdentifierIndex()
+    index.build(db_session)
+    first, second, third = (unit.id for unit in scan_units)
+
+    assert index.lookup("scan 4471-0", 10) == [(first, ENGINE, True)]
+    assert index.lookup("SCAN4471", 10) == [(first, ENGINE, False), (second, ENGINE, False)]
+    assert index.lookup("SCAN4471", 1) == [(first, ENGINE, False)]
+    assert index.lookup("sch-4471", 10) == [(third, CHASSIS, True)]
+    assert index.lookup("SCH", 10) == [(third, CHASSIS, False), (first, CHASSIS, False)]
+    assert index.lookup("NOPE", 10) == []
+    assert index.lookup("--", 10) == []
+
+
+def test_index_follows_commits_incrementally(db_session, test_locations, scan_units):
+    identifier_index.ensure_fresh(db_session)
+    size = len(identifier_index)
+
+    scan_units[0].engine_number = "SCAN-7000"
+    scan_units[1].color = "Verde"  # not an identifier: nothing to merge
+    new_unit = Unit(
+        engine_number="SCAN-NEW-1", brand="Thunderrol", model="SCAN-C", color="Negro",
+        current_location_id=test_locations[0].id,
+    )
+    db_session.add(new_unit)
+    db_session.delete(scan_units[2])
+    db_session.commit()
+
+    # Merged from the commit's deltas: same version as the database, no rebuild.
+    assert identifier_index.version == current_data_version(db_session, UNITS_VERSION)
+    assert len(identifier_index) == size - 1
+    assert identifier_index.lookup("SCAN44710", 10) == []
+    assert identifier_index.lookup("SCAN7000", 10) == [(scan_units[0].id, ENGINE, True)]
+    assert identifier_index.lookup("SCANNEW", 10) == [(new_unit.id, ENGINE, False)]
+    assert identifier_index.lookup("SCH4471", 10) == []
+
+
+def test_index_rebuilds_after_bulk_update(db_session, scan_units):
+    identifier_index.ensure_fresh(db_session)
+
+    db_session.query(Unit).filter(Unit.id == scan_units[1].id).update(
+        {"chassis_number": "SCH-BULK"}
+    )
+    db_session.commit()
+    assert identifier_index.version is None
+
+    rows = lookup_units(db_session, "sch bulk")
+    assert [row["id"] for row in rows] == [scan_units[1].id]
+
+
+def test_lookup_falls_back_to_database_on_miss(db_session, scan_units):
+    """A miss checks the raw code in the database; a hit there marks the index stale."""
+    identifier_index.ensure_fresh(db_session)
+    # Simulate an index that missed a write but still believes it is current.
+    identifier_index._keys = identifier_index._keys[:0]
+    identifier_index._ids = identifier_index._ids[:0]
+    identifier_index._kinds = identifier_index._kinds[:0]
+
+    rows = lookup_units(db_session, "SCAN-9999")
+    assert [(row["id"], row["matched"], row["exact"]) for row in rows] == [
+        (scan_units[2].id, "engine_number", True)
+    ]
+    assert identifier_index.version is None
+
+
+def test_lookup_reads_previous_arrays_during_a_rebuild(db_session, scan_units):
+    """A stale index does not stall lookups while another request rebuilds it."""
+    identifier_index.ensure_fresh(db_session)
+    identifier_index.invalidate()
+
+    with identifier_index._build_lock:  # a rebuild in flight elsewhere
+        rows = lookup_units(db_session, "SCAN-4471-0")
+        assert identifier_index.version is None
+    assert [row["id"] for row in rows] == [scan_units[0].id]
+
+    identifier_index.ensure_fresh(db_session)
+    assert identifier_index.version == current_data_version(db_session, UNITS_VERSION)
+
+
+@pytest.mark.asyncio
+async def test_lookup_endpoint(client: AsyncClient, auth_headers, test_locations, scan_units):
+    response = await client.get(
+        "/api/v1/units/lookup", params={"code": "scan-4471"}, headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["code"] == "SCAN4471"
+    assert [unit["engine_number"] for unit in data["units"]] == ["SCAN-4471-0", "SCAN-4471-5"]
+    first = data["units"][0]
+    assert first["location_id"] == test_locations[0].id
+    assert first["location"] == test_locations[0].name
+    assert (first["status"], first["matched"], first["exact"]) == (
+        "WAREHOUSE_UNIDENTIFIED", "engine_number", False,
+    )
+
+    response = await client.get(
+        "/api/v1/units/lookup", params={"code": "NOT-A-SERIAL"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["units"] == []
@@ -0,0 +1,54 @@
+"""Unit tests for the vectorized aging and days-to-sell summaries."""
+
+from datetime import datetime, timedelta, timezone
+
+from app.services.inventory_aging import aging_summary, days_to_sell_summary
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def test_aging_summary_buckets_and_days_in_location():
+    rows = [
+        (1, "Bodega", "M1", "2025-A", datetime(2025, 5, 20), None),
+        (1, "Bodega", "M1", "2025-A", datetime(2025, 1, 1), datetime(2025, 5, 1)),
+        (2, "Taller", "M2", None, datetime(2025, 3, 15, tzinfo=timezone.utc), None),
+    ]
+
+    result = aging_summary(rows, NOW)
+
+    assert result["total_units"] == 3
+    assert result["by_bucket"] == {"0-30": 1, "31-90": 1, "90+": 1}
+    first, second = result["groups"]
+    assert (first["location"], first["model"], first["batch_period"]) == ("Bodega", "M1", "2025-A")
+    assert first["buckets"] == {"0-30": 1, "31-90": 0, "90+": 1}
+    assert first["median_days_in_location"] == 21.5  # 12 days and 31 days since reception
+    assert first["max_days_in_location"] == 31
+    assert second["batch_period"] is None
+    assert second["buckets"] == {"0-30": 0, "31-90": 1, "90+": 0}
+
+
+def test_aging_bucket_edges():
+    ages = [0, 30, 31, 90, 91]
+    rows = [(1, "Bodega", "EDGE", None, NOW - timedelta(days=age), None) for age in ages]
+
+    assert aging_summary(rows, NOW)["by_bucket"] == {"0-30": 2, "31-90": 2, "90+": 1}
+
+
+def test_aging_summary_empty():
+    assert aging_summary([], NOW) == {
+        "total_units": 0, "by_bucket": {"0-30": 0, "31-90": 0, "90+": 0}, "groups": [],
+    }
+
+
+def test_days_to_sell_summary():
+    rows = [
+        ("M1", datetime(2025, 1, 1), datetime(2025, 1, 11, tzinfo=timezone.utc)),
+        ("M1", datetime(2025, 1, 1), datetime(2025, 1, 31)),
+        ("M2", datetime(2025, 1, 1), datetime(2025, 1, 2)),
+    ]
+
+    assert days_to_sell_summary(rows) == [
+        {"model": "M1", "sales": 2, "median_days": 20.0, "p90_days": 28.0},
+        {"model": "M2", "sales": 1, "median_days": 1.0, "p90_days": 1.0},
+    ]
+    assert days_to_sell_summary([]) == []
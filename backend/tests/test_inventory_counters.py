@@ -0,0 +1,125 @@
+"""Integration tests for the incrementally maintained inventory_counters table."""
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.models import InventoryCounter, Unit, UnitStatus
+from app.services.inventory_counters import reconcile_counters
+
+
+def _counter(db_session, location_id, status, model, product_type=""):
+    row = db_session.get(InventoryCounter, (location_id, status, model, product_type))
+    db_session.rollback()  # end the read so the next request sees fresh data
+    return row.count if row else 0
+
+
+async def _create_unit(client, auth_headers, location_id, engine, model="CNT-MODEL"):
+    payload = {
+        "model": model,
+        "brand": "Thunderrol",
+        "color": "Rojo",
+        "current_location_id": location_id,
+        "engine_number": engine,
+        "status": "AVAILABLE",
+    }
+    response = await client.post("/api/v1/units/", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_unit_lifecycle(client: AsyncClient, auth_headers, test_locations, db_session):
+    """Create, move, re-status and delete keep the counters exact."""
+    origin, destination = test_locations[0].id, test_locations[1].id
+    unit_id = await _create_unit(client, auth_headers, origin, "CNT-ENG-001")
+    assert _counter(db_session, origin, UnitStatus.AVAILABLE, "CNT-MODEL") == 1
+
+    response = await client.put(
+        f"/api/v1/units/{unit_id}",
+        json={"current_location_id": destination, "status": "SOLD"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert _counter(db_session, origin, UnitStatus.AVAILABLE, "CNT-MODEL") == 0
+    assert _counter(db_session, destination, UnitStatus.SOLD, "CNT-MODEL") == 1
+
+    response = await client.delete(f"/api/v1/units/{unit_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert _counter(db_session, destination, UnitStatus.SOLD, "CNT-MODEL") == 0
+    assert reconcile_counters(db_session, dry_run=True) == []
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_transfers(client: AsyncClient, auth_headers, test_locations, db_session):
+    """Dispatching and receiving a unit moves it between counters."""
+    origin, destination = test_locations[0].id, test_locations[1].id
+    unit_id = await _create_unit(client, auth_headers, origin, "CNT-ENG-002", model="CNT-TRANSFER")
+
+    response = await client.post(
+        f"/api/v1/units/{unit_id}/transfer",
+        json={"from_location_id": origin, "to_location_id": destination, "unit_ids": [unit_id]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert _counter(db_session, origin, UnitStatus.IN_TRANSIT, "CNT-TRANSFER") == 1
+
+    transfer = (await client.get(f"/api/v1/units/{unit_id}/active-transfer", headers=auth_headers)).json()
+    response = await client.put(
+        f"/api/v1/transfers/{transfer['id']}", json={"status": "RECEIVED"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert _counter(db_session, origin, UnitStatus.IN_TRANSIT, "CNT-TRANSFER") == 0
+    assert _counter(db_session, destination, UnitStatus.AVAILABLE, "CNT-TRANSFER") == 1
+    assert reconcile_counters(db_session, dry_run=True) == []
+
+    await client.delete(f"/api/v1/units/{unit_id}", headers=auth_headers)
+
+
+def test_counters_track_expired_attributes(db_session, test_locations):
+    """Changing an attribute expired by a previous commit still decrements the old counter."""
+    unit = Unit(
+        engine_number="CNT-ENG-003", brand="Thunderrol", model="CNT-EXPIRED", color="Azul",
+        current_location_id=test_locations[0].id, status=UnitStatus.AVAILABLE,
+    )
+    db_session.add(unit)
+    db_session.commit()  # expires every attribute of ``unit``
+
+    unit.status = UnitStatus.SOLD
+    db_session.commit()
+
+    assert _counter(db_session, test_locations[0].id, UnitStatus.AVAILABLE, "CNT-EXPIRED") == 0
+    assert _counter(db_session, test_locations[0].id, UnitStatus.SOLD, "CNT-EXPIRED") == 1
+
+    db_session.delete(unit)
+    db_session.commit()
+    assert reconcile_counters(db_session, dry_run=True) == []
+
+
+def test_reconcile_reports_and_repairs_drift(db_session, test_locations):
+    """The reconciliation rebuilds a tampered counter and reports the difference."""
+    unit = Unit(
+        engine_number="CNT-ENG-004", brand="Thunderrol", model="CNT-DRIFT", color="Verde",
+        current_location_id=test_locations[1].id, status=UnitStatus.AVAILABLE,
+    )
+    db_session.add(unit)
+    db_session.commit()
+    counter = db_session.get(
+        InventoryCounter, (test_locations[1].id, UnitStatus.AVAILABLE, "CNT-DRIFT", "")
+    )
+    counter.count = 5
+    db_session.commit()
+
+    drift = reconcile_counters(db_session)
+
+    assert drift == [{
+        "location_id": test_locations[1].id,
+        "status": "AVAILABLE",
+        "model": "CNT-DRIFT",
+        "product_type": None,
+        "expected": 1,
+        "actual": 5,
+    }]
+    assert reconcile_counters(db_session, dry_run=True) == []
+
+    db_session.delete(unit)
+    db_session.commit()
@@ -0,0 +1,146 @@
+"""Tests for the in-memory inventory cube and the pivot endpoint."""
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.cache import UNITS_VERSION, current_data_version
+from app.models.models import Location, Unit, UnitStatus
+from app.services.inventory_cube import InventoryCube, PivotDimension, inventory_cube
+from app.services.unit_index import UnitIndex
+
+LOCATION, MODEL, COLOR, STATUS = (
+    PivotDimension.LOCATION, PivotDimension.MODEL, PivotDimension.COLOR, PivotDimension.STATUS,
+)
+
+
+@pytest.fixture
+def cube_units(make_units, test_locations):
+    return make_units(prefix="CUBE", each=[
+        {"model": model, "color": color, "current_location_id": test_locations[location].id,
+         "status": status}
+        for model, color, location, status in [
+            ("CUBE-A", "Rojo", 0, UnitStatus.AVAILABLE),
+            ("CUBE-A", "Rojo", 0, UnitStatus.AVAILABLE),
+            ("CUBE-A", "Azul", 1, UnitStatus.SOLD),
+            ("CUBE-B", "Rojo", 1, UnitStatus.AVAILABLE),
+        ]
+    ])
+
+
+def test_unit_index_subclasses_must_implement_every_hook():
+    class Unfinished(UnitIndex):
+        def _load(self, db):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        Unfinished()
+
+
+def test_pivot_counts_and_filters(db_session, test_locations, cube_units):
+    cube = InventoryCube()
+    cube.build(db_session)
+    models = {MODEL: ["CUBE-A", "CUBE-B"]}
+
+    assert cube.pivot([MODEL], models) == [
+        {"model": "CUBE-A", "count": 3}, {"model": "CUBE-B", "count": 1},
+    ]
+    assert cube.pivot([MODEL, COLOR], {**models, STATUS: ["AVAILABLE"]}) == [
+        {"model": "CUBE-A", "color": "Rojo", "count": 2},
+        {"model": "CUBE-B", "color": "Rojo", "count": 1},
+    ]
+    assert cube.pivot([LOCATION], {MODEL: ["CUBE-A"], STATUS: [UnitStatus.SOLD]}) == [
+        {"location": test_locations[1].id, "count": 1},
+    ]
+    assert cube.pivot([], {MODEL: ["CUBE-A"]}) == [{"count": 3}]
+    assert cube.pivot([MODEL], {MODEL: ["NOPE"]}) == []
+
+
+def test_cube_follows_commits_incrementally(db_session, test_locations, cube_units):
+    inventory_cube.ensure_fresh(db_session)
+    size = inventory_cube.size
+
+    cube_units[0].status = UnitStatus.SOLD
+    db_session.add(Unit(
+        engine_number="CUBE-ENG-NEW", brand="Thunderrol", model="CUBE-B", color="Negro",
+        current_location_id=test_locations[0].id, status=UnitStatus.AVAILABLE,
+    ))
+    db_session.delete(cube_units[3])
+    db_session.commit()
+
+    # Applied from the commit's deltas: same version as the database, no rebuild.
+    assert inventory_cube.version == current_data_version(db_session, UNITS_VERSION)
+    assert inventory_cube.size == size + 1
+    assert inventory_cube.pivot([MODEL, STATUS], {MODEL: ["CUBE-A", "CUBE-B"]}) == [
+        {"model": "CUBE-A", "status": "SOLD", "count": 2},
+        {"model": "CUBE-A", "status": "AVAILABLE", "count": 1},
+        {"model": "CUBE-B", "status": "AVAILABLE", "count": 1},
+    ]
+
+
+def test_cube_rebuilds_after_bulk_update(db_session, cube_units):
+    inventory_cube.ensure_fresh(db_session)
+
+    db_session.query(Unit).filter(Unit.model == "CUBE-B").update({"color": "Verde"})
+    db_session.commit()
+    assert inventory_cube.version is None
+
+    inventory_cube.ensure_fresh(db_session)
+    assert inventory_cube.pivot([COLOR], {MODEL: ["CUBE-B"]}) == [{"color": "Verde", "count": 1}]
+
+
+def test_cube_ignores_writes_to_other_tables(db_session, cube_units):
+    """Only unit writes move the version the cube follows."""
+    inventory_cube.ensure_fresh(db_session)
+    version = inventory_cube.version
+
+    location = Location(name="Cube Bystander", address="Calle 1")
+    db_session.add(location)
+    db_session.commit()
+    db_session.delete(location)
+    db_session.commit()
+
+    assert current_data_version(db_session, UNITS_VERSION) == version
+    assert inventory_cube.version == version
+
+
+def test_cube_rebuilds_without_holding_its_lock(db_session, cube_units, monkeypatch):
+    """Pivots are served from the old arrays while new ones are loaded."""
+    cube = InventoryCube()
+    cube.build(db_session)
+    seen = []
+    append = InventoryCube._append
+
+    def checking_append(self, unit_id, values):
+        seen.append(cube._lock.locked())
+        append(self, unit_id, values)
+
+    monkeypatch.setattr(InventoryCube, "_append", checking_append)
+    cube.invalidate()
+    cube.ensure_fresh(db_session)
+
+    assert seen and not any(seen)
+    assert cube.pivot([], {MODEL: ["CUBE-A"]}) == [{"count": 3}]
+
+
+@pytest.mark.asyncio
+async def test_pivot_endpoint(client: AsyncClient, auth_headers, test_locations, cube_units):
+    response = await client.get(
+        "/api/v1/reports/pivot",
+        params=[("dimensions", "location"), ("dimensions", "status"), ("model", "CUBE-A")],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["dimensions"] == ["location", "status"]
+    assert data["total_units"] == 3
+    first = data["rows"][0]
+    assert (first["location"], first["status"], first["count"]) == (
+        test_locations[0].id, "AVAILABLE", 2,
+    )
+    assert first["location_name"]
+
+    response = await client.get(
+        "/api/v1/reports/pivot", params={"dimensions": "size"}, headers=auth_headers
+    )
+    assert response.status_code == 422
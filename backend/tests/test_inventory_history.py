@@ -0,0 +1,197 @@
+"""Tests for the daily inventory snapshots and their history backfill."""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.models import (
+    InventoryCheckpointUnit,
+    InventorySnapshot,
+    Transfer,
+    TransferStatus,
+    Unit,
+    UnitStatus,
+)
+from app.services.inventory_history import (
+    backfill_snapshots,
+    checkpoint_due,
+    replay_daily_counts,
+    take_checkpoint,
+    take_snapshot,
+    today,
+    units_as_of,
+)
+
+MODEL = "HIST-MODEL"
+
+
+def _model_counts(counts):
+    return {(loc, status): n for (loc, status, model), n in counts.items() if model == MODEL}
+
+
+@pytest.fixture
+def moved_and_sold_unit(db_session, test_locations):
+    """Created at the first location on Jan 1st, moved on the 5th-7th, sold on the 10th."""
+    origin, destination = test_locations[0].id, test_locations[1].id
+    unit = Unit(
+        engine_number="HIST-ENG-001", brand="Thunderrol", model=MODEL, color="Negro",
+        current_location_id=destination, status=UnitStatus.SOLD,
+        sold_date=datetime(2025, 1, 10, 12, 0), created_at=datetime(2025, 1, 1, 12, 0),
+    )
+    db_session.add(unit)
+    db_session.flush()
+    db_session.add(Transfer(
+        unit_id=unit.id, origin_location_id=origin, destination_location_id=destination,
+        status=TransferStatus.RECEIVED,
+        dispatched_at=datetime(2025, 1, 5, 12, 0), received_at=datetime(2025, 1, 7, 12, 0),
+    ))
+    db_session.commit()
+    yield unit, origin, destination
+
+    db_session.query(InventorySnapshot).delete()
+    db_session.query(Transfer).filter(Transfer.unit_id == unit.id).delete()
+    db_session.delete(unit)
+    db_session.commit()
+
+
+def test_replay_follows_transfers_and_sale(db_session, moved_and_sold_unit):
+    _, origin, destination = moved_and_sold_unit
+
+    by_day = replay_daily_counts(db_session, date(2024, 12, 31), date(2025, 1, 11))
+
+    assert _model_counts(by_day[date(2024, 12, 31)]) == {}
+    assert _model_counts(by_day[date(2025, 1, 1)]) == {(origin, UnitStatus.AVAILABLE): 1}
+    assert _model_counts(by_day[date(2025, 1, 4)]) == {(origin, UnitStatus.AVAILABLE): 1}
+    assert _model_counts(by_day[date(2025, 1, 5)]) == {(origin, UnitStatus.IN_TRANSIT): 1}
+    assert _model_counts(by_day[date(2025, 1, 7)]) == {(destination, UnitStatus.AVAILABLE): 1}
+    assert _model_counts(by_day[date(2025, 1, 10)]) == {(destination, UnitStatus.SOLD): 1}
+    assert _model_counts(by_day[date(2025, 1, 11)]) == {(destination, UnitStatus.SOLD): 1}
+
+
+def test_backfill_and_snapshot_are_idempotent(db_session, moved_and_sold_unit):
+    _, origin, _ = moved_and_sold_unit
+
+    def rows(day):
+        return db_session.query(InventorySnapshot).filter(
+            InventorySnapshot.snapshot_date == day, InventorySnapshot.model == MODEL
+        ).all()
+
+    backfill_snapshots(db_session, date(2025, 1, 1), date(2025, 1, 12))
+    backfill_snapshots(db_session, date(2025, 1, 1), date(2025, 1, 12))
+    (row,) = rows(date(2025, 1, 3))
+    assert (row.location_id, row.status, row.count) == (origin, UnitStatus.AVAILABLE, 1)
+
+    first = take_snapshot(db_session)
+    assert take_snapshot(db_session) == first
+    (row,) = rows(today())
+    assert (row.status, row.count) == (UnitStatus.SOLD, 1)
+
+
+@pytest.mark.asyncio
+async def test_inventory_history_endpoint(
+    client: AsyncClient, auth_headers, db_session, moved_and_sold_unit
+):
+    backfill_snapshots(db_session, date(2025, 1, 1), date(2025, 1, 12))
+    db_session.rollback()
+
+    response = await client.get(
+        "/api/v1/reports/inventory/history",
+        params={"model": MODEL, "date_from": "2025-01-04", "date_to": "2025-01-08"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    series = response.json()["series"]
+    assert [point["date"] for point in series] == [
+        str(date(2025, 1, 4) + timedelta(days=i)) for i in range(5)
+    ]
+    assert series[0]["by_status"] == {"AVAILABLE": 1}
+    assert series[1]["by_status"] == {"IN_TRANSIT": 1}
+    assert series[3]["by_status"] == {"AVAILABLE": 1}
+    assert all(point["count"] == 1 for point in series)
+
+
+def test_units_as_of_without_checkpoint(db_session, moved_and_sold_unit):
+    unit, origin, destination = moved_and_sold_unit
+    only = [Unit.id == unit.id]
+
+    assert units_as_of(db_session, datetime(2024, 12, 31, tzinfo=timezone.utc), only) == {}
+    assert units_as_of(db_session, datetime(2025, 1, 3, tzinfo=timezone.utc), only) == {
+        unit.id: (origin, UnitStatus.AVAILABLE)
+    }
+    assert units_as_of(db_session, datetime(2025, 1, 6, tzinfo=timezone.utc), only) == {
+        unit.id: (origin, UnitStatus.IN_TRANSIT)
+    }
+    assert units_as_of(db_session, datetime(2025, 2, 1, tzinfo=timezone.utc), only) == {
+        unit.id: (destination, UnitStatus.SOLD)
+    }
+
+
+def test_units_as_of_replays_from_checkpoint(db_session, moved_and_sold_unit):
+    """Only events after the checkpoint are replayed on top of its saved state."""
+    unit, origin, destination = moved_and_sold_unit
+    checkpoint = take_checkpoint(db_session, taken_at=datetime(2025, 1, 6, tzinfo=timezone.utc))
+    # A saved state the log alone could not produce proves the checkpoint is used.
+    db_session.query(InventoryCheckpointUnit).filter(
+        InventoryCheckpointUnit.checkpoint_id == checkpoint.id,
+        InventoryCheckpointUnit.unit_id == unit.id,
+    ).update({"location_id": origin, "status": UnitStatus.WAREHOUSE_UNIDENTIFIED})
+    db_session.commit()
+    only = [Unit.id == unit.id]
+
+    assert units_as_of(db_session, datetime(2025, 1, 6, 6, tzinfo=timezone.utc), only) == {
+        unit.id: (origin, UnitStatus.WAREHOUSE_UNIDENTIFIED)
+    }
+    assert units_as_of(db_session, datetime(2025, 1, 8, tzinfo=timezone.utc), only) == {
+        unit.id: (destination, UnitStatus.AVAILABLE)
+    }
+    assert units_as_of(db_session, datetime(2025, 1, 11, tzinfo=timezone.utc), only) == {
+        unit.id: (destination, UnitStatus.SOLD)
+    }
+    assert checkpoint_due(db_session)  # the only checkpoint is long past
+
+    db_session.delete(checkpoint)
+    db_session.commit()
+
+
+def test_units_as_of_location_reads_moved_units_from_checkpoint(db_session, moved_and_sold_unit):
+    """A location filter keeps saved rows elsewhere when their events may bring them in."""
+    unit, origin, destination = moved_and_sold_unit
+    checkpoint = take_checkpoint(db_session, taken_at=datetime(2025, 1, 4, tzinfo=timezone.utc))
+    db_session.query(InventoryCheckpointUnit).filter(
+        InventoryCheckpointUnit.checkpoint_id == checkpoint.id,
+        InventoryCheckpointUnit.unit_id == unit.id,
+    ).update({"location_id": origin, "status": UnitStatus.AVAILABLE})
+    db_session.commit()
+    only = [Unit.id == unit.id]
+
+    def at(day, location_id):
+        return units_as_of(
+            db_session, datetime(2025, 1, day, tzinfo=timezone.utc), only, location_id
+        )
+
+    assert at(4, origin) == {unit.id: (origin, UnitStatus.AVAILABLE)}
+    assert at(4, destination) == {}
+    assert at(6, origin) == {unit.id: (origin, UnitStatus.IN_TRANSIT)}
+    assert at(8, destination) == {unit.id: (destination, UnitStatus.AVAILABLE)}
+    assert at(8, origin) == {}
+
+    db_session.delete(checkpoint)
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_inventory_report_as_of(client: AsyncClient, auth_headers, moved_and_sold_unit):
+    response = await client.get(
+        "/api/v1/reports/inventory",
+        params={"model": MODEL, "as_of": "2025-01-03T00:00:00Z"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["total_units"] == 1
+    assert report["summary"]["by_status"] == {"AVAILABLE": 1}
+    assert report["units"][0]["status"] == "AVAILABLE"
+    assert report["units"][0]["location"] == "Test Bodega"
@@ -0,0 +1,132 @@
+"""Accept-based MessagePack/CBOR responses, gzip for large bodies, per-representation ETags."""
+
+import gzip
+import uuid
+
+import cbor2
+import msgpack
+import pytest
+from httpx import AsyncClient
+
+from app.core.negotiation import CBOR, JSON, MSGPACK, negotiate
+
+
+def test_negotiate_honours_q_values_and_order():
+    assert negotiate(None) == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("application/msgpack") == MSGPACK
+    assert negotiate("application/x-msgpack, application/json;q=0.5") == MSGPACK
+    assert negotiate("application/cbor;q=0.4, application/json") == JSON
+    assert negotiate("application/json;q=0.1, Application/CBOR;q=0.9") == CBOR
+    assert negotiate("application/cbor, application/msgpack") == CBOR
+    assert negotiate("text/html, application/msgpack;q=0") == JSON
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_in_msgpack_and_cbor(client: AsyncClient, auth_headers, test_locations):
+    """The binary bodies decode to exactly the JSON payload."""
+    as_json = await client.get("/api/v1/locations/", headers=auth_headers)
+    assert as_json.headers["vary"] == "Accept"
+    payload = as_json.json()
+    assert payload
+
+    response = await client.get(
+        "/api/v1/locations/", headers={**auth_headers, "Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert msgpack.unpackb(response.content) == payload
+
+    response = await client.get(
+        f"/api/v1/locations/{test_locations[0].id}", headers={**auth_headers, "Accept": CBOR}
+    )
+    assert response.headers["content-type"] == CBOR
+    detail = next(location for location in payload if location["id"] == test_locations[0].id)
+    assert cbor2.loads(response.content) == detail
+
+
+@pytest.mark.asyncio
+async def test_errors_are_negotiated_too(client: AsyncClient, auth_headers):
+    response = await client.get(
+        "/api/v1/locations/999999", headers={**auth_headers, "Accept": MSGPACK}
+    )
+    assert response.status_code == 404
+    assert msgpack.unpackb(response.content) == {"detail": "Location not found"}
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_gzipped(client: AsyncClient):
+    """Bodies over 1 KiB are compressed for clients sending Accept-Encoding: gzip."""
+    response = await client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["openapi"]
+
+    response = await client.get(
+        "/openapi.json", headers={"Accept-Encoding": "gzip", "Accept": MSGPACK}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert msgpack.unpackb(response.content)["openapi"]
+
+    response = await client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    with pytest.raises(gzip.BadGzipFile):
+        gzip.decompress(response.content)
+
+    response = await client.get("/api/v1/locations/999999", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 401
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_exports_are_not_gzipped_twice(client: AsyncClient, auth_headers, make_units):
+    """A ``gzip=true`` export is a gzip file already: it is sent as it is."""
+    # Random serials, so the export stays over 1 KiB even once compressed.
+    make_units(prefix="NEG", each=[
+        {"engine_number": uuid.uuid4().hex, "chassis_number": uuid.uuid4().hex}
+        for _ in range(100)
+    ])
+    response = await client.get(
+        "/api/v1/reports/export/inventory",
+        params={"format": "csv", "gzip": True},
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+    assert len(response.content) > 1024
+    assert b"NEG-M" in gzip.decompress(response.content)
+
+
+@pytest.mark.asyncio
+async def test_each_representation_has_its_own_etag(client: AsyncClient, auth_headers):
+    """JSON, MessagePack and gzip bodies never share a strong ETag; each revalidates to 304."""
+    url = "/api/v1/reports/timeseries"
+    # A year of empty daily buckets: well over the gzip threshold.
+    params = {"granularity": "day", "date_from": "2025-01-01", "date_to": "2025-12-31"}
+
+    async def get(accept=JSON, encoding="identity", etag=None):
+        headers = {**auth_headers, "Accept": accept, "Accept-Encoding": encoding}
+        if etag:
+            headers["If-None-Match"] = etag
+        return await client.get(url, params=params, headers=headers)
+
+    as_json, as_msgpack = await get(), await get(MSGPACK)
+    gzipped = await get(encoding="gzip")
+    assert gzipped.headers["content-encoding"] == "gzip"
+    tags = {as_json.headers["etag"], as_msgpack.headers["etag"], gzipped.headers["etag"]}
+    assert len(tags) == 3
+    assert as_msgpack.headers["etag"] == as_json.headers["etag"][:-1] + '-msgpack"'
+
+    for response, accept, encoding in (
+        (as_json, JSON, "identity"), (as_msgpack, MSGPACK, "identity"), (gzipped, JSON, "gzip"),
+    ):
+        etag = response.headers["etag"]
+        revalidated = await get(accept, encoding, etag)
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+
+    # Another representation's validator does not match this one.
+    assert (await get(MSGPACK, etag=as_json.headers["etag"])).status_code == 200
+    assert (await get(JSON, etag=as_msgpack.headers["etag"])).status_code == 200
@@ -0,0 +1,98 @@
+"""Query-count guards for report and list endpoints.
+
+Each endpoint must issue a fixed number of SQL statements however many rows it
+returns, so per-row lazy loads (N+1) show up as a failing count. Counts include
+the authenticated-user lookup, and for cached reports the data-version read.
+"""
+
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.cache import stats_cache
+from app.models.models import Import, Transfer, TransferStatus, Unit, UnitStatus
+from app.services.report_cache import report_cache
+
+ENDPOINT_QUERIES = [
+    ("/api/v1/reports/dashboard", 9),
+    ("/api/v1/reports/inventory", 4),
+    ("/api/v1/reports/transfers", 4),
+    ("/api/v1/reports/sales", 4),
+    ("/api/v1/imports/", 2),
+    ("/api/v1/units/", 2),
+    ("/api/v1/transfers/", 2),
+    ("/api/v1/transfers/stats", 3),
+]
+
+
+@pytest.fixture
+def many_rows(db_session, test_users, test_locations):
+    """Several units, transfers (with users and locations) and imports to list."""
+    origin, destination = test_locations[0], test_locations[1]
+    units = [
+        Unit(
+            engine_number=f"QC-ENG-{i}", brand="Thunderrol", model="QC", color="Rojo",
+            current_location_id=destination.id,
+            status=UnitStatus.SOLD if i % 2 else UnitStatus.AVAILABLE,
+        )
+        for i in range(4)
+    ]
+    db_session.add_all(units)
+    db_session.flush()
+    transfers = [
+        Transfer(
+            unit_id=unit.id, dispatched_by_id=test_users[0].id, received_by_id=test_users[1].id,
+            origin_location_id=origin.id, destination_location_id=destination.id,
+            status=TransferStatus.RECEIVED, dispatched_at=datetime.now(), received_at=datetime.now(),
+        )
+        for unit in units
+    ]
+    imports = [
+        Import(
+            filename=f"qc-{i}.xlsx", original_filename=f"qc-{i}.xlsx", total_records=1,
+            successful_imports=1, failed_imports=0, user_id=test_users[i % 2].id,
+            status="completed",
+        )
+        for i in range(4)
+    ]
+    db_session.add_all(transfers + imports)
+    db_session.commit()
+    yield
+
+    for row in transfers + imports + units:
+        db_session.delete(row)
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url, expected", ENDPOINT_QUERIES)
+async def test_endpoint_query_count_is_fixed(
+    client: AsyncClient, auth_headers, count_queries, many_rows, url, expected
+):
+    stats_cache.clear()
+    report_cache.clear()
+
+    with count_queries() as statements:
+        response = await client.get(url, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(statements) == expected, "\n".join(statements)
+
+
+@pytest.mark.asyncio
+async def test_dashboard_recent_rows_are_flat(
+    client: AsyncClient, auth_headers, db_session, test_users, test_locations, many_rows
+):
+    """Names in the dashboard lists come from the joined projection."""
+    origin, destination, user = test_locations[0], test_locations[1], test_users[0]
+    for row in (origin, destination, user):
+        db_session.refresh(row)
+    data = (await client.get("/api/v1/reports/dashboard", headers=auth_headers)).json()
+
+    transfer = next(t for t in data["recent_transfers"] if (t["unit_engine"] or "").startswith("QC-"))
+    assert transfer["origin_location"] == origin.name
+    assert transfer["destination_location"] == destination.name
+    assert transfer["dispatched_by"] == f"{user.first_name} {user.last_name}"
+    imports = [i for i in data["recent_imports"] if i["filename"].startswith("qc-")]
+    assert imports and all(i["user"] for i in imports)
@@ -1,12 +1,23 @@
 """Unit tests for ReportService."""
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
+import enum
+import gzip
+import io
+import json
 from datetime import datetime, timezone
-import pandas as pd
-from fastapi import Response
+from fastapi.responses import StreamingResponse
+from openpyxl import load_workbook
 
+from app.core.pagination import decode_cursor
 from app.services.report import ReportService
+from app.services.report_export import (
+    ExportFormat, excel_value, iter_copy_csv, iter_csv, iter_gzip, iter_ndjson, iter_xlsx,
+)
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
 from app.models.models import Unit, Location, Transfer, Import, UnitStatus, TransferStatus
 
 
@@ -14,10 +25,22 @@ from app.models.models import Unit, Location, Transfer, Import, UnitStatus, Tran
 # get_dashboard_stats
 # ---------------------------------------------------------------------------
 
+def _counts_row(**counts):
+    """A conditional-aggregate result row usable for both unit and transfer counts."""
+    values = {
+        "total": 0, "available": 0, "sold": 0, "in_transit": 0,
+        "pending": 0, "received": 0, "cancelled": 0,
+    }
+    values.update(counts)
+    row = MagicMock(**values)
+    row._mapping = values
+    return row
+
+
 def test_get_dashboard_stats():
     """Returns dashboard stats with all expected keys."""
     mock_db = MagicMock()
-    mock_db.query.return_value.count.return_value = 0
+    mock_db.query.return_value.one.return_value = _counts_row()
     mock_db.query.return_value.options.return_value.order_by.return_value.limit.return_value.all.return_value = []
     mock_db.query.return_value.join.return_value.group_by.return_value.all.return_value = []
     mock_db.query.return_value.group_by.return_value.all.return_value = []
@@ -39,10 +62,40 @@ def test_get_dashboard_stats():
     assert "in_transit" in result["units"]
 
 
+def test_get_dashboard_stats_single_pass_counts():
+    """Headline counters come from one aggregate row per entity."""
+    mock_db = MagicMock()
+    mock_db.query.return_value.one.return_value = _counts_row(
+        total=7, available=4, sold=2, in_transit=1, pending=3,
+    )
+    mock_db.query.return_value.join.return_value.group_by.return_value.all.return_value = [
+        MagicMock(count=5), MagicMock(count=2),
+    ]
+
+    result = ReportService.get_dashboard_stats(mock_db)
+
+    assert result["units"] == {"total": 7, "available": 4, "sold": 2, "in_transit": 1}
+    assert result["transfers"]["active"] == 4
+    assert result["locations"]["total"] == 2
+
+
+def test_get_dashboard_stats_is_cached():
+    """A second call within the TTL does not hit the database again."""
+    mock_db = MagicMock()
+    mock_db.query.return_value.one.return_value = _counts_row()
+
+    first = ReportService.get_dashboard_stats(mock_db)
+    calls = mock_db.query.call_count
+    second = ReportService.get_dashboard_stats(mock_db)
+
+    assert second is first
+    assert mock_db.query.call_count == calls
+
+
 def test_get_dashboard_stats_empty_db():
     """Dashboard stats with empty DB returns expected structure."""
     mock_db = MagicMock()
-    mock_db.query.return_value.count.return_value = 0
+    mock_db.query.return_value.one.return_value = _counts_row()
     mock_db.query.return_value.options.return_value.order_by.return_value.limit.return_value.all.return_value = []
     mock_db.query.return_value.join.return_value.group_by.return_value.all.return_value = []
     mock_db.query.return_value.group_by.return_value.all.return_value = []
@@ -59,10 +112,28 @@ def test_get_dashboard_stats_empty_db():
 # get_inventory_report
 # ---------------------------------------------------------------------------
 
+def _inventory_db(summary_rows=(), unit_rows=()):
+    """Mock DB for the SQLite path: UNION ALL summary + projected unit page."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "sqlite"
+    query = mock_db.query.return_value
+    query.filter.return_value.group_by.return_value.union_all.return_value.all.return_value = list(summary_rows)
+    query.join.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = list(unit_rows)
+    query.join.return_value.filter.return_value.order_by.return_value.filter.return_value.limit.return_value.all.return_value = list(unit_rows)
+    return mock_db
+
+
+def _unit_row(unit_id, status=UnitStatus.AVAILABLE):
+    return MagicMock(
+        id=unit_id, engine_number=f"E{unit_id}", chassis_number=None, brand="Thunderrol",
+        model="TR", color="Red", location="Bodega", status=status,
+        created_at=datetime(2025, 1, 1), sold_date=None,
+    )
+
+
 def test_get_inventory_report_no_filters():
     """Returns inventory report without filters."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.all.return_value = []
+    mock_db = _inventory_db()
 
     result = ReportService.get_inventory_report(mock_db)
 
@@ -70,28 +141,32 @@ def test_get_inventory_report_no_filters():
     assert "summary" in result
     assert "units" in result
     assert result["total_units"] == 0
+    assert result["pagination"]["next_cursor"] is None
 
 
 def test_get_inventory_report_with_filters():
-    """Applies filters to inventory query."""
-    mock_db = MagicMock()
-    unit = Unit(id=1, brand="Thunderrol", model="TR", color="Red",
-                status=UnitStatus.AVAILABLE, engine_number="E1")
-    unit.current_location = Location(id=1, name="Bodega")
-    mock_db.query.return_value.options.return_value.filter.return_value.filter.return_value.all.return_value = [unit]
+    """Summary comes from the aggregated rows, units from the projected page."""
+    mock_db = _inventory_db(
+        summary_rows=[
+            MagicMock(dimension="status", key="AVAILABLE", count=1),
+            MagicMock(dimension="location", key="Bodega", count=1),
+        ],
+        unit_rows=[_unit_row(1)],
+    )
 
     result = ReportService.get_inventory_report(
         mock_db, brand="Thunderrol", status=UnitStatus.AVAILABLE
     )
 
     assert result["total_units"] == 1
-    assert "AVAILABLE" in result["summary"]["by_status"]
+    assert result["summary"] == {"by_status": {"AVAILABLE": 1}, "by_location": {"Bodega": 1}}
+    assert result["units"][0]["location"] == "Bodega"
+    assert result["units"][0]["status"] == "AVAILABLE"
 
 
 def test_get_inventory_report_no_results():
     """Returns empty report when no units match filters."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.filter.return_value.all.return_value = []
+    mock_db = _inventory_db()
 
     result = ReportService.get_inventory_report(mock_db, brand="NonExistent")
 
@@ -99,17 +174,53 @@ def test_get_inventory_report_no_results():
     assert result["units"] == []
 
 
+def test_get_inventory_report_keyset_page():
+    """Fetches limit + 1 rows to detect a next page and cursors on the last id."""
+    mock_db = _inventory_db(unit_rows=[_unit_row(4), _unit_row(7), _unit_row(9)])
+
+    result = ReportService.get_inventory_report(mock_db, limit=2)
+
+    assert [u["id"] for u in result["units"]] == [4, 7]
+    assert result["pagination"]["has_next"] is True
+    assert decode_cursor(result["pagination"]["next_cursor"], 1) == [7]
+
+
+def test_get_inventory_report_grouping_sets_on_postgresql():
+    """On PostgreSQL both breakdowns come from one GROUPING SETS query."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "postgresql"
+    location_row = MagicMock(status_rolled_up=1, status=None, count=2)
+    location_row.name = "Bodega"  # ``name`` is reserved by the MagicMock constructor
+    query = mock_db.query.return_value
+    query.join.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        MagicMock(status_rolled_up=0, status=UnitStatus.SOLD, count=2),
+        location_row,
+    ]
+    query.join.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+
+    result = ReportService.get_inventory_report(mock_db)
+
+    assert result["summary"] == {"by_status": {"SOLD": 2}, "by_location": {"Bodega": 2}}
+    assert result["total_units"] == 2
+
+
 # ---------------------------------------------------------------------------
 # get_transfers_report
 # ---------------------------------------------------------------------------
 
+def _transfers_db(summary_rows=(), page_rows=()):
+    """Mock DB for the SQLite path: grouped summary + projected page."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "sqlite"
+    query = mock_db.query.return_value.filter.return_value
+    query.group_by.return_value.all.return_value = list(summary_rows)
+    query.order_by.return_value.offset.return_value.limit.return_value.all.return_value = list(page_rows)
+    return mock_db
+
+
 def test_get_transfers_report():
     """Returns transfers report with pagination."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
-    mock_db.query.return_value.options.return_value.count.return_value = 0
-    mock_db.query.return_value.group_by.return_value.all.return_value = []
-    mock_db.query.return_value.filter.return_value.group_by.return_value.order_by.return_value.all.return_value = []
+    mock_db = _transfers_db()
 
     result = ReportService.get_transfers_report(mock_db, skip=0, limit=10)
 
@@ -122,27 +233,62 @@ def test_get_transfers_report():
 
 
 def test_get_transfers_report_pagination():
-    """Pagination metadata is correct."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
-    mock_db.query.return_value.options.return_value.count.return_value = 25
-    mock_db.query.return_value.group_by.return_value.all.return_value = []
-    mock_db.query.return_value.filter.return_value.group_by.return_value.order_by.return_value.all.return_value = []
+    """Pagination metadata is correct; the extra fetched row only signals a next page."""
+    page_rows = [
+        MagicMock(id=20 - i, dispatched_at=datetime(2025, 1, 20 - i), status=TransferStatus.RECEIVED)
+        for i in range(11)
+    ]
+    mock_db = _transfers_db(summary_rows=[(TransferStatus.RECEIVED, None, 25)], page_rows=page_rows)
 
     result = ReportService.get_transfers_report(mock_db, skip=10, limit=10)
 
+    assert result["total_transfers"] == 25
+    assert len(result["transfers"]) == 10
     assert result["pagination"]["has_next"] is True
     assert result["pagination"]["has_previous"] is True
+    assert decode_cursor(result["pagination"]["next_cursor"], 2) == ["2025-01-11T00:00:00", 11]
+
+
+def test_get_transfers_report_summaries_from_one_grouped_query():
+    """Total, by_status and by_month all come from the filtered status x month rows."""
+    mock_db = _transfers_db(summary_rows=[
+        (TransferStatus.RECEIVED, "2025-01-10 18:00:00", 2),
+        (TransferStatus.RECEIVED, "2025-03-02 18:00:00", 1),
+        (TransferStatus.IN_TRANSIT, "2025-03-05 18:00:00", 4),
+    ])
+
+    result = ReportService.get_transfers_report(mock_db, location_id=1)
+
+    assert result["total_transfers"] == 7
+    assert result["summary"]["by_status"] == {"RECEIVED": 3, "IN_TRANSIT": 4}
+    assert result["summary"]["by_month"] == [
+        {"month": "2025-01", "count": 2},
+        {"month": "2025-02", "count": 0},
+        {"month": "2025-03", "count": 5},
+    ]
+    # Summary and page are filtered alike; nothing else hits the database.
+    assert mock_db.query.call_count == 2
+    assert mock_db.query.return_value.filter.call_count == 2
+    assert all(len(call.args) == 1 for call in mock_db.query.return_value.filter.call_args_list)
 
 
 # ---------------------------------------------------------------------------
 # get_sales_report
 # ---------------------------------------------------------------------------
 
+def _sales_db(summary_rows=(), sale_rows=()):
+    """Mock DB for the SQLite path: grouped sales summary + projected sales rows."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "sqlite"
+    query = mock_db.query.return_value
+    query.outerjoin.return_value.filter.return_value.group_by.return_value.all.return_value = list(summary_rows)
+    query.join.return_value.outerjoin.return_value.filter.return_value.order_by.return_value.all.return_value = list(sale_rows)
+    return mock_db
+
+
 def test_get_sales_report():
     """Returns sales report."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.filter.return_value.all.return_value = []
+    mock_db = _sales_db()
 
     result = ReportService.get_sales_report(mock_db)
 
@@ -151,78 +297,201 @@ def test_get_sales_report():
     assert "sales" in result
 
 
-def test_get_sales_report_by_location():
-    """Filters sales by location using subquery."""
-    mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.filter.return_value.all.return_value = []
+def test_get_sales_report_summaries_from_fact_table():
+    """Location, model, batch period and month summaries roll up one grouped query."""
+    mock_db = _sales_db(summary_rows=[
+        (1, "Bodega", "TR-1", "2025-A", "2025-01-10 18:00:00", 2),
+        (2, "Taller", "TR-1", None, "2025-02-10 18:00:00", 1),
+        (1, "Bodega", "TR-2", "2025-A", "2025-02-11 18:00:00", 4),
+    ])
 
     result = ReportService.get_sales_report(mock_db, location_id=1)
 
-    assert result["total_sales"] == 0
+    summary = result["summary"]
+    assert result["total_sales"] == 7
+    assert summary["by_location"] == [
+        {"location_id": 1, "location": "Bodega", "count": 6},
+        {"location_id": 2, "location": "Taller", "count": 1},
+    ]
+    assert summary["by_model"] == [{"model": "TR-2", "count": 4}, {"model": "TR-1", "count": 3}]
+    assert summary["by_batch_period"] == [
+        {"batch_period": "2025-A", "count": 6},
+        {"batch_period": None, "count": 1},
+    ]
+    assert summary["by_month"] == [{"month": "2025-01", "count": 2}, {"month": "2025-02", "count": 5}]
+
+
+def test_get_cohort_report_rolls_up_one_grouped_query():
+    """Cohorts sum their rows; sell-through is sold / units and locations exclude sold units."""
+    mock_db = MagicMock()
+    grouped = mock_db.query.return_value.join.return_value.filter.return_value.group_by.return_value
+    grouped.all.return_value = [
+        ("2025-A", "Moto", "Bodega", UnitStatus.AVAILABLE, 2),
+        ("2025-A", "Moto", "Taller", UnitStatus.SOLD, 3),
+        ("2025-A", "Moto", "Taller", UnitStatus.AVAILABLE, 1),
+        (None, None, "Bodega", UnitStatus.WAREHOUSE_UNIDENTIFIED, 4),
+    ]
+
+    result = ReportService.get_cohort_report(mock_db)
+
+    assert mock_db.query.call_count == 1
+    assert result["total_units"] == 10
+    batch, unbatched = result["cohorts"]
+    assert batch == {
+        "batch_period": "2025-A",
+        "product_type": "Moto",
+        "units": 6,
+        "sold": 3,
+        "sell_through": 50.0,
+        "by_status": {"AVAILABLE": 3, "SOLD": 3},
+        "by_location": {"Bodega": 2, "Taller": 1},
+    }
+    assert unbatched["batch_period"] is None
+    assert unbatched["sell_through"] == 0.0
 
 
 # ---------------------------------------------------------------------------
-# _prepare_df_for_excel
+# report_export
 # ---------------------------------------------------------------------------
 
-def test_prepare_df_for_excel_strips_timezone():
-    """Removes timezone info from datetime columns."""
-    df = pd.DataFrame({
-        "name": ["A", "B"],
-        "created_at": [
-            datetime(2025, 1, 1, tzinfo=timezone.utc),
-            datetime(2025, 6, 1, tzinfo=timezone.utc),
-        ],
-    })
+def test_excel_value_strips_timezone():
+    """Aware datetimes keep their wall-clock time without the offset."""
+    value = excel_value(datetime(2025, 1, 1, 8, 30, tzinfo=timezone.utc))
+    assert value == datetime(2025, 1, 1, 8, 30)
+    assert value.tzinfo is None
+
+
+def test_excel_value_enum_and_passthrough():
+    """Enums are written as their value; other values are unchanged."""
+    class Color(enum.Enum):
+        RED = "red"
+
+    assert excel_value(Color.RED) == "red"
+    assert excel_value(UnitStatus.SOLD) == "SOLD"
+    assert excel_value(3) == 3
+    assert excel_value(None) is None
 
-    result = ReportService._prepare_df_for_excel(df)
 
-    assert result["created_at"].dtype.name.startswith("datetime")
-    assert result["created_at"].iloc[0].tzinfo is None
-    assert result["created_at"].iloc[1].tzinfo is None
+def test_iter_xlsx_builds_lazy_sheets():
+    """Sheets and rows are consumed from generators into a valid workbook."""
+    def sheets():
+        yield "Data", ["id", "name"], ((i, f"row {i}") for i in range(3))
+        yield "Summary", ["Item", "Count"], [("rows", 3)]
 
+    workbook = load_workbook(io.BytesIO(b"".join(iter_xlsx(sheets()))), read_only=True)
+
+    assert workbook.sheetnames == ["Data", "Summary"]
+    rows = list(workbook["Data"].values)
+    assert rows[0] == ("id", "name")
+    assert rows[-1] == (2, "row 2")
+    assert list(workbook["Summary"].values)[1] == ("rows", 3)
+
+
+def test_iter_csv_writes_text_values():
+    """CSV rows carry enum values and ISO datetimes under a header line."""
+    rows = [(1, UnitStatus.SOLD, datetime(2025, 1, 2, 3, 4))]
+
+    text = b"".join(iter_csv(["id", "status", "sold_date"], rows)).decode()
+
+    assert text.splitlines() == ["id,status,sold_date", "1,SOLD,2025-01-02T03:04:00"]
+
+
+def test_iter_ndjson_one_object_per_line():
+    """Each row becomes one JSON object keyed by the header."""
+    rows = [(1, UnitStatus.AVAILABLE), (2, None)]
+
+    lines = b"".join(iter_ndjson(["id", "status"], rows)).decode().splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "status": "AVAILABLE"},
+        {"id": 2, "status": None},
+    ]
+
+
+def test_iter_copy_csv_streams_copy_output():
+    """PostgreSQL CSV comes from COPY ... TO STDOUT, relayed chunk by chunk."""
+    mock_db = MagicMock()
+    connection = mock_db.connection.return_value
+    connection.dialect = postgresql.dialect()
+    cursor = connection.connection.driver_connection.cursor.return_value.__enter__.return_value
+    copied = []
 
-def test_prepare_df_for_excel_no_datetime_columns():
-    """Leaves non-datetime columns unchanged."""
-    df = pd.DataFrame({"name": ["A"], "count": [1]})
-    result = ReportService._prepare_df_for_excel(df)
-    assert list(result.columns) == ["name", "count"]
+    def copy_expert(sql, sink):
+        copied.append(sql)
+        for line in (b"id,status\n", b"1,SOLD\n", b"2,SOLD\n"):
+            sink.write(memoryview(line))
+
+    cursor.copy_expert.side_effect = copy_expert
+    query = MagicMock()
+    query.statement = select(Unit.id, Unit.status).where(Unit.status == UnitStatus.SOLD)
+
+    output = b"".join(iter_copy_csv(mock_db, query))
+
+    assert output == b"id,status\n1,SOLD\n2,SOLD\n"
+    assert copied[0].startswith("COPY (SELECT units.id, units.status")
+    assert "units.status = 'SOLD'" in copied[0]
+    assert copied[0].endswith("TO STDOUT WITH (FORMAT csv, HEADER)")
+
+
+def test_iter_gzip_round_trip():
+    """Compressed chunks decompress back to the original stream."""
+    chunks = [b"id,name\n", b"1,a\n" * 1000]
+
+    assert gzip.decompress(b"".join(iter_gzip(chunks))) == b"".join(chunks)
 
 
 # ---------------------------------------------------------------------------
-# export_inventory_excel
+# export_inventory
 # ---------------------------------------------------------------------------
 
-@patch.object(ReportService, "get_inventory_report")
-def test_export_inventory_excel(mock_report):
-    """Returns a Response with Excel content-type."""
-    mock_db = MagicMock()
-    mock_report.return_value = {
-        "units": [{"id": 1, "brand": "T", "model": "M"}],
-        "summary": {"by_status": {"available": 1}},
-    }
+def test_export_inventory_excel():
+    """Returns a streaming Excel response without touching the DB up front."""
+    mock_db = _inventory_db(
+        summary_rows=[MagicMock(dimension="status", key="AVAILABLE", count=1)],
+    )
 
-    result = ReportService.export_inventory_excel(mock_db)
+    result = ReportService.export_inventory(mock_db)
 
-    assert isinstance(result, Response)
+    assert isinstance(result, StreamingResponse)
     assert "spreadsheetml" in result.media_type
     assert "attachment" in result.headers["content-disposition"]
+    mock_db.query.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
-# export_sales_excel
+# export_transfers
 # ---------------------------------------------------------------------------
 
-@patch.object(ReportService, "get_sales_report")
-def test_export_sales_excel(mock_report):
-    """Returns a Response with Excel content-type."""
+def test_export_transfers_excel():
+    """Returns a streaming Excel response."""
     mock_db = MagicMock()
-    mock_report.return_value = {
-        "sales": [{"id": 1, "brand": "T"}],
-        "summary": {"by_month": [{"month": "2025-01", "count": 1}]},
-    }
 
-    result = ReportService.export_sales_excel(mock_db)
+    result = ReportService.export_transfers(mock_db, date_from=datetime(2025, 1, 1))
+
+    assert isinstance(result, StreamingResponse)
+    assert "transfers_report" in result.headers["content-disposition"]
+
 
-    assert isinstance(result, Response)
+# ---------------------------------------------------------------------------
+# export_sales
+# ---------------------------------------------------------------------------
+
+def test_export_sales_excel():
+    """Returns a streaming Excel response."""
+    mock_db = MagicMock()
+
+    result = ReportService.export_sales(mock_db)
+
+    assert isinstance(result, StreamingResponse)
     assert "spreadsheetml" in result.media_type
+
+
+def test_export_sales_csv_gzip():
+    """CSV exports can be gzip-compressed on the fly."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "sqlite"
+
+    result = ReportService.export_sales(mock_db, fmt=ExportFormat.CSV, compress=True)
+
+    assert result.media_type == "application/gzip"
+    assert ".csv.gz" in result.headers["content-disposition"]
@@ -1,9 +1,15 @@
 """Test report endpoints."""
 
-from datetime import datetime
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
 
 import pytest
 from httpx import AsyncClient
+from openpyxl import load_workbook
+
+from app.models.models import Transfer, TransferStatus, Unit, UnitStatus
 
 
 @pytest.mark.asyncio
@@ -57,6 +63,57 @@ async def test_get_inventory_report_with_filters(client: AsyncClient, auth_heade
         assert unit["status"] == "AVAILABLE"
 
 
+@pytest.mark.asyncio
+async def test_get_inventory_report_keyset_pagination(client: AsyncClient, auth_headers, test_locations, db_session):
+    """Pages follow next_cursor without overlap; the summary always covers every match."""
+    units = [
+        Unit(
+            engine_number=f"PAGE-ENG-{i}", brand="PageBrand", model="PG", color="Gris",
+            current_location_id=test_locations[0].id, status=UnitStatus.AVAILABLE,
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(units)
+    db_session.commit()
+
+    first = await client.get(
+        "/api/v1/reports/inventory", params={"brand": "PageBrand", "limit": 2}, headers=auth_headers
+    )
+    assert first.status_code == 200
+    first_data = first.json()
+    assert first_data["total_units"] == 3
+    assert first_data["summary"]["by_status"] == {"AVAILABLE": 3}
+    assert first_data["summary"]["by_location"] == {test_locations[0].name: 3}
+    assert len(first_data["units"]) == 2
+    assert first_data["pagination"]["has_next"] is True
+
+    second = await client.get(
+        "/api/v1/reports/inventory",
+        params={"brand": "PageBrand", "limit": 2, "cursor": first_data["pagination"]["next_cursor"]},
+        headers=auth_headers,
+    )
+    second_data = second.json()
+    assert second_data["total_units"] == 3
+    assert len(second_data["units"]) == 1
+    assert second_data["pagination"]["has_next"] is False
+    assert second_data["pagination"]["next_cursor"] is None
+    ids = [u["id"] for u in first_data["units"] + second_data["units"]]
+    assert ids == sorted(u.id for u in units)
+
+    for unit in units:
+        db_session.delete(unit)
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_get_inventory_report_invalid_cursor(client: AsyncClient, auth_headers, test_users, test_locations):
+    """A malformed cursor is rejected with 400."""
+    response = await client.get(
+        "/api/v1/reports/inventory", params={"cursor": "not-a-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_get_transfers_report(client: AsyncClient, auth_headers, test_users, test_locations):
     """Test transfers report endpoint."""
@@ -90,6 +147,67 @@ async def test_get_transfers_report_pagination(client: AsyncClient, auth_headers
     assert "has_previous" in pagination
 
 
+@pytest.mark.asyncio
+async def test_get_transfers_report_cursor_pagination(client: AsyncClient, auth_headers, db_session, test_users, test_locations):
+    """next_cursor pages through the report on (dispatched_at, id) without offsets."""
+    unit = Unit(model="TR-Cursor", brand="Thunderrol", color="Red", current_location_id=test_locations[0].id)
+    db_session.add(unit)
+    db_session.flush()
+    transfers = [
+        Transfer(
+            unit_id=unit.id,
+            origin_location_id=test_locations[0].id,
+            destination_location_id=test_locations[1].id,
+            status=TransferStatus.RECEIVED,
+            dispatched_at=datetime(2019, 6, day),
+        )
+        for day in (1, 2, 2, 3, 4)
+    ]
+    db_session.add_all(transfers)
+    db_session.commit()
+
+    params = {"date_from": "2019-06-01T00:00:00", "date_to": "2019-06-30T00:00:00", "limit": 2}
+    seen, cursor = [], None
+    while True:
+        response = await client.get(
+            "/api/v1/reports/transfers",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_transfers"] == 5
+        seen += [t["id"] for t in data["transfers"]]
+        cursor = data["pagination"]["next_cursor"]
+        assert data["pagination"]["has_next"] is (cursor is not None)
+        if cursor is None:
+            break
+    assert seen == [t.id for t in sorted(transfers, key=lambda t: (t.dispatched_at, t.id), reverse=True)]
+
+
+@pytest.mark.asyncio
+async def test_get_transfers_report_summaries_follow_filters(
+    client: AsyncClient, auth_headers, test_locations, sold_unit_with_history
+):
+    """by_status and by_month only count the transfers matching the filters."""
+    response = await client.get(
+        "/api/v1/reports/transfers",
+        params={"location_id": test_locations[0].id},
+        headers=auth_headers,
+    )
+    data = response.json()
+    assert data["summary"]["by_status"]["RECEIVED"] >= 1
+    assert data["total_transfers"] == sum(data["summary"]["by_status"].values())
+    assert data["total_transfers"] == sum(m["count"] for m in data["summary"]["by_month"])
+
+    response = await client.get(
+        "/api/v1/reports/transfers", params={"location_id": 999999}, headers=auth_headers
+    )
+    data = response.json()
+    assert data["total_transfers"] == 0
+    assert data["summary"] == {"by_status": {}, "by_month": []}
+
+
 @pytest.mark.asyncio
 async def test_get_sales_report(client: AsyncClient, auth_headers, test_users, test_locations):
     """Test sales report endpoint."""
@@ -130,6 +248,202 @@ async def test_export_sales_excel(client: AsyncClient, auth_headers, test_users,
     assert "attachment" in response.headers["content-disposition"]
 
 
+@pytest.mark.asyncio
+async def test_export_sales_excel_streams_rows(client: AsyncClient, auth_headers, sold_unit_with_history):
+    """The streamed workbook carries the sold unit and its monthly summary."""
+    response = await client.get("/api/v1/reports/export/sales", headers=auth_headers)
+    assert response.status_code == 200
+
+    workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == ["Sales", "Summary"]
+    sales = list(workbook["Sales"].values)
+    assert sales[0][:2] == ("id", "engine_number")
+    assert any(row[1] == "REG-ENG-001" for row in sales[1:])
+    summary = list(workbook["Summary"].values)
+    assert summary[0] == ("Month", "Count")
+    assert summary[1:] == [(item["month"], item["count"]) for item in (
+        await client.get("/api/v1/reports/sales", headers=auth_headers)
+    ).json()["summary"]["by_month"]]
+
+
+@pytest.mark.asyncio
+async def test_export_sales_csv(client: AsyncClient, auth_headers, sold_unit_with_history):
+    """format=csv streams a header line plus one line per sale."""
+    response = await client.get(
+        "/api/v1/reports/export/sales", params={"format": "csv"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,engine_number,chassis_number,brand,model,color,location,batch_period,sold_date"
+    assert any("REG-ENG-001" in line for line in lines[1:])
+
+
+@pytest.mark.asyncio
+async def test_export_inventory_ndjson_gzip(client: AsyncClient, auth_headers, sold_unit_with_history):
+    """format=ndjson&gzip=true streams gzip-compressed JSON lines."""
+    response = await client.get(
+        "/api/v1/reports/export/inventory",
+        params={"format": "ndjson", "gzip": "true"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert ".ndjson.gz" in response.headers["content-disposition"]
+    records = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+    unit = next(r for r in records if r["engine_number"] == "REG-ENG-001")
+    assert unit["status"] == "SOLD"
+    assert unit["location"]
+
+
+@pytest.mark.asyncio
+async def test_export_transfers_parquet(client: AsyncClient, auth_headers, sold_unit_with_history):
+    """format=parquet produces a typed Parquet file."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = await client.get(
+        "/api/v1/reports/export/transfers", params={"format": "parquet"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names[:2] == ["id", "unit_id"]
+    assert str(table.schema.field("dispatched_at").type).startswith("timestamp")
+    assert "RECEIVED" in table.column("status").to_pylist()
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_unknown_format(client: AsyncClient, auth_headers):
+    """Unsupported formats fail validation."""
+    response = await client.get(
+        "/api/v1/reports/export/sales", params={"format": "xml"}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_time_series_weekly_sales(client: AsyncClient, auth_headers, sold_unit_with_history):
+    """Weekly sales buckets are filled from date_from up to the current week."""
+    response = await client.get(
+        "/api/v1/reports/timeseries",
+        params={"metric": "sales", "granularity": "week", "date_from": "2020-01-01T00:00:00"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["timezone"] == "America/Mexico_City"
+    assert data["series"][0]["bucket"] == "2019-12-30"
+    assert sum(item["count"] for item in data["series"]) >= 1
+    assert all(item["count"] == 0 for item in data["series"][:10])
+
+
+@pytest.mark.asyncio
+async def test_aging_report(client: AsyncClient, auth_headers, test_locations, sold_unit_with_history):
+    """Units in stock land in the 0-30 bucket; sold units feed days-to-sell."""
+    response = await client.post("/api/v1/units/", json={
+        "model": "AGING-MODEL", "brand": "Thunderrol", "color": "Gris",
+        "current_location_id": test_locations[0].id, "engine_number": "AGING-ENG-001",
+        "status": "AVAILABLE",
+    }, headers=auth_headers)
+    unit_id = response.json()["id"]
+
+    response = await client.get(
+        "/api/v1/reports/aging", params={"model": "AGING-MODEL"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["buckets"] == ["0-30", "31-90", "90+"]
+    assert data["by_bucket"] == {"0-30": 1, "31-90": 0, "90+": 0}
+    (group,) = data["groups"]
+    assert group["location_id"] == test_locations[0].id
+    assert group["buckets"]["0-30"] == 1
+
+    response = await client.get(
+        "/api/v1/reports/aging", params={"model": "RegModel"}, headers=auth_headers
+    )
+    assert response.json()["days_to_sell"][0]["model"] == "RegModel"
+    assert response.json()["total_units"] == 0
+
+    await client.delete(f"/api/v1/units/{unit_id}", headers=auth_headers)
+
+
+@pytest.mark.asyncio
+async def test_cohort_report(client: AsyncClient, auth_headers, db_session, test_locations):
+    units = [
+        Unit(
+            engine_number=f"COHORT-ENG-{i}", brand="Thunderrol", model="COHORT", color="Rojo",
+            batch_period="COHORT-2025", product_type="Scooter",
+            current_location_id=test_locations[0].id,
+            status=UnitStatus.SOLD if i == 0 else UnitStatus.AVAILABLE,
+        )
+        for i in range(4)
+    ]
+    db_session.add_all(units)
+    db_session.commit()
+
+    response = await client.get(
+        "/api/v1/reports/cohorts", params={"batch_period": "COHORT-2025"}, headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    (cohort,) = response.json()["cohorts"]
+    assert (cohort["units"], cohort["sold"], cohort["sell_through"]) == (4, 1, 25.0)
+    assert cohort["by_status"] == {"SOLD": 1, "AVAILABLE": 3}
+    assert sum(cohort["by_location"].values()) == 3
+
+    for unit in units:
+        db_session.delete(unit)
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_route_analytics(client: AsyncClient, auth_headers, db_session, test_locations):
+    """Each route reports its volume and transit-time percentiles within the date range."""
+    origin, destination = test_locations[0].id, test_locations[1].id
+    unit = Unit(
+        engine_number="ROUTE-ENG-001", brand="Thunderrol", model="ROUTE", color="Azul",
+        current_location_id=destination, status=UnitStatus.AVAILABLE,
+    )
+    db_session.add(unit)
+    db_session.flush()
+    dispatched = datetime(2024, 2, 1, 12, 0)
+    transfers = [
+        Transfer(
+            unit_id=unit.id, origin_location_id=origin, destination_location_id=destination,
+            status=TransferStatus.RECEIVED, dispatched_at=dispatched,
+            received_at=dispatched + timedelta(hours=hours),
+        )
+        for hours in (24, 48)
+    ]
+    db_session.add_all(transfers)
+    db_session.commit()
+
+    response = await client.get(
+        "/api/v1/reports/routes",
+        params={"date_from": "2024-01-01T00:00:00", "date_to": "2024-03-01T00:00:00"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_transfers"] == 2
+    (route,) = data["routes"]
+    assert (route["origin_location_id"], route["destination_location_id"]) == (origin, destination)
+    assert route["transit_hours"]["p50"] == 36.0
+    assert route["transit_hours"]["max"] == 48.0
+
+    for row in transfers + [unit]:
+        db_session.delete(row)
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_time_series_rejects_unknown_timezone(client: AsyncClient, auth_headers):
+    response = await client.get(
+        "/api/v1/reports/timeseries", params={"tz": "Nowhere/City"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_dashboard_sales_by_month_with_sold_unit(
     client: AsyncClient, auth_headers, sold_unit_with_history
@@ -171,14 +485,60 @@ async def test_transfers_report_by_month_with_transfer(
         assert len(row["month"]) == 7  # YYYY-MM
 
 
+@pytest.mark.asyncio
+async def test_report_etag_conditional_get(client: AsyncClient, auth_headers, test_locations):
+    """Reports carry a strong ETag; a matching If-None-Match gets 304 until data changes."""
+    url = "/api/v1/reports/inventory"
+    params = {"brand": "Thunderrol", "limit": 5}
+    response = await client.get(url, params=params, headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    # Parameter order does not matter; the cached body is byte-identical.
+    again = await client.get(url, params={"limit": 5, "brand": "Thunderrol"}, headers=auth_headers)
+    assert again.headers["etag"] == etag
+    assert again.content == response.content
+
+    not_modified = await client.get(
+        url, params=params, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    other_filters = await client.get(
+        url, params={"brand": "Other"}, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert other_filters.status_code == 200
+
+    created = await client.post("/api/v1/units/", json={
+        "model": "ETAG-MODEL", "brand": "Thunderrol", "color": "Gris",
+        "current_location_id": test_locations[0].id, "engine_number": "ETAG-ENG-001",
+        "status": "AVAILABLE",
+    }, headers=auth_headers)
+    assert created.status_code == 200
+
+    changed = await client.get(url, params=params, headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    await client.delete(f"/api/v1/units/{created.json()['id']}", headers=auth_headers)
+
+
 @pytest.mark.asyncio
 async def test_reports_require_auth(client: AsyncClient):
     """Test that report endpoints require authentication."""
     endpoints = [
         "/api/v1/reports/dashboard",
         "/api/v1/reports/inventory",
+        "/api/v1/reports/inventory/history",
+        "/api/v1/reports/aging",
+        "/api/v1/reports/routes",
+        "/api/v1/reports/cohorts",
+        "/api/v1/reports/pivot",
         "/api/v1/reports/transfers",
         "/api/v1/reports/sales",
+        "/api/v1/reports/timeseries",
         "/api/v1/reports/export/inventory",
         "/api/v1/reports/export/transfers",
         "/api/v1/reports/export/sales",
@@ -0,0 +1,39 @@
+"""Unit tests for the transfer route analytics summary."""
+
+from datetime import datetime, timedelta, timezone
+
+from app.services.route_analytics import route_summary
+
+NAMES = {1: "Bodega", 2: "Taller", 3: "Sucursal"}
+START = datetime(2025, 5, 1, 12, 0)
+
+
+def _row(origin, destination, hours, volume):
+    received = START + timedelta(hours=hours) if hours is not None else None
+    return (origin, destination, START, received, volume)
+
+
+def test_route_summary_percentiles_and_ordering():
+    rows = [_row(1, 2, hours, 4) for hours in (10, 20, 30, None)] + [_row(2, 3, 5, 1)]
+
+    first, second = route_summary(rows, NAMES)
+
+    assert (first["origin_location"], first["destination_location"]) == ("Bodega", "Taller")
+    assert (first["transfers"], first["received"], first["in_transit"]) == (4, 3, 1)
+    assert first["transit_hours"] == {"p50": 20.0, "p95": 29.0, "mean": 20.0, "max": 30.0}
+    assert second["destination_location_id"] == 3
+    assert second["transit_hours"]["p50"] == 5.0
+
+
+def test_route_summary_handles_aware_timestamps_and_open_routes():
+    aware = START.replace(tzinfo=timezone.utc)
+    rows = [
+        (1, 3, aware, aware + timedelta(hours=2), 1),
+        (3, 1, START, None, 1),
+    ]
+
+    by_route = {(r["origin_location_id"], r["destination_location_id"]): r for r in route_summary(rows, NAMES)}
+
+    assert by_route[(1, 3)]["transit_hours"]["p95"] == 2.0
+    assert by_route[(3, 1)]["transit_hours"] == {"p50": None, "p95": None, "mean": None, "max": None}
+    assert route_summary([], NAMES) == []
@@ -0,0 +1,73 @@
+"""Integration tests for the sales fact table."""
+
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.models import Sale, Unit, UnitStatus
+
+
+def _sale(db_session, unit_id):
+    sale = db_session.query(Sale).filter(Sale.unit_id == unit_id).one_or_none()
+    db_session.rollback()  # end the read so the next request sees fresh data
+    return sale
+
+
+@pytest.mark.asyncio
+async def test_sale_recorded_when_unit_marked_sold(
+    client: AsyncClient, auth_headers, test_locations, db_session
+):
+    """Selling a unit writes one sale at its location; deleting the unit removes it."""
+    location_id = test_locations[1].id
+    response = await client.post("/api/v1/units/", json={
+        "model": "SALE-MODEL", "brand": "Thunderrol", "color": "Rojo",
+        "current_location_id": location_id, "engine_number": "SALE-ENG-001",
+        "status": "AVAILABLE",
+    }, headers=auth_headers)
+    unit_id = response.json()["id"]
+    assert _sale(db_session, unit_id) is None
+
+    response = await client.put(
+        f"/api/v1/units/{unit_id}", json={"status": "SOLD"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    sale = _sale(db_session, unit_id)
+    assert sale.location_id == location_id
+    assert sale.model == "SALE-MODEL"
+
+    report = (await client.get(
+        "/api/v1/reports/sales", params={"location_id": location_id, "model": "SALE-MODEL"},
+        headers=auth_headers,
+    )).json()
+    assert report["total_sales"] == 1
+    assert report["sales"][0]["engine_number"] == "SALE-ENG-001"
+    assert report["summary"]["by_location"][0]["location_id"] == location_id
+
+    await client.delete(f"/api/v1/units/{unit_id}", headers=auth_headers)
+    assert _sale(db_session, unit_id) is None
+
+
+def test_sale_follows_status_and_sold_date(db_session, test_locations):
+    """Leaving SOLD removes the sale; correcting sold_date moves sold_at."""
+    unit = Unit(
+        engine_number="SALE-ENG-002", brand="Thunderrol", model="SALE-STATUS", color="Azul",
+        batch_period="2025-B", current_location_id=test_locations[0].id,
+        status=UnitStatus.SOLD, sold_date=datetime(2025, 3, 1, tzinfo=timezone.utc),
+    )
+    db_session.add(unit)
+    db_session.commit()
+    sale = _sale(db_session, unit.id)
+    assert sale.batch_period == "2025-B"
+    assert sale.sold_at.replace(tzinfo=None) == datetime(2025, 3, 1)
+
+    unit.sold_date = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    db_session.commit()
+    assert _sale(db_session, unit.id).sold_at.replace(tzinfo=None) == datetime(2025, 4, 1)
+
+    unit.status = UnitStatus.AVAILABLE
+    db_session.commit()
+    assert _sale(db_session, unit.id) is None
+
+    db_session.delete(unit)
+    db_session.commit()
@@ -0,0 +1,172 @@
+"""Integration tests for shipments: dispatch and receive many units in one call."""
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.models import ShipmentStatus, Transfer, TransferStatus, UnitStatus
+from app.repositories.shipment_repository import ShipmentRepository
+from app.schemas.shipment import ShipmentReceive
+from app.services.inventory_counters import reconcile_counters
+from app.services.shipment_service import ShipmentService
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_dispatch_and_receive_in_two_scans(
+    client: AsyncClient, auth_headers, db_session, test_locations, make_units
+):
+    units = make_units(4, prefix="SHIP")
+    destination = test_locations[1].id
+    response = await client.post("/api/v1/shipments/", json={
+        "unit_ids": [u.id for u in units[:3]], "identifiers": ["ship-ch-3"],
+        "destination_location_id": destination, "notes": "Truck 7",
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    shipment = response.json()
+    assert (shipment["origin_location_id"], shipment["status"]) == (test_locations[0].id, "IN_TRANSIT")
+    assert [item["unit_id"] for item in shipment["items"]] == [u.id for u in units]
+    db_session.expire_all()
+    assert {u.status for u in units} == {UnitStatus.IN_TRANSIT}
+    transfers = db_session.query(Transfer).filter(Transfer.unit_id.in_([u.id for u in units])).all()
+    assert {(t.status, t.destination_location_id) for t in transfers} == {(TransferStatus.IN_TRANSIT, destination)}
+    assert {t.id for t in transfers} == {item["transfer_id"] for item in shipment["items"]}
+
+    open_to_destination = await client.get(
+        "/api/v1/shipments/", params={"destination_location_id": destination, "open": True},
+        headers=auth_headers,
+    )
+    assert shipment["id"] in [s["id"] for s in open_to_destination.json()]
+
+    url = f"/api/v1/shipments/{shipment['id']}/receive"
+    response = await client.post(url, json={"identifiers": ["SHIP-ENG-0", "ship-ch-1"]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "PARTIALLY_RECEIVED"
+    db_session.expire_all()
+    assert [(u.status, u.current_location_id) for u in units[:2]] == [(UnitStatus.AVAILABLE, destination)] * 2
+    assert units[2].status == UnitStatus.IN_TRANSIT
+
+    response = await client.post(url, json={}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "RECEIVED"
+    assert all(item["received_at"] for item in data["items"])
+    db_session.expire_all()
+    assert {t.status for t in db_session.query(Transfer).filter(Transfer.unit_id.in_([u.id for u in units]))} == {
+        TransferStatus.RECEIVED
+    }
+    assert reconcile_counters(db_session, dry_run=True) == []
+
+    response = await client.post(url, json={}, headers=auth_headers)
+    assert response.status_code == 400
+    closed = await client.get(
+        "/api/v1/shipments/", params={"destination_location_id": destination, "open": True},
+        headers=auth_headers,
+    )
+    assert shipment["id"] not in [s["id"] for s in closed.json()]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_receipts_finish_the_shipment(
+    client: AsyncClient, auth_headers, test_locations, test_users, make_units
+):
+    """Two scanners read the manifest, then receive overlapping parts one after the other."""
+    unit_ids = [unit.id for unit in make_units(3, prefix="SHIP")]
+    response = await client.post("/api/v1/shipments/", json={
+        "unit_ids": unit_ids, "destination_location_id": test_locations[1].id,
+    }, headers=auth_headers)
+    shipment_id = response.json()["id"]
+
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        # The second scanner's session still holds the manifest as it was before either receipt.
+        stale_items = ShipmentRepository.get_items_for_receipt(second, shipment_id)
+        assert all(item.received_at is None for item in stale_items)
+
+        received = ShipmentService.receive_shipment(
+            first, shipment_id, ShipmentReceive(unit_ids=unit_ids[:2]), test_users[0].id
+        )
+        assert received.status == ShipmentStatus.PARTIALLY_RECEIVED
+        received = ShipmentService.receive_shipment(
+            second, shipment_id, ShipmentReceive(unit_ids=unit_ids[1:]), test_users[1].id
+        )
+        assert received.status == ShipmentStatus.RECEIVED
+        assert [item.received_by_id for item in received.items] == [
+            test_users[0].id, test_users[0].id, test_users[1].id,
+        ]
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_is_all_or_nothing(client: AsyncClient, auth_headers, db_session, test_locations, make_units):
+    units = make_units(2, prefix="SHIP")
+    units[1].status = UnitStatus.IN_TRANSIT
+    db_session.commit()
+
+    response = await client.post("/api/v1/shipments/", json={
+        "unit_ids": [units[0].id, units[1].id, 999_999], "destination_location_id": test_locations[1].id,
+    }, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert [e["error"] for e in response.json()["detail"]["errors"]] == [
+        "Unit is already in transit", "Unit not found",
+    ]
+    db_session.expire_all()
+    assert units[0].status == UnitStatus.AVAILABLE
+    assert db_session.query(Transfer).filter(Transfer.unit_id == units[0].id).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_needs_a_single_origin(client: AsyncClient, auth_headers, test_locations, make_units):
+    units = make_units(1, prefix="SHIP-A") + make_units(
+        1, prefix="SHIP-B", current_location_id=test_locations[1].id
+    )
+    body = {"unit_ids": [u.id for u in units], "destination_location_id": test_locations[1].id}
+
+    response = await client.post("/api/v1/shipments/", json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert "origin_location_id" in response.json()["detail"]
+
+    response = await client.post(
+        "/api/v1/shipments/", json={**body, "origin_location_id": test_locations[0].id}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"][0]["error"] == "Unit is not at the origin location"
+
+
+@pytest.mark.asyncio
+async def test_receive_rejects_units_not_on_the_shipment(client: AsyncClient, auth_headers, test_locations, make_units):
+    units = make_units(2, prefix="SHIP")
+    shipment = (await client.post("/api/v1/shipments/", json={
+        "unit_ids": [units[0].id], "destination_location_id": test_locations[1].id,
+    }, headers=auth_headers)).json()
+
+    response = await client.post(
+        f"/api/v1/shipments/{shipment['id']}/receive", json={"unit_ids": [units[1].id]}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"] == [
+        {"key": str(units[1].id), "unit_id": None, "error": "Unit is not on this shipment"}
+    ]
+
+    response = await client.post("/api/v1/shipments/999999/receive", json={}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_dispatch_statement_count_is_independent_of_size(
+    client: AsyncClient, auth_headers, test_locations, make_units, count_queries
+):
+    """Dispatching 10 units costs what 2 do."""
+    counts = []
+    for prefix, size in (("SHIP-A", 2), ("SHIP-B", 10)):
+        unit_ids = [unit.id for unit in make_units(size, prefix=prefix)]
+        with count_queries() as statements:
+            response = await client.post("/api/v1/shipments/", json={
+                "unit_ids": unit_ids, "destination_location_id": test_locations[1].id,
+            }, headers=auth_headers)
+        assert response.status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
@@ -0,0 +1,106 @@
+"""Tests for the report time-series bucketing helpers."""
+
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.models.models import Unit, UnitStatus
+from app.services.timeseries import (
+    Granularity,
+    bucket_counts,
+    bucket_label,
+    bucket_of,
+    get_zone,
+    next_bucket,
+    truncate,
+)
+
+MEXICO_CITY = get_zone("America/Mexico_City")
+
+
+@pytest.mark.parametrize("granularity, expected", [
+    (Granularity.DAY, date(2025, 8, 14)),
+    (Granularity.WEEK, date(2025, 8, 11)),
+    (Granularity.MONTH, date(2025, 8, 1)),
+    (Granularity.QUARTER, date(2025, 7, 1)),
+])
+def test_truncate(granularity, expected):
+    assert truncate(date(2025, 8, 14), granularity) == expected
+
+
+def test_next_bucket_rolls_over_year():
+    assert next_bucket(date(2025, 12, 1), Granularity.MONTH) == date(2026, 1, 1)
+    assert next_bucket(date(2025, 10, 1), Granularity.QUARTER) == date(2026, 1, 1)
+    assert next_bucket(date(2025, 12, 29), Granularity.WEEK) == date(2026, 1, 5)
+
+
+def test_bucket_label():
+    assert bucket_label(date(2025, 8, 1), Granularity.MONTH) == "2025-08"
+    assert bucket_label(date(2025, 7, 1), Granularity.QUARTER) == "2025-Q3"
+    assert bucket_label(date(2025, 8, 11), Granularity.WEEK) == "2025-08-11"
+
+
+def test_bucket_of_uses_local_time():
+    """03:00 UTC on the 1st is still the previous month in Mexico City (UTC-6)."""
+    value = datetime(2025, 9, 1, 3, 0, tzinfo=timezone.utc)
+    assert bucket_of(value, Granularity.MONTH, MEXICO_CITY) == date(2025, 8, 1)
+    assert bucket_of(value.replace(tzinfo=None), Granularity.MONTH, MEXICO_CITY) == date(2025, 8, 1)
+
+
+def test_get_zone_rejects_unknown_timezone():
+    with pytest.raises(HTTPException) as exc:
+        get_zone("Mars/Olympus_Mons")
+    assert exc.value.status_code == 400
+
+
+def test_bucket_counts_postgresql_uses_date_trunc():
+    """PostgreSQL buckets natively with date_trunc in the requested timezone."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "postgresql"
+    query = mock_db.query.return_value.filter.return_value.group_by.return_value
+    query.all.return_value = [(datetime(2025, 1, 1), 2), (datetime(2025, 3, 1), 1)]
+
+    result = bucket_counts(mock_db, Unit.sold_date, Granularity.MONTH, tz="America/Mexico_City")
+
+    bucket = mock_db.query.call_args.args[0]
+    sql = str(bucket.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("date_trunc(")
+    assert "timezone(" in sql
+    assert [(r["bucket"], r["count"]) for r in result] == [
+        ("2025-01", 2), ("2025-02", 0), ("2025-03", 1),
+    ]
+
+
+def test_bucket_counts_sqlite_fills_range(db_session, test_locations):
+    """SQLite folds UTC hours into local buckets and fills empty ones."""
+    units = [
+        Unit(
+            engine_number=f"TS-ENG-{i}", brand="Thunderrol", model="TS", color="Azul",
+            current_location_id=test_locations[0].id, status=UnitStatus.SOLD, sold_date=sold,
+        )
+        for i, sold in enumerate([
+            datetime(2024, 1, 10, 12, 0),
+            datetime(2024, 3, 1, 3, 0),  # late February in Mexico City
+            datetime(2024, 3, 20, 12, 0),
+        ])
+    ]
+    db_session.add_all(units)
+    db_session.commit()
+
+    result = bucket_counts(
+        db_session, Unit.sold_date, Granularity.MONTH, tz="America/Mexico_City",
+        date_from=datetime(2023, 12, 15, tzinfo=timezone.utc),
+        date_to=datetime(2024, 4, 15, tzinfo=timezone.utc),
+        criteria=[Unit.model == "TS"],
+    )
+
+    assert [(r["bucket"], r["count"]) for r in result] == [
+        ("2023-12", 0), ("2024-01", 1), ("2024-02", 1), ("2024-03", 1), ("2024-04", 0),
+    ]
+
+    for unit in units:
+        db_session.delete(unit)
+    db_session.commit()
@@ -59,15 +59,15 @@ def test_get_transfer_not_found():
 # ---------------------------------------------------------------------------
 
 def test_create_transfer_success():
-    """Creates a transfer and commits."""
+    """Stages a transfer and flushes it; the caller's unit of work commits."""
     mock_db = MagicMock()
     transfer_data = TransferCreate(unit_id=1)
 
     result = TransferRepository.create_transfer(mock_db, transfer_data)
 
     mock_db.add.assert_called_once()
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once()
+    mock_db.flush.assert_called_once()
+    mock_db.commit.assert_not_called()
     assert result is not None
 
 
@@ -83,9 +83,9 @@ def test_update_transfer_success():
 
     result = TransferRepository.update_transfer(mock_db, existing, update_data)
 
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once()
+    mock_db.commit.assert_not_called()
     assert result is existing
+    assert existing.status == TransferStatus.RECEIVED
 
 
 # ---------------------------------------------------------------------------
@@ -93,14 +93,14 @@ def test_update_transfer_success():
 # ---------------------------------------------------------------------------
 
 def test_delete_transfer_success():
-    """Deletes transfer and commits."""
+    """Deletes transfer without committing."""
     mock_db = MagicMock()
     transfer = Transfer(id=1)
 
     TransferRepository.delete_transfer(mock_db, transfer)
 
     mock_db.delete.assert_called_once_with(transfer)
-    mock_db.commit.assert_called_once()
+    mock_db.commit.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -131,8 +131,8 @@ def test_create_unit_transfer_success():
     )
 
     mock_db.add.assert_called_once()
-    mock_db.commit.assert_called_once()
-    assert result is not None
+    mock_db.commit.assert_not_called()
+    assert result.destination_location_id == 4
 
 
 # ---------------------------------------------------------------------------
@@ -55,47 +55,58 @@ def test_get_transfer_by_id_not_found(mock_repo):
 
 @patch("app.services.transfer_service.TransferRepository")
 @patch("app.services.transfer_service.UnitRepository")
-@patch("app.services.transfer_service.UserRepository")
-@patch("app.services.transfer_service.LocationRepository")
-def test_create_transfer_success(mock_loc, mock_user, mock_unit, mock_transfer):
+def test_create_transfer_success(mock_unit, mock_transfer):
     """Creates a transfer when all relations are valid."""
     mock_db = MagicMock()
     transfer_data = TransferCreate(unit_id=1, destination_location_id=2)
-    mock_unit.get_unit.return_value = Unit(id=1, current_location_id=1)
-    mock_loc.get_location.return_value = Location(id=2)
+    mock_transfer.get_existing_relations.return_value = {(Unit, 1), (Location, 2)}
+    unit = Unit(id=1, current_location_id=1, version=3)
+    mock_unit.get_unit.return_value = unit
     mock_transfer.create_transfer.return_value = Transfer(id=1)
 
     result = TransferService.create_transfer(mock_db, transfer_data)
     assert result is not None
+    assert (unit.status, unit.version) == (UnitStatus.IN_TRANSIT, 4)
+    mock_transfer.get_existing_relations.assert_called_once_with(
+        mock_db, [(Unit, 1), (Location, 2)]
+    )
 
 
 @patch("app.services.transfer_service.TransferRepository")
 @patch("app.services.transfer_service.UnitRepository")
-@patch("app.services.transfer_service.UserRepository")
-@patch("app.services.transfer_service.LocationRepository")
-def test_create_transfer_unit_not_found(mock_loc, mock_user, mock_unit, mock_transfer):
+def test_create_transfer_unit_not_found(mock_unit, mock_transfer):
     """Raises 404 when unit does not exist."""
     mock_db = MagicMock()
     transfer_data = TransferCreate(unit_id=999)
-    mock_unit.get_unit.return_value = None
+    mock_transfer.get_existing_relations.return_value = set()
 
     with pytest.raises(HTTPException) as exc:
         TransferService.create_transfer(mock_db, transfer_data)
     assert exc.value.status_code == 404
+    assert exc.value.detail == "Unit not found"
+
+
+@patch("app.services.transfer_service.TransferRepository")
+def test_create_transfer_reports_first_missing_relation(mock_transfer):
+    """Missing references are reported in field order: users before locations."""
+    mock_db = MagicMock()
+    transfer_data = TransferCreate(unit_id=1, received_by_id=5, origin_location_id=3)
+    mock_transfer.get_existing_relations.return_value = {(Unit, 1)}
+
+    with pytest.raises(HTTPException) as exc:
+        TransferService.create_transfer(mock_db, transfer_data)
+    assert exc.value.detail == "Receiving user not found"
 
 
 @patch("app.services.transfer_service.TransferRepository")
 @patch("app.services.transfer_service.UnitRepository")
-@patch("app.services.transfer_service.UserRepository")
-@patch("app.services.transfer_service.LocationRepository")
-def test_create_transfer_same_origin_destination(mock_loc, mock_user, mock_unit, mock_transfer):
+def test_create_transfer_same_origin_destination(mock_unit, mock_transfer):
     """Raises 400 when origin and destination are the same."""
     mock_db = MagicMock()
     transfer_data = TransferCreate(
         unit_id=1, origin_location_id=2, destination_location_id=2
     )
-    mock_unit.get_unit.return_value = Unit(id=1)
-    mock_loc.get_location.return_value = Location(id=2)
+    mock_transfer.get_existing_relations.return_value = {(Unit, 1), (Location, 2)}
 
     with pytest.raises(HTTPException) as exc:
         TransferService.create_transfer(mock_db, transfer_data)
@@ -108,19 +119,18 @@ def test_create_transfer_same_origin_destination(mock_loc, mock_user, mock_unit,
 
 @patch("app.services.transfer_service.TransferRepository")
 @patch("app.services.transfer_service.UnitRepository")
-@patch("app.services.transfer_service.UserRepository")
-@patch("app.services.transfer_service.LocationRepository")
-def test_update_transfer_success(mock_loc, mock_user, mock_unit, mock_transfer):
-    """Updates a transfer successfully."""
+def test_update_transfer_success(mock_unit, mock_transfer):
+    """Updates a transfer, checking only the references the update changes."""
     mock_db = MagicMock()
-    existing = Transfer(id=1, unit_id=1, status=TransferStatus.PENDING)
+    existing = Transfer(id=1, unit_id=1, origin_location_id=4, status=TransferStatus.PENDING)
     mock_transfer.get_transfer.return_value = existing
-    mock_unit.get_unit.return_value = Unit(id=1)
+    mock_transfer.get_existing_relations.return_value = {(User, 7)}
     mock_transfer.update_transfer.return_value = existing
 
-    update_data = TransferUpdate(status=TransferStatus.IN_TRANSIT)
+    update_data = TransferUpdate(status=TransferStatus.IN_TRANSIT, received_by_id=7)
     result = TransferService.update_transfer(mock_db, 1, update_data)
     assert result is existing
+    mock_transfer.get_existing_relations.assert_called_once_with(mock_db, [(User, 7)])
 
 
 @patch("app.services.transfer_service.TransferRepository")
@@ -168,8 +178,9 @@ def test_delete_transfer_not_found(mock_repo):
 def test_get_transfer_stats(mock_repo):
     """Returns transfer statistics."""
     mock_db = MagicMock()
-    mock_repo.count_transfers.return_value = 10
-    mock_repo.count_transfers_by_status.side_effect = [3, 4, 2, 1]
+    mock_repo.count_by_status.return_value = {
+        "total": 10, "pending": 3, "in_transit": 4, "received": 2, "cancelled": 1,
+    }
     mock_repo.get_recent_transfers.return_value = []
 
     result = TransferService.get_transfer_stats(mock_db)
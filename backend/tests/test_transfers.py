@@ -128,3 +128,57 @@ async def test_get_transfer_stats(client: AsyncClient, auth_headers, test_users,
     assert response.status_code == 200
     data = response.json()
     assert "total_transfers" in data
+
+
+@pytest.mark.asyncio
+async def test_get_transfers_cursor_pagination(client: AsyncClient, auth_headers, db_session, test_users, test_locations):
+    """Cursor pages of /transfers/ are disjoint and newest first."""
+    from app.models.models import Transfer, Unit
+
+    unit = Unit(model="TR-Cursor", brand="Thunderrol", color="Red", current_location_id=test_locations[0].id)
+    db_session.add(unit)
+    db_session.flush()
+    transfers = [
+        Transfer(unit_id=unit.id, origin_location_id=test_locations[0].id, destination_location_id=test_locations[1].id)
+        for _ in range(3)
+    ]
+    db_session.add_all(transfers)
+    db_session.commit()
+
+    first = await client.get("/api/v1/transfers/", params={"unit_id": unit.id, "limit": 2}, headers=auth_headers)
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    second = await client.get(
+        "/api/v1/transfers/", params={"unit_id": unit.id, "limit": 2, "cursor": cursor}, headers=auth_headers
+    )
+    assert second.status_code == 200
+    assert "X-Next-Cursor" not in second.headers
+    ids = [t["id"] for t in first.json()] + [t["id"] for t in second.json()]
+    assert ids == sorted((t.id for t in transfers), reverse=True)
+
+
+def test_relation_check_is_one_round_trip(db_session, test_users, test_locations, count_queries):
+    """Every referenced id is checked with one UNION ALL; loaded rows cost nothing."""
+    from app.models.models import Location, Unit, User
+    from app.repositories.transfer_repository import TransferRepository
+
+    unit = Unit(model="TR-Rel", brand="Thunderrol", color="Red", current_location_id=test_locations[0].id)
+    db_session.add(unit)
+    db_session.commit()
+    unit_id, user_id = unit.id, test_users[0].id
+    origin, destination = test_locations[0].id, test_locations[1].id
+    references = [
+        (Unit, unit_id), (User, user_id), (User, 999_999), (Location, origin), (Location, destination),
+    ]
+    db_session.expunge_all()
+
+    with count_queries() as statements:
+        existing = TransferRepository.get_existing_relations(db_session, references)
+    assert len(statements) == 1
+    assert existing == set(references) - {(User, 999_999)}
+
+    loaded = [db_session.get(Unit, unit_id), db_session.get(User, user_id)]  # noqa: F841 (held in the identity map)
+    with count_queries() as statements:
+        existing = TransferRepository.get_existing_relations(db_session, [(Unit, unit_id), (User, user_id)])
+    assert statements == []
+    assert existing == {(Unit, unit_id), (User, user_id)}
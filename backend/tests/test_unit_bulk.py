@@ -0,0 +1,156 @@
+"""Integration tests for the bulk unit endpoints (create, status, sell, move, delete)."""
+
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.models import Sale, Transfer, TransferStatus, Unit, UnitStatus
+from app.services.inventory_counters import reconcile_counters
+
+
+def _counters_in_step(db_session) -> bool:
+    return reconcile_counters(db_session, dry_run=True) == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_reports_each_item(client: AsyncClient, auth_headers, db_session, test_locations, make_units):
+    """Valid items are created in one go; duplicates and unknown locations fail per item."""
+    make_units(1, prefix="TAKEN")
+    unit = {"brand": "Thunderrol", "model": "BULK-M", "color": "Rojo", "current_location_id": test_locations[0].id}
+    response = await client.post("/api/v1/units/bulk", json={"units": [
+        {**unit, "engine_number": "bulk-new-1"},
+        {**unit, "engine_number": "TAKEN-ENG-0"},
+        {**unit, "engine_number": "BULK-NEW-1"},  # same as the first once normalized
+        {**unit, "engine_number": "BULK-NEW-2", "current_location_id": 999_999},
+        {**unit, "chassis_number": "BULK-NEW-CH"},
+    ]}, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 3)
+    assert [(r["key"], r["ok"]) for r in data["results"]] == [
+        ("0", True), ("1", False), ("2", False), ("3", False), ("4", True),
+    ]
+    assert data["results"][3]["error"] == "Location not found"
+    created = db_session.get(Unit, data["results"][0]["unit_id"])
+    assert created.engine_number == "BULK-NEW-1"
+    assert _counters_in_step(db_session)
+
+
+@pytest.mark.asyncio
+async def test_bulk_sell_by_ids_and_identifiers(client: AsyncClient, auth_headers, db_session, test_users, make_units):
+    """Selling writes status, sold_date, sales rows and RECEIVED transfers for every unit."""
+    units = make_units(3, prefix="BULK")
+    sold_date = "2025-05-01T12:00:00"
+    response = await client.post("/api/v1/units/bulk/sell", json={
+        "unit_ids": [units[0].id, 999_999],
+        "identifiers": ["bulk-ch-1", units[2].engine_number, units[0].engine_number],
+        "sold_date": sold_date,
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (3, 2)
+    assert [r["error"] for r in data["results"] if not r["ok"]] == [
+        "Unit not found", "Unit selected more than once",
+    ]
+    db_session.expire_all()
+    for unit in units:
+        assert unit.status == UnitStatus.SOLD
+        assert unit.sold_date.replace(tzinfo=None) == datetime(2025, 5, 1, 12)
+        assert db_session.query(Sale).filter(Sale.unit_id == unit.id).count() == 1
+        transfer = db_session.query(Transfer).filter(Transfer.unit_id == unit.id).one()
+        assert transfer.status == TransferStatus.RECEIVED
+        assert transfer.received_at is not None
+    assert _counters_in_step(db_session)
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_skips_units_already_in_status(client: AsyncClient, auth_headers, db_session, make_units):
+    units = make_units(2, prefix="BULK")
+    units[1].status = UnitStatus.WAREHOUSE_UNIDENTIFIED
+    db_session.commit()
+
+    response = await client.post("/api/v1/units/bulk/status", json={
+        "unit_ids": [u.id for u in units], "status": "WAREHOUSE_UNIDENTIFIED",
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 2
+    transfers = db_session.query(Transfer).filter(Transfer.unit_id.in_([u.id for u in units])).all()
+    assert [(t.unit_id, t.status) for t in transfers] == [(units[0].id, TransferStatus.PENDING)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_move_emits_transfers(client: AsyncClient, auth_headers, db_session, test_locations, make_units):
+    units = make_units(3, prefix="BULK")
+    destination = test_locations[1].id
+
+    response = await client.post("/api/v1/units/bulk/move", json={
+        "unit_ids": [u.id for u in units], "location_id": destination,
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 3
+    db_session.expire_all()
+    assert {u.current_location_id for u in units} == {destination}
+    transfers = db_session.query(Transfer).filter(Transfer.unit_id.in_([u.id for u in units])).all()
+    assert len(transfers) == 3
+    assert {(t.origin_location_id, t.destination_location_id, t.status) for t in transfers} == {
+        (test_locations[0].id, destination, TransferStatus.IN_TRANSIT)
+    }
+    assert _counters_in_step(db_session)
+
+    response = await client.post("/api/v1/units/bulk/move", json={
+        "unit_ids": [units[0].id], "location_id": 999_999,
+    }, headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_keeps_units_in_transit(client: AsyncClient, auth_headers, db_session, make_units):
+    units = make_units(3, prefix="BULK")
+    units[2].status = UnitStatus.IN_TRANSIT
+    db_session.add(Transfer(unit_id=units[0].id, status=TransferStatus.RECEIVED))
+    db_session.commit()
+    ids = [u.id for u in units]
+
+    response = await client.post("/api/v1/units/bulk/delete", json={"unit_ids": ids}, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["ok"] for r in data["results"]] == [True, True, False]
+    db_session.expire_all()
+    assert [u.id for u in db_session.query(Unit).filter(Unit.id.in_(ids))] == [ids[2]]
+    assert db_session.query(Transfer).filter(Transfer.unit_id == ids[0]).count() == 0
+    assert _counters_in_step(db_session)
+
+
+@pytest.mark.asyncio
+async def test_bulk_requests_are_validated(client: AsyncClient, auth_headers):
+    response = await client.post("/api/v1/units/bulk/sell", json={}, headers=auth_headers)
+    assert response.status_code == 422
+    response = await client.post(
+        "/api/v1/units/bulk/delete", json={"unit_ids": list(range(1, 1002))}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_move_statement_count_is_independent_of_batch_size(
+    client: AsyncClient, auth_headers, test_locations, make_units, count_queries
+):
+    """Moving 10 units costs the same number of statements as moving 2."""
+    counts = []
+    for prefix, size in (("BULK-A", 2), ("BULK-B", 10)):
+        unit_ids = [unit.id for unit in make_units(size, prefix=prefix)]
+        with count_queries() as statements:
+            response = await client.post(
+                "/api/v1/units/bulk/move",
+                json={"unit_ids": unit_ids, "location_id": test_locations[1].id},
+                headers=auth_headers,
+            )
+        assert response.json()["succeeded"] == size
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
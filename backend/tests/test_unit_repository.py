@@ -14,7 +14,7 @@ from app.schemas.unit import UnitCreate, UnitFilters, UnitUpdate
 def test_get_units_no_filters():
     """Returns paginated units without filters."""
     mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.offset.return_value.limit.return_value.all.return_value = []
+    mock_db.query.return_value.outerjoin.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
     filters = UnitFilters()
 
     result = UnitRepository.get_units(mock_db, filters, skip=0, limit=10)
@@ -24,7 +24,7 @@ def test_get_units_no_filters():
 def test_get_units_with_status_filter():
     """Applies status filter."""
     mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = []
+    mock_db.query.return_value.outerjoin.return_value.filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
     filters = UnitFilters(status=UnitStatus.AVAILABLE)
 
     result = UnitRepository.get_units(mock_db, filters, skip=0, limit=10)
@@ -34,7 +34,7 @@ def test_get_units_with_status_filter():
 def test_get_units_with_search_filter():
     """Applies search filter across multiple columns."""
     mock_db = MagicMock()
-    mock_db.query.return_value.options.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = []
+    mock_db.query.return_value.outerjoin.return_value.filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = []
     filters = UnitFilters(search="thunder")
 
     result = UnitRepository.get_units(mock_db, filters, skip=0, limit=10)
@@ -90,20 +90,19 @@ def test_get_by_engine_or_chassis_both_none():
 # ---------------------------------------------------------------------------
 
 def test_create_unit_success():
-    """Creates a unit and returns it with eager-loaded relations."""
+    """Adds the unit and flushes it so its id is set, without committing."""
     mock_db = MagicMock()
     unit_data = UnitCreate(
         model="TR", brand="Thunderrol", color="Red",
         current_location_id=1, engine_number="ENG1",
     )
-    mock_unit = Unit(id=1, model="TR")
-    mock_db.query.return_value.options.return_value.filter.return_value.one_or_none.return_value = mock_unit
 
     result = UnitRepository.create_unit(mock_db, unit_data)
 
-    mock_db.add.assert_called_once()
-    mock_db.commit.assert_called_once()
-    assert result is mock_unit
+    mock_db.add.assert_called_once_with(result)
+    mock_db.flush.assert_called_once()
+    mock_db.commit.assert_not_called()
+    assert result.engine_number == "ENG1"
 
 
 def test_create_unit_missing_location():
@@ -124,17 +123,16 @@ def test_create_unit_missing_location():
 # ---------------------------------------------------------------------------
 
 def test_update_unit_success():
-    """Updates unit fields and returns refreshed unit."""
+    """Sets the given fields on the unit without committing."""
     mock_db = MagicMock()
     unit = Unit(id=1, model="Old")
     update_data = UnitUpdate(model="New")
-    mock_db.query.return_value.options.return_value.filter.return_value.one_or_none.return_value = unit
 
     result = UnitRepository.update_unit(mock_db, unit, update_data)
 
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(unit)
+    mock_db.commit.assert_not_called()
     assert result is unit
+    assert unit.model == update_data.model
 
 
 # ---------------------------------------------------------------------------
@@ -142,13 +140,13 @@ def test_update_unit_success():
 # ---------------------------------------------------------------------------
 
 def test_delete_unit_cascades_transfers():
-    """Deletes unit and its transfers, then commits."""
+    """Deletes unit and its transfers without committing."""
     mock_db = MagicMock()
 
     UnitRepository.delete_unit(mock_db, 1)
 
     assert mock_db.query.call_count >= 2
-    mock_db.commit.assert_called_once()
+    mock_db.commit.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -158,7 +156,7 @@ def test_delete_unit_cascades_transfers():
 def test_get_stats():
     """Returns stats dict with expected keys."""
     mock_db = MagicMock()
-    mock_db.query.return_value.count.return_value = 0
+    mock_db.query.return_value.one.return_value = MagicMock(total=3, available=1, sold=1, in_transit=1)
     mock_db.query.return_value.join.return_value.group_by.return_value.all.return_value = []
 
     result = UnitRepository.get_stats(mock_db)
@@ -168,3 +166,6 @@ def test_get_stats():
     assert "sold_units" in result
     assert "in_transit_units" in result
     assert "inventory_by_location" in result
+    assert result["total_units"] == 3
+    # All status counts come from a single aggregate query.
+    mock_db.query.return_value.one.assert_called_once()
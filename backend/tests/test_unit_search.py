@@ -0,0 +1,113 @@
+"""Unit search: FTS5 shadow table on SQLite, criteria and ranking, /units/search."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.core.search import fts_query, rank_search, search_criteria
+from app.models.models import Unit
+from app.repositories.unit_repository import UnitRepository
+from app.schemas.unit import UnitFilters
+
+
+@pytest.fixture
+def search_units(make_units):
+    return make_units(prefix="SRCH", chassis_number=None, brand="Srchbrand", each=[
+        {"engine_number": "SRCH-44710", "model": "TR-SRCH", "color": "Red"},
+        {"engine_number": "SRCH-LX20", "chassis_number": "CH-SRCH-9", "model": "CARGO-SRCH",
+         "color": "Blue", "notes": "Scratch on left door"},
+        {"engine_number": "SRCH-50%", "model": "TR SRCH 50", "color": "Gray"},
+    ])
+
+
+def _engines(units) -> list[str]:
+    return [unit.engine_number for unit in units]
+
+
+def test_search_matches_partial_serials_and_notes(db_session, search_units):
+    """Words match anywhere inside serials, model, brand or notes, in any case."""
+    def search(term):
+        return _engines(UnitRepository.search_units(db_session, term, UnitFilters(), 10))
+
+    assert search("4471") == ["SRCH-44710"]
+    assert search("srch-lx") == ["SRCH-LX20"]
+    assert search("ch-srch-9") == ["SRCH-LX20"]
+    assert search("left DOOR") == ["SRCH-LX20"]
+    assert search("srch lorry") == []
+
+
+def test_search_short_words_and_like_wildcards(db_session, search_units):
+    """Words shorter than a trigram still match; % and _ are taken literally."""
+    def search(term):
+        return _engines(UnitRepository.search_units(db_session, term, UnitFilters(), 10))
+
+    assert search("srch 50") == ["SRCH-50%"]
+    assert search("srch %") == ["SRCH-50%"]
+    assert search("srch _") == []
+
+
+def test_search_index_follows_updates(db_session, search_units):
+    """The shadow table is kept in step by triggers, for ORM and bulk updates alike."""
+    unit = search_units[0]
+    unit.notes = "fresh paint job"
+    db_session.commit()
+    assert _engines(UnitRepository.search_units(db_session, "paint job", UnitFilters(), 10)) == [
+        "SRCH-44710"
+    ]
+
+    db_session.query(Unit).filter(Unit.id == unit.id).update({"notes": "rust"})
+    db_session.commit()
+    assert UnitRepository.search_units(db_session, "paint job", UnitFilters(), 10) == []
+
+
+def test_search_ranked_results_are_complete_and_limited(db_session, search_units):
+    """Joining the bm25 rank neither duplicates nor drops matches; limit caps the list."""
+    results = UnitRepository.search_units(db_session, "srchbrand", UnitFilters(), 10)
+    assert sorted(_engines(results)) == sorted(_engines(search_units))
+
+    assert len(UnitRepository.search_units(db_session, "srchbrand", UnitFilters(), 2)) == 2
+
+
+def test_get_units_search_filter_uses_index(db_session, search_units):
+    """The /units/ search filter shares the same matching rules."""
+    units = UnitRepository.get_units(db_session, UnitFilters(search="srch door"), 0, 10)
+    assert [unit["engine_number"] for unit in units] == ["SRCH-LX20"]
+
+
+def test_fts_query_quotes_words():
+    """Every word becomes a quoted FTS5 phrase; embedded quotes are doubled."""
+    assert fts_query(["lx20", 'say"hi']) == '"lx20" AND "say""hi"'
+
+
+def test_postgresql_search_uses_ilike_and_word_similarity():
+    """PostgreSQL filters with ILIKE (trigram-indexed) and ranks by word_similarity."""
+    mock_db = MagicMock()
+    mock_db.get_bind.return_value.dialect.name = "postgresql"
+    query = rank_search(mock_db, Session().query(Unit.id), "lx20 door")
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("units.notes ILIKE") == 2
+    assert "ORDER BY greatest(word_similarity(" in sql
+    assert len(search_criteria(mock_db, "lx20 door")) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_units_endpoint(client: AsyncClient, auth_headers, search_units, test_locations):
+    """/units/search returns ranked matches and honours the location filter."""
+    response = await client.get("/api/v1/units/search", params={"q": "srch-44"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [unit["engine_number"] for unit in response.json()] == ["SRCH-44710"]
+
+    response = await client.get(
+        "/api/v1/units/search",
+        params={"q": "srch-44", "location_id": test_locations[1].id},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = await client.get("/api/v1/units/search", params={"q": ""}, headers=auth_headers)
+    assert response.status_code == 422
@@ -22,7 +22,7 @@ def test_get_units_delegates(mock_repo):
 
     result = UnitService.get_units(mock_db, filters, skip=0, limit=10)
 
-    mock_repo.get_units.assert_called_once_with(mock_db, filters, 0, 10)
+    mock_repo.get_units.assert_called_once_with(mock_db, filters, 0, 10, None)
     assert result == []
 
 
@@ -43,9 +43,12 @@ def test_create_unit_success(mock_loc_repo, mock_unit_repo):
     mock_unit_repo.get_by_engine_or_chassis.return_value = None
     mock_unit = Unit(id=1, model="TR")
     mock_unit_repo.create_unit.return_value = mock_unit
+    mock_unit_repo.get_unit.return_value = mock_unit
 
     result = UnitService.create_unit(mock_db, unit_data)
     assert result is mock_unit
+    mock_db.commit.assert_called_once()
+    mock_unit_repo.get_unit.assert_called_once_with(mock_db, 1)
 
 
 @patch("app.services.unit_service.UnitRepository")
@@ -142,6 +145,7 @@ def test_update_unit_location_change_creates_transfer(mock_loc_repo, mock_unit_r
     UnitService.update_unit(mock_db, 1, update_data, user_id=1)
 
     mock_transfer_svc.create_unit_transfer_record.assert_called_once()
+    mock_db.commit.assert_called_once()
 
 
 @patch("app.services.unit_service.TransferService")
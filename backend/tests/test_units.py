@@ -117,6 +117,38 @@ async def test_delete_unit(client: AsyncClient, auth_headers, test_users, test_l
     assert get_resp.status_code == 404
 
 
+def test_update_unit_is_one_transaction(db_session, test_users, test_locations):
+    """A unit update and its transfer records commit together, or not at all."""
+    from unittest.mock import patch
+    from sqlalchemy import event
+    from app.models.models import Transfer, Unit, UnitStatus
+    from app.schemas.unit import UnitUpdate
+    from app.services.unit_service import UnitService
+
+    unit = Unit(model="TR-UOW", brand="Thunderrol", color="Red", current_location_id=test_locations[0].id)
+    db_session.add(unit)
+    db_session.commit()
+    update = UnitUpdate(current_location_id=test_locations[1].id, status=UnitStatus.SOLD)
+
+    with patch(
+        "app.repositories.transfer_repository.Transfer", side_effect=[Transfer(), RuntimeError("boom")]
+    ), pytest.raises(RuntimeError):
+        UnitService.update_unit(db_session, unit.id, update, test_users[0].id)
+    assert unit.current_location_id == test_locations[0].id
+    assert unit.status != UnitStatus.SOLD
+    assert db_session.query(Transfer).filter(Transfer.unit_id == unit.id).count() == 0
+
+    commits = []
+    record = commits.append
+    event.listen(db_session, "after_commit", record)
+    try:
+        UnitService.update_unit(db_session, unit.id, update, test_users[0].id)
+    finally:
+        event.remove(db_session, "after_commit", record)
+    assert len(commits) == 1
+    assert db_session.query(Transfer).filter(Transfer.unit_id == unit.id).count() == 2
+
+
 @pytest.mark.asyncio
 async def test_get_unit_stats(client: AsyncClient, auth_headers, test_users, test_locations):
     """Can fetch unit statistics."""
@@ -142,3 +174,70 @@ async def test_get_unit_transfers(client: AsyncClient, auth_headers, test_users,
     response = await client.get(f"/api/v1/units/{unit_id}/transfers", headers=auth_headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+@pytest.mark.asyncio
+async def test_get_units_cursor_pagination(client: AsyncClient, auth_headers, db_session, test_users, test_locations):
+    """Following X-Next-Cursor walks every matching unit once, in id order."""
+    from app.models.models import Unit
+
+    units = [
+        Unit(model="TR-Cursor", brand="CursorBrand", color="Red", current_location_id=test_locations[0].id)
+        for _ in range(5)
+    ]
+    db_session.add_all(units)
+    db_session.commit()
+
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"search": "CursorBrand", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/units/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [unit["id"] for unit in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert seen == sorted(unit.id for unit in units)
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_units_invalid_cursor(client: AsyncClient, auth_headers, test_users, test_locations):
+    """A malformed cursor is rejected with 400."""
+    for cursor in ("not-a-cursor", "WyJ4Il0"):  # garbage, and ["x"] for an integer key
+        response = await client.get("/api/v1/units/", params={"cursor": cursor}, headers=auth_headers)
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_unit_transfers_cursor_pagination(client: AsyncClient, auth_headers, db_session, test_users, test_locations):
+    """Unit transfers page on (dispatched_at, id), newest first, ties broken by id."""
+    from datetime import datetime
+    from app.models.models import Transfer, TransferStatus, Unit
+
+    unit = Unit(model="TR-Cursor", brand="Thunderrol", color="Red", current_location_id=test_locations[0].id)
+    db_session.add(unit)
+    db_session.flush()
+    transfers = [
+        Transfer(
+            unit_id=unit.id,
+            origin_location_id=test_locations[0].id,
+            destination_location_id=test_locations[1].id,
+            status=TransferStatus.RECEIVED,
+            dispatched_at=dispatched_at,
+        )
+        for dispatched_at in (
+            datetime(2025, 1, 1), datetime(2025, 2, 1), datetime(2025, 2, 1), datetime(2025, 3, 1),
+        )
+    ]
+    db_session.add_all(transfers)
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(f"/api/v1/units/{unit.id}/transfers", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [transfer["id"] for transfer in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [transfers[3].id, transfers[2].id, transfers[1].id, transfers[0].id]